@@ -5,7 +5,7 @@ from dotenv import load_dotenv  # Carga las variables de entorno
 from sqlalchemy import engine_from_config, pool
 
 from alembic import context
-from app.db.base import Base
+from app.db.base import Base, include_object
 
 # Cargar las variables de entorno desde el archivo .env
 load_dotenv()
@@ -37,7 +37,11 @@ def get_url():
 def run_migrations_offline():
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -54,7 +58,11 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
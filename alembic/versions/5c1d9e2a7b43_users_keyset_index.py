@@ -0,0 +1,24 @@
+"""Keyset pagination index on users
+LATAM-API
+Revision ID: 5c1d9e2a7b43
+Revises: 037af117b920
+Create Date: 2026-10-17 09:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1d9e2a7b43'
+down_revision: Union[str, None] = '037af117b920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
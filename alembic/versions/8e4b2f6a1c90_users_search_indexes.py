@@ -0,0 +1,74 @@
+"""Search indexes on users
+LATAM-API
+Revision ID: 8e4b2f6a1c90
+Revises: 5c1d9e2a7b43
+Create Date: 2026-10-17 12:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b2f6a1c90'
+down_revision: Union[str, None] = '5c1d9e2a7b43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREFIX_COLUMNS = ('username', 'first_name', 'last_name')
+
+# Texto completo en SQLite: tabla FTS5 de contenido externo sincronizada con triggers
+SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5("
+    "username, first_name, last_name, content='users', content_rowid='id')",
+    "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+    "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); END",
+    "CREATE TRIGGER users_fts_au AFTER UPDATE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+    # Indexa las filas existentes
+    "INSERT INTO users_fts(users_fts) VALUES ('rebuild')",
+)
+
+# Texto completo en PostgreSQL: índice GIN sobre el documento tsvector
+POSTGRESQL_FTS = (
+    "CREATE INDEX ix_users_search_document ON users USING gin ("
+    "to_tsvector('simple', coalesce(username, '') || ' ' || coalesce(first_name, '') "
+    "|| ' ' || coalesce(last_name, '')))"
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.create_index('ix_users_role_active_id', 'users', ['role', 'active', 'id'], unique=False)
+    # text_pattern_ops permite usar el índice en LIKE 'prefijo%' con cualquier collation
+    opclass = ' text_pattern_ops' if dialect == 'postgresql' else ''
+    for column in PREFIX_COLUMNS:
+        op.create_index(
+            f'ix_users_{column}_lower', 'users', [sa.text(f'lower({column}){opclass}')], unique=False
+        )
+    if dialect == 'sqlite':
+        for statement in SQLITE_FTS:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute(POSTGRESQL_FTS)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS users_fts')
+        for trigger in ('users_fts_ai', 'users_fts_ad', 'users_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    elif dialect == 'postgresql':
+        op.drop_index('ix_users_search_document', table_name='users')
+    for column in PREFIX_COLUMNS:
+        op.drop_index(f'ix_users_{column}_lower', table_name='users')
+    op.drop_index('ix_users_role_active_id', table_name='users')
@@ -0,0 +1,28 @@
+"""Row version on users for optimistic concurrency
+LATAM-API
+Revision ID: b7d3e9f05a21
+Revises: 8e4b2f6a1c90
+Create Date: 2026-10-17 14:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9f05a21'
+down_revision: Union[str, None] = '8e4b2f6a1c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users', sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    # SQLite >= 3.35 admite DROP COLUMN sin recrear la tabla (y sus triggers FTS)
+    op.drop_column('users', 'version')
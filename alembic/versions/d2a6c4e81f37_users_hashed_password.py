@@ -0,0 +1,25 @@
+"""Password hash on users
+LATAM-API
+Revision ID: d2a6c4e81f37
+Revises: b7d3e9f05a21
+Create Date: 2026-10-17 15:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6c4e81f37'
+down_revision: Union[str, None] = 'b7d3e9f05a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('hashed_password', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'hashed_password')
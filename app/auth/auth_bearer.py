@@ -1,24 +1,24 @@
-import json
+import hashlib
 import logging
+import time
+from typing import Any, Dict, Optional
 
 from fastapi import HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
 from pydantic import BaseModel
 
-from app.core import security
+from app.core.cache import MISSING, InMemoryCache
 from app.core.config import settings
-from app.db.session import Session
 
 from .auth_handler import decodeJWT
+from .revocation import revocation_index
 
-logging.basicConfig(
-    format="%(asctime)s %(levelname)-5s [%(filename)s:%(lineno)d]\n%(message)s\n",
-    datefmt="%Y-%m-%d:%H:%M:%S",
-    level=logging.INFO,
-)
 logger = logging.getLogger(__name__)
 
+# Claims de tokens ya verificados, por digest del token. Cada entrada expira
+# junto con el propio token (claim "exp").
+token_cache = InMemoryCache(max_size=settings.JWT_CACHE_MAX_SIZE)
+
 
 class TokenPayload(BaseModel):
     exp: int
@@ -29,7 +29,7 @@ class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super(JWTBearer, self).__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request):
+    async def __call__(self, request: Request) -> Dict[str, Any]:
         credentials: HTTPAuthorizationCredentials = await super(
             JWTBearer, self
         ).__call__(request)
@@ -39,22 +39,51 @@ class JWTBearer(HTTPBearer):
                 raise HTTPException(
                     status_code=403, detail="Invalid authentication scheme."
                 )
-            if not self.verify_jwt(credentials.credentials):
+            claims = self.decode_claims(credentials.credentials)
+            if not claims:
                 raise HTTPException(
                     status_code=403, detail="Invalid token or expired token."
                 )
 
-            return credentials.credentials
-           
+            return claims
+
         else:
             raise HTTPException(status_code=403, detail="Invalid authorization code.")
 
     def verify_jwt(self, jwtoken: str) -> bool:
-        isTokenValid: bool = False
+        return self.decode_claims(jwtoken) is not None
+
+    def decode_claims(self, jwtoken: str) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve los claims del token si es válido y no fue revocado, o None. Los
+        tokens válidos se guardan en caché hasta su expiración para no verificar la
+        firma en cada petición; la revocación se consulta siempre (en memoria).
+        """
+        key = hashlib.sha256(jwtoken.encode()).digest()
+        claims = token_cache.get(key)
+        if claims is not MISSING:
+            if revocation_index.is_revoked(claims.get("jti")):
+                return None
+            if claims["exp"] >= time.time():
+                return dict(claims)
+            token_cache.delete(key)
+            return None
         try:
             payload = decodeJWT(jwtoken)
-        except:
+        except Exception:
             payload = None
-        if payload:
-            isTokenValid = True
-        return isTokenValid
+        if not payload or revocation_index.is_revoked(payload.get("jti")):
+            return None
+        ttl = payload["exp"] - time.time()
+        if ttl > 0:
+            token_cache.set(key, payload, ttl=ttl)
+        return dict(payload)
+
+
+def token_cache_stats() -> Dict[str, float]:
+    """
+    Contadores de la caché de tokens verificados, incluida la tasa de aciertos.
+    """
+    stats = token_cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    return {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
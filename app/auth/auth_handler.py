@@ -1,8 +1,11 @@
+import logging
 import time
+import uuid
 from typing import Dict
 
 from app.core.config import settings
-from jose import jwt
+
+logger = logging.getLogger(__name__)
 
 JWT_SECRET = settings.SECRET_KEY
 JWT_ALGORITHM = "HS256"
@@ -15,9 +18,13 @@ def token_response(token: str):
 
 
 def signJWT(user_id: str) -> Dict[str, str]:
+    # python-jose se importa al primer uso (arranque en frío más corto)
+    from jose import jwt
+
     payload = {
         "user_id": user_id,
-        "exp": time.time() + 600
+        "exp": time.time() + 600,
+        "jti": uuid.uuid4().hex,
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
@@ -25,11 +32,13 @@ def signJWT(user_id: str) -> Dict[str, str]:
 
 
 def decodeJWT(token: str) -> dict:
+    from jose import jwt
+
     try:
         decoded_token = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         # print(time.time())
         # print(decoded_token["exp"])
         return decoded_token if decoded_token["exp"] >= time.time() else None
     except Exception as e:
-        print(f"error--->{e}")
+        logger.warning("Token JWT inválido: %s", e)
         return {}
\ No newline at end of file
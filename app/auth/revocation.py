@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_revoked_token
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationIndex:
+    """
+    Índice en memoria de los tokens revocados (jti -> exp) de este proceso.
+
+    La consulta `is_revoked` es una búsqueda en un dict, sin E/S ni bloqueos, y
+    es la que se hace en cada petición autenticada. El índice se actualiza con
+    `refresh`, que solo trae las revocaciones registradas desde la última marca
+    de agua (menos un margen `grace` para las transacciones que confirmaron
+    tarde), y descarta las entradas cuyo token ya expiró.
+    """
+
+    def __init__(self, grace_seconds: float = 30.0):
+        self.grace = timedelta(seconds=grace_seconds)
+        self._expires: Dict[str, int] = {}
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti in self._expires
+
+    def add(self, jti: str, expires_at: int) -> None:
+        with self._lock:
+            self._expires[jti] = expires_at
+
+    def refresh(self, db: Session, now: Optional[float] = None) -> int:
+        """
+        Incorpora las revocaciones nuevas; devuelve cuántas filas se leyeron.
+        """
+        now = time.time() if now is None else now
+        since = None if self._watermark is None else self._watermark - self.grace
+        rows = crud_revoked_token.revoked_since(db, since=since, now=int(now))
+        with self._lock:
+            for row in rows:
+                self._expires[row.jti] = row.expires_at
+                if self._watermark is None or row.revoked_at > self._watermark:
+                    self._watermark = row.revoked_at
+        self.prune(now)
+        return len(rows)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Descarta los tokens expirados: JWTBearer ya los rechaza por su "exp".
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [jti for jti, exp in self._expires.items() if exp < now]
+            for jti in expired:
+                del self._expires[jti]
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expires.clear()
+            self._watermark = None
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+def token_expiry(claims: Dict) -> int:
+    """
+    Claim "exp" como segundos epoch enteros (signJWT lo emite con decimales).
+    """
+    return math.ceil(claims["exp"])
+
+
+revocation_index = RevocationIndex(settings.TOKEN_REVOCATION_GRACE_SECONDS)
+
+
+def _refresh(session_factory: Callable[[], Session], purge: bool) -> None:
+    db = session_factory()
+    try:
+        revocation_index.refresh(db)
+        if purge:
+            crud_revoked_token.delete_expired(db, now=int(time.time()))
+    finally:
+        db.close()
+
+
+async def poll_revocations(
+    session_factory: Callable[[], Session],
+    interval: float = settings.TOKEN_REVOCATION_POLL_SECONDS,
+    purge_interval: float = settings.TOKEN_REVOCATION_PURGE_SECONDS,
+) -> None:
+    """
+    Tarea de fondo: actualiza el índice cada `interval` segundos y, cada
+    `purge_interval`, borra de la tabla los tokens ya expirados.
+    """
+    last_purge = time.monotonic()
+    while True:
+        purge = time.monotonic() - last_purge >= purge_interval
+        try:
+            await run_in_threadpool(_refresh, session_factory, purge)
+            if purge:
+                last_purge = time.monotonic()
+        except Exception as e:
+            logger.warning("No se pudo actualizar el índice de tokens revocados: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,296 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type
+
+from starlette.responses import JSONResponse
+
+from app.core.metrics import Counter, registry
+
+http_requests_rejected = registry.register(
+    Counter(
+        "http_requests_rejected",
+        "Peticiones rechazadas por el control de admisión.",
+        ["reason"],
+    )
+)
+rate_limit_local_fallbacks = registry.register(
+    Counter(
+        "rate_limit_local_fallbacks",
+        "Peticiones limitadas con los buckets del proceso por no obtener el bloqueo "
+        "del archivo compartido.",
+    )
+)
+
+
+def refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    """
+    Tokens disponibles en el bucket tras reponer `rate` por segundo desde `updated`.
+    """
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class RateLimitStore:
+    """
+    Estado de los token buckets por cliente. `take` consume un token y devuelve 0
+    si la petición se admite, o los segundos hasta que haya uno disponible.
+    """
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Buckets en memoria del proceso (cada worker limita por separado). Se
+    conservan los `max_size` clientes usados más recientemente.
+    """
+
+    def __init__(self, max_size: int = 65536):
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = refill(tokens, updated, now, rate, burst)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SharedRateLimitStore(RateLimitStore):
+    """
+    Buckets en un archivo mapeado en memoria (p. ej. en /dev/shm) compartido por
+    todos los workers de uvicorn del host, con acceso serializado por flock.
+
+    Es una tabla hash de `slots` entradas (hash de la clave, tokens, última
+    actualización) con sondeo lineal corto; si no hay lugar se reutiliza la
+    entrada más antigua del vecindario, lo que a lo sumo devuelve su ráfaga a un
+    cliente inactivo.
+
+    `take` se llama desde el event loop, así que no espera el bloqueo: lo
+    intenta `LOCK_ATTEMPTS` veces sin bloquear y, si sigue ocupado, limita la
+    petición con los buckets en memoria del proceso. Un archivo existente con
+    otro tamaño (otro `slots`) se rechaza en lugar de truncarlo: otros workers
+    pueden tenerlo mapeado y acceder fuera del archivo les provocaría SIGBUS.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+    PROBES = 8
+    LOCK_ATTEMPTS = 64
+
+    def __init__(self, path: str, slots: int = 65536):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.slots = slots
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                current = os.fstat(self._fd).st_size
+                if current == 0:
+                    # Archivo nuevo: nadie puede tenerlo mapeado todavía
+                    os.ftruncate(self._fd, size)
+                elif current != size:
+                    raise ValueError(
+                        f"{path} tiene {current} bytes y se esperaban {size} "
+                        f"({slots} entradas); elimínelo o use otra ruta."
+                    )
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._lock = threading.Lock()
+        self._local = InMemoryRateLimitStore()
+
+    def _try_lock(self) -> bool:
+        for _ in range(self.LOCK_ATTEMPTS):
+            try:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                time.sleep(0)
+        return False
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 marca una entrada libre
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        digest = self._hash(key)
+        first = digest % self.slots
+        with self._lock:
+            if not self._try_lock():
+                rate_limit_local_fallbacks.inc()
+                return self._local.take(key, rate, burst, now)
+            try:
+                offset, tokens, updated = None, burst, now
+                oldest = None
+                for probe in range(self.PROBES):
+                    slot_offset = ((first + probe) % self.slots) * self.SLOT.size
+                    slot_key, slot_tokens, slot_updated = self.SLOT.unpack_from(
+                        self._map, slot_offset
+                    )
+                    if slot_key == digest:
+                        offset, tokens, updated = slot_offset, slot_tokens, slot_updated
+                        break
+                    if slot_key == 0:
+                        offset = slot_offset
+                        break
+                    if oldest is None or slot_updated < oldest[1]:
+                        oldest = (slot_offset, slot_updated)
+                if offset is None:
+                    offset = oldest[0]
+                tokens = refill(tokens, updated, now, rate, burst)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self.SLOT.pack_into(self._map, offset, digest, tokens, now)
+                return wait
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+RATE_LIMIT_BACKENDS: Dict[str, Type[RateLimitStore]] = {
+    "memory": InMemoryRateLimitStore,
+    "shared": SharedRateLimitStore,
+}
+
+
+def build_rate_limit_store(backend: str, **kwargs: Any) -> RateLimitStore:
+    """
+    Construye el almacén de buckets configurado por nombre.
+    """
+    try:
+        store_class = RATE_LIMIT_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend de rate limiting desconocido: {backend}")
+    return store_class(**kwargs)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def client_key(scope, decode_claims: Optional[Callable[[str], Optional[Dict]]] = None) -> str:
+    """
+    Identifica al cliente por el sujeto de su JWT, si presenta uno válido, o por
+    su IP (la que resuelve uvicorn, incluido --proxy-headers).
+    """
+    if decode_claims is not None:
+        authorization = _header(scope, b"authorization")
+        if authorization and authorization[:7].lower() == b"bearer ":
+            claims = decode_claims(authorization[7:].decode("latin-1").strip())
+            subject = claims and (claims.get("sub") or claims.get("user_id"))
+            if subject:
+                return f"sub:{subject}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que responde de inmediato, antes de ocupar un hilo o una
+    conexión, cuando la petición no debe admitirse:
+
+    - 503 si hay `max_in_flight` peticiones en curso o la espera reciente por
+      una conexión del pool supera `max_pool_wait` segundos (rechazo de carga);
+    - 429 si el cliente agotó su token bucket (`rate` por segundo, ráfaga `burst`).
+
+    Ambas respuestas llevan `Retry-After`. Un límite en 0 queda desactivado y
+    las rutas de `exempt_paths` (estado y métricas) siempre se admiten.
+    """
+
+    def __init__(
+        self,
+        app,
+        *,
+        store: Optional[RateLimitStore] = None,
+        rate: float = 0.0,
+        burst: float = 1.0,
+        max_in_flight: int = 0,
+        max_pool_wait: float = 0.0,
+        pool_wait: Optional[Callable[[], float]] = None,
+        decode_claims: Optional[Callable[[str], Optional[Dict]]] = None,
+        exempt_paths: Sequence[str] = ("/", "/metrics"),
+    ):
+        self.app = app
+        self.store = store
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.pool_wait = pool_wait
+        self.decode_claims = decode_claims
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+
+    def _reject(self, status_code: int, reason: str, retry_after: float, detail: str):
+        http_requests_rejected.inc(reason)
+        return JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def check(self, scope) -> Optional[JSONResponse]:
+        """
+        Devuelve la respuesta de rechazo, o None si la petición se admite.
+        """
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return self._reject(503, "in_flight", 1, "Servicio saturado, reintente más tarde.")
+        if self.max_pool_wait and self.pool_wait is not None:
+            if self.pool_wait() > self.max_pool_wait:
+                return self._reject(
+                    503, "pool_wait", 1, "Servicio saturado, reintente más tarde."
+                )
+        if self.rate > 0 and self.store is not None:
+            key = client_key(scope, self.decode_claims)
+            wait = self.store.take(key, self.rate, self.burst, time.time())
+            if wait > 0:
+                return self._reject(
+                    429, "rate_limit", wait, "Demasiadas peticiones, reintente más tarde."
+                )
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        rejection = self.check(scope)
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        # El contador solo se modifica en el hilo del event loop
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Type
+
+# Valor devuelto por CacheBackend.get cuando la clave no está en la caché.
+# Se distingue de None, que se usa para guardar búsquedas negativas.
+MISSING = object()
+
+
+class CacheBackend:
+    """
+    Interfaz común de las cachés. Las implementaciones deben ser seguras para
+    usarse desde varios hilos.
+    """
+
+    def get(self, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """
+    Caché deshabilitada: nunca guarda nada.
+    """
+
+    def __init__(self, **kwargs: Any):
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        self.misses += 1
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    def delete(self, *keys: Hashable) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": 0, "misses": self.misses, "evictions": 0, "expirations": 0, "size": 0}
+
+
+class InMemoryCache(CacheBackend):
+    """
+    Caché en memoria del proceso con tamaño máximo (desalojo LRU) y expiración por TTL.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._data),
+        }
+
+
+# Implementaciones disponibles; un backend compartido (p. ej. Redis) se registra aquí.
+CACHE_BACKENDS: Dict[str, Type[CacheBackend]] = {
+    "memory": InMemoryCache,
+    "none": NullCache,
+}
+
+
+def build_cache(backend: str, **kwargs: Any) -> CacheBackend:
+    """
+    Construye la caché configurada por nombre.
+    """
+    try:
+        cache_class = CACHE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend de caché desconocido: {backend}")
+    return cache_class(**kwargs)
@@ -0,0 +1,109 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, List, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    ETag fuerte a partir de los valores que identifican la versión del recurso.
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def version_etag(version: int, variant: Any = None) -> str:
+    """
+    ETag fuerte derivado de la versión de la fila. `variant` distingue otras
+    representaciones del mismo estado (p. ej. un subconjunto de campos).
+    """
+    if variant is None:
+        return f'"{version}"'
+    digest = hashlib.sha256(repr(variant).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+_VERSION_ETAG = re.compile(r'^"(\d+)(?:-[0-9a-f]+)?"$')
+
+
+def parse_if_match(header: str) -> Optional[List[int]]:
+    """
+    Versiones aceptadas por un encabezado If-Match; None si es "*" (cualquier
+    versión). Usa la comparación fuerte: las ETags débiles (W/) y las que no
+    provienen de `version_etag` no coinciden con ninguna versión.
+    """
+    if header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        match = _VERSION_ETAG.match(tag.strip())
+        if match:
+            versions.append(int(match.group(1)))
+    return versions
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Las fechas sin zona horaria se guardan en UTC (func.now())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(_as_utc(value), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match usa la comparación débil: se ignora el prefijo W/
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def is_conditional(request: Request) -> bool:
+    """
+    Indica si la petición trae If-None-Match o If-Modified-Since.
+    """
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Evalúa If-None-Match y, solo si no viene, If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return _as_utc(last_modified) <= since
+    return False
+
+
+def set_validators(
+    response: Response, etag: str, last_modified: Optional[datetime] = None
+) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """
+    Respuesta 304 sin cuerpo que repite los validadores.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
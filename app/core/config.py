@@ -1,14 +1,19 @@
 import os
-from typing import ClassVar
+from typing import ClassVar, Dict, Optional
 
-from pydantic import AnyHttpUrl, Field
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
   PROJECT_NAME: str = "LATAM-API"
 
   SQLALCHEMY_DATABASE_URL: ClassVar[str] =  os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./sql_app.db")
+  # Réplica de solo lectura para los endpoints GET (opcional)
+  SQLALCHEMY_REPLICA_URL: ClassVar[Optional[str]] = os.getenv("SQLALCHEMY_REPLICA_URL") or None
+  # Tras una escritura, las lecturas del mismo cliente van al primario durante
+  # estos segundos (lectura de las propias escrituras); 0 lo desactiva
+  READ_YOUR_WRITES_SECONDS: float = Field(default=5.0)
   SECRET_KEY: str = os.getenv("SECRET_KEY", "LATAM")
   # Algoritmo de encriptación (ALGORITHM)
 
@@ -20,6 +25,106 @@ class Settings(BaseSettings):
         description="Algoritmo para JWT",
         pattern=r'^(HS256|HS384|HS512|RS256|RS384|RS512|ES256|ES384|ES512)$'
     )
+
+  # Hash de contraseñas: costo de bcrypt, procesos del pool (0: un hilo) y
+  # máximo de cálculos en espera antes de responder 503
+  BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)
+  PASSWORD_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1, ge=0)
+  PASSWORD_HASH_MAX_PENDING: int = Field(default=64, ge=1)
+
+  # Usa el motor asíncrono (asyncpg / aiosqlite) en los endpoints CRUD de usuarios
+  DB_ASYNC: bool = Field(default=False)
+
+  # Número máximo de tokens JWT verificados que se mantienen en caché
+  JWT_CACHE_MAX_SIZE: int = Field(default=10000)
+
+  # Revocación de tokens: cada cuántos segundos se sondean las revocaciones nuevas,
+  # margen hacia atrás de cada sondeo (transacciones confirmadas tarde) y cada
+  # cuánto se borran de la tabla los tokens ya expirados
+  TOKEN_REVOCATION_POLL_SECONDS: float = Field(default=5.0, gt=0)
+  TOKEN_REVOCATION_GRACE_SECONDS: float = Field(default=30.0, ge=0)
+  TOKEN_REVOCATION_PURGE_SECONDS: float = Field(default=3600.0, gt=0)
+
+  # Control de admisión (0 desactiva cada límite): token bucket por cliente (sujeto
+  # del JWT o IP) con RATE_LIMIT_PER_SECOND peticiones por segundo y ráfaga
+  # RATE_LIMIT_BURST; rechazo con 503 si hay MAX_IN_FLIGHT_REQUESTS en curso o la
+  # espera reciente por una conexión del pool supera MAX_POOL_WAIT_MS.
+  # RATE_LIMIT_BACKEND "shared" comparte los buckets entre los workers del host
+  # mediante el archivo RATE_LIMIT_SHARED_PATH mapeado en memoria; si ya existe
+  # con otro RATE_LIMIT_SHARED_SLOTS el arranque falla (no se trunca en uso).
+  RATE_LIMIT_PER_SECOND: float = Field(default=0.0, ge=0)
+  RATE_LIMIT_BURST: int = Field(default=20, ge=1)
+  RATE_LIMIT_BACKEND: str = Field(default="memory", pattern="^(memory|shared)$")
+  RATE_LIMIT_SHARED_PATH: str = Field(default="/dev/shm/latam-api-ratelimit")
+  RATE_LIMIT_SHARED_SLOTS: int = Field(default=65536, ge=1)
+  MAX_IN_FLIGHT_REQUESTS: int = Field(default=0, ge=0)
+  MAX_POOL_WAIT_MS: float = Field(default=0.0, ge=0)
+
+  # Expone /metrics (Prometheus) y registra latencias por ruta y consultas SQL
+  METRICS_ENABLED: bool = Field(default=True)
+
+  # Logging: nivel, formato ("json" o "text") y muestreo de los eventos INFO
+  # (o inferiores) por logger, p. ej. {"app.endpoints.v1.users": 0.1}
+  LOG_LEVEL: str = Field(default="INFO")
+  LOG_FORMAT: str = Field(default="json", pattern="^(json|text)$")
+  LOG_SAMPLING: Dict[str, float] = Field(default_factory=dict)
+  # Registros en espera de escritura; si la cola se llena se descartan
+  LOG_QUEUE_SIZE: int = Field(default=10000)
+
+  # Registro de SQL: "off", "slow" (solo sentencias lentas) o "sample" (además,
+  # una fracción SQL_LOG_SAMPLE_RATE de todas las sentencias)
+  SQL_LOG_MODE: str = Field(default="slow", pattern="^(off|slow|sample)$")
+  SQL_LOG_SAMPLE_RATE: float = Field(default=0.01, ge=0, le=1)
+  SQL_SLOW_QUERY_MS: float = Field(default=200.0)
+  # Captura el plan (EXPLAIN) de las consultas SELECT lentas
+  SQL_EXPLAIN_SLOW: bool = Field(default=False)
+
+  # Tamaño máximo de página permitido en los listados de usuarios
+  USERS_PAGE_MAX_LIMIT: int = Field(default=1000)
+
+  # Serializa las lecturas de usuarios directamente a JSON en lugar de
+  # response_model + jsonable_encoder. Con USERS_SERIALIZATION_TRUSTED no se
+  # revalidan las filas leídas de la BD y se codifican con orjson (incluido en
+  # requirements.txt); sin él se usa el serializador de pydantic-core, más lento.
+  USERS_FAST_SERIALIZATION: bool = Field(default=False)
+  USERS_SERIALIZATION_TRUSTED: bool = Field(default=True)
+
+  # Agrupa las lecturas idénticas concurrentes de usuarios (GET /users/ y
+  # GET /users/{id}): una sola consulta y una sola serialización por grupo.
+  # Desactivado por defecto: una lectura puede unirse a otra que empezó antes
+  # de que se confirmara una escritura y devolver el estado anterior. Activado,
+  # solo se excluyen los clientes con la cookie de READ_YOUR_WRITES_SECONDS,
+  # que únicamente se fija cuando hay réplica
+  USERS_COALESCE_READS: bool = Field(default=False)
+
+  # Caché de lectura de usuarios: "memory" (en el proceso) o "none". Las
+  # invalidaciones no se propagan entre workers: "memory" solo es coherente con
+  # un único proceso, o aceptando filas atrasadas hasta USERS_CACHE_TTL_SECONDS
+  USERS_CACHE_BACKEND: str = Field(default="none")
+  USERS_CACHE_MAX_SIZE: int = Field(default=10000)
+  USERS_CACHE_TTL_SECONDS: float = Field(default=30.0)
+
+  # Filas que se traen de la base de datos por vez al exportar usuarios
+  USERS_EXPORT_BATCH_SIZE: int = Field(default=1000)
+
+  # Alta masiva: máximo de registros por petición y filas por sentencia INSERT
+  USERS_BULK_MAX_ITEMS: int = Field(default=10000)
+  USERS_BULK_CHUNK_SIZE: int = Field(default=500)
+
+  # Importación desde archivo: filas escritas por transacción
+  USERS_IMPORT_CHUNK_SIZE: int = Field(default=1000)
+
+  # Idempotency-Key en POST /users/: la primera respuesta de cada clave se repite
+  # durante IDEMPOTENCY_TTL_SECONDS. Las peticiones duplicadas concurrentes esperan
+  # hasta IDEMPOTENCY_WAIT_SECONDS a la que está en curso, cuya reserva caduca a
+  # los IDEMPOTENCY_LOCK_SECONDS si su proceso termina sin responder.
+  # IDEMPOTENCY_BACKEND: "memory" (en el proceso) o "database" (tabla compartida
+  # por todas las instancias)
+  IDEMPOTENCY_BACKEND: str = Field(default="memory", pattern="^(memory|database)$")
+  IDEMPOTENCY_TTL_SECONDS: float = Field(default=86400.0, gt=0)
+  IDEMPOTENCY_WAIT_SECONDS: float = Field(default=10.0, ge=0)
+  IDEMPOTENCY_LOCK_SECONDS: float = Field(default=60.0, gt=0)
+  IDEMPOTENCY_MAX_KEYS: int = Field(default=100000, ge=1)
   
 
 
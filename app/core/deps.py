@@ -1,6 +1,15 @@
-from typing import Generator
+import time
+from typing import AsyncGenerator, Generator
+
+from fastapi import Depends, Request, Response
+
+from app.core.config import settings
+from app.db import session
 from app.db.session import Session
 
+# Cookie con el instante (epoch) hasta el que el cliente lee del primario
+PRIMARY_UNTIL_COOKIE = "primary_until"
+
 
 def get_db() -> Generator:
     db = Session()
@@ -9,3 +18,49 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)) -> Generator:
+    """
+    Sesión para endpoints de solo lectura: usa la réplica si está configurada,
+    salvo que el cliente haya escrito hace menos de READ_YOUR_WRITES_SECONDS.
+    La sesión del primario no abre conexión si no se usa.
+    """
+    if session.ReplicaSession is None or reads_from_primary(request):
+        yield primary
+        return
+    db = session.ReplicaSession()
+    db.current_user_id = None
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def reads_from_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_write(response: Response) -> None:
+    """
+    Fija la cookie que dirige al primario las lecturas siguientes del cliente.
+    Se usa como dependencia de los endpoints de escritura.
+    """
+    window = settings.READ_YOUR_WRITES_SECONDS
+    if session.ReplicaSession is None or window <= 0:
+        return
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE,
+        f"{time.time() + window:.3f}",
+        max_age=max(1, int(window + 0.999)),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+async def get_async_db() -> AsyncGenerator:
+    async with session.AsyncSession() as db:
+        yield db
@@ -0,0 +1,354 @@
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import anyio
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+from app.models.idempotency_keys import IdempotencyKey
+
+idempotent_requests = registry.register(
+    Counter(
+        "idempotent_requests",
+        "Peticiones con Idempotency-Key según su resultado.",
+        ["outcome"],
+    )
+)
+
+
+class IdempotencyKeyMismatch(ValueError):
+    """
+    La clave ya se usó con un cuerpo de petición distinto.
+    """
+
+
+class IdempotencyKeyInProgress(RuntimeError):
+    """
+    Otra petición con la misma clave sigue en curso tras el tiempo de espera.
+    """
+
+
+class IdempotencyRecord:
+    """
+    Estado de una clave: en curso (status_code None) o con su respuesta guardada.
+    """
+    __slots__ = ("fingerprint", "status_code", "body")
+
+    def __init__(
+        self, fingerprint: str, status_code: Optional[int] = None, body: Optional[bytes] = None
+    ):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.body = body
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+def fingerprint(payload: Any) -> str:
+    """
+    HMAC-SHA256 con SECRET_KEY del cuerpo de la petición (JSON con claves
+    ordenadas). Al ir firmada, la huella guardada no permite comprobar por
+    fuerza bruta los valores del cuerpo (p. ej. la contraseña) sin la clave.
+    """
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hmac.new(settings.SECRET_KEY.encode(), encoded.encode(), hashlib.sha256).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Almacén de claves de idempotencia. Las implementaciones deben ser seguras
+    para usarse desde varios hilos; `now` son segundos epoch.
+    """
+
+    def reserve(
+        self, key: str, fingerprint: str, *, now: float, lock_ttl: float
+    ) -> Optional[IdempotencyRecord]:
+        """
+        Reserva la clave si no existe (o expiró) y devuelve None; si no, devuelve
+        su estado actual sin modificarlo.
+        """
+        raise NotImplementedError
+
+    def complete(self, key: str, record: IdempotencyRecord, *, now: float, ttl: float) -> None:
+        """
+        Guarda la respuesta de una clave reservada durante `ttl` segundos.
+        """
+        raise NotImplementedError
+
+    def release(self, key: str) -> None:
+        """
+        Libera una reserva sin respuesta guardada (la petición falló y puede reintentarse).
+        """
+        raise NotImplementedError
+
+    def wait(self, key: str, timeout: float) -> None:
+        """
+        Espera a lo sumo `timeout` segundos a que la clave pueda haber cambiado.
+        """
+        raise NotImplementedError
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """
+    Claves en memoria del proceso (cada worker por separado), con un máximo de
+    `max_size` entradas; al superarlo se descartan las más antiguas.
+    """
+
+    def __init__(self, max_size: int = 100000, **kwargs: Any):
+        self.max_size = max_size
+        self._records: "OrderedDict[str, Tuple[IdempotencyRecord, float]]" = OrderedDict()
+        self._changed = threading.Condition()
+
+    def reserve(
+        self, key: str, fingerprint: str, *, now: float, lock_ttl: float
+    ) -> Optional[IdempotencyRecord]:
+        with self._changed:
+            entry = self._records.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            self._records.pop(key, None)
+            self._records[key] = (IdempotencyRecord(fingerprint), now + lock_ttl)
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+            return None
+
+    def complete(self, key: str, record: IdempotencyRecord, *, now: float, ttl: float) -> None:
+        with self._changed:
+            self._records[key] = (record, now + ttl)
+            self._records.move_to_end(key)
+            self._changed.notify_all()
+
+    def release(self, key: str) -> None:
+        with self._changed:
+            entry = self._records.get(key)
+            if entry is not None and not entry[0].completed:
+                del self._records[key]
+            self._changed.notify_all()
+
+    def wait(self, key: str, timeout: float) -> None:
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Claves en la tabla idempotency_keys, compartida por todas las instancias.
+    La reserva es un INSERT: la clave primaria garantiza que solo una petición
+    la obtiene. Las demás sondean la fila cada `poll_interval` segundos y las
+    filas expiradas se borran a lo sumo cada `purge_interval` segundos.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        poll_interval: float = 0.05,
+        purge_interval: float = 3600.0,
+        **kwargs: Any,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+
+    def _purge(self, db, now: float) -> None:
+        if now - self._purged_at < self.purge_interval:
+            return
+        self._purged_at = now
+        db.execute(IdempotencyKey.__table__.delete().where(IdempotencyKey.expires_at < now))
+        db.commit()
+
+    def reserve(
+        self, key: str, fingerprint: str, *, now: float, lock_ttl: float
+    ) -> Optional[IdempotencyRecord]:
+        table = IdempotencyKey.__table__
+        with self.session_factory() as db:
+            self._purge(db, now)
+            # Dos intentos: el segundo tras borrar una fila expirada o liberada
+            for _ in range(2):
+                db.add(
+                    IdempotencyKey(
+                        key=key, fingerprint=fingerprint, expires_at=math.ceil(now + lock_ttl)
+                    )
+                )
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+                row = db.get(IdempotencyKey, key)
+                if row is None:
+                    continue
+                if row.expires_at > now:
+                    return IdempotencyRecord(row.fingerprint, row.status_code, row.body)
+                db.execute(
+                    table.delete().where(and_(table.c.key == key, table.c.expires_at <= now))
+                )
+                db.commit()
+                db.expunge_all()
+            # Otra petición la reservó entre medio: se trata como en curso
+            return IdempotencyRecord(fingerprint)
+
+    def complete(self, key: str, record: IdempotencyRecord, *, now: float, ttl: float) -> None:
+        table = IdempotencyKey.__table__
+        with self.session_factory() as db:
+            db.execute(
+                table.update()
+                .where(and_(table.c.key == key, table.c.fingerprint == record.fingerprint))
+                .values(
+                    status_code=record.status_code,
+                    body=record.body,
+                    expires_at=math.ceil(now + ttl),
+                )
+            )
+            db.commit()
+
+    def release(self, key: str) -> None:
+        table = IdempotencyKey.__table__
+        with self.session_factory() as db:
+            db.execute(
+                table.delete().where(and_(table.c.key == key, table.c.status_code.is_(None)))
+            )
+            db.commit()
+
+    def wait(self, key: str, timeout: float) -> None:
+        time.sleep(min(timeout, self.poll_interval))
+
+
+IDEMPOTENCY_BACKENDS: Dict[str, Type[IdempotencyStore]] = {
+    "memory": InMemoryIdempotencyStore,
+    "database": DatabaseIdempotencyStore,
+}
+
+
+def build_idempotency_store(backend: str, **kwargs: Any) -> IdempotencyStore:
+    """
+    Construye el almacén de claves de idempotencia configurado por nombre.
+    """
+    try:
+        store_class = IDEMPOTENCY_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Backend de idempotencia desconocido: {backend}")
+    return store_class(**kwargs)
+
+
+def claim(
+    store: IdempotencyStore,
+    key: str,
+    request_fingerprint: str,
+    *,
+    lock_ttl: float,
+    wait_timeout: float,
+) -> Optional[IdempotencyRecord]:
+    """
+    Reserva la clave y devuelve None, o devuelve la respuesta guardada de una
+    petición anterior con el mismo cuerpo; si esta sigue en curso, espera a lo
+    sumo `wait_timeout` segundos a que termine.
+    """
+    deadline = time.monotonic() + wait_timeout
+    while True:
+        record = store.reserve(key, request_fingerprint, now=time.time(), lock_ttl=lock_ttl)
+        if record is None:
+            return None
+        if record.fingerprint != request_fingerprint:
+            idempotent_requests.inc("mismatch")
+            raise IdempotencyKeyMismatch(key)
+        if record.completed:
+            idempotent_requests.inc("replayed")
+            return record
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            idempotent_requests.inc("in_progress")
+            raise IdempotencyKeyInProgress(key)
+        store.wait(key, remaining)
+
+
+def settle(
+    store: IdempotencyStore,
+    key: str,
+    request_fingerprint: str,
+    status_code: int,
+    body: bytes,
+    *,
+    ttl: float,
+) -> None:
+    """
+    Guarda la respuesta de una clave reservada con `claim`.
+    """
+    record = IdempotencyRecord(request_fingerprint, status_code, body)
+    store.complete(key, record, now=time.time(), ttl=ttl)
+    idempotent_requests.inc("executed")
+
+
+def run_idempotent(
+    store: IdempotencyStore,
+    key: str,
+    request_fingerprint: str,
+    fn: Callable[[], Tuple[int, bytes]],
+    *,
+    ttl: float,
+    lock_ttl: float,
+    wait_timeout: float,
+) -> Tuple[int, bytes, bool]:
+    """
+    Ejecuta `fn` una sola vez por clave y devuelve (código, cuerpo, repetida).
+    Las llamadas posteriores con la misma clave y el mismo cuerpo reciben la
+    respuesta guardada; si la primera sigue en curso, esperan a que termine.
+    Si `fn` lanza una excepción la reserva se libera y la excepción se propaga.
+    """
+    record = claim(
+        store, key, request_fingerprint, lock_ttl=lock_ttl, wait_timeout=wait_timeout
+    )
+    if record is not None:
+        return record.status_code, record.body, True
+    try:
+        status_code, body = fn()
+    except BaseException:
+        store.release(key)
+        raise
+    settle(store, key, request_fingerprint, status_code, body, ttl=ttl)
+    return status_code, body, False
+
+
+async def run_idempotent_async(
+    store: IdempotencyStore,
+    key: str,
+    request_fingerprint: str,
+    fn: Callable[[], Awaitable[Tuple[int, bytes]]],
+    *,
+    ttl: float,
+    lock_ttl: float,
+    wait_timeout: float,
+) -> Tuple[int, bytes, bool]:
+    """
+    Como `run_idempotent` para una corrutina `fn`. Las operaciones del almacén
+    (y la espera a otra petición en curso) bloquean, así que se ejecutan en el
+    pool de hilos para no detener el event loop.
+    """
+    record = await run_in_threadpool(
+        claim, store, key, request_fingerprint, lock_ttl=lock_ttl, wait_timeout=wait_timeout
+    )
+    if record is not None:
+        return record.status_code, record.body, True
+    try:
+        status_code, body = await fn()
+    except BaseException:
+        # La liberación debe completarse aunque la petición se haya cancelado
+        with anyio.CancelScope(shield=True):
+            await run_in_threadpool(store.release, key)
+        raise
+    await run_in_threadpool(settle, store, key, request_fingerprint, status_code, body, ttl=ttl)
+    return status_code, body, False
@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# Atributos estándar de LogRecord; el resto proviene de `extra=` y se incluye
+# como campos adicionales en la salida JSON.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea cada registro como un objeto JSON en una sola línea.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros INFO (o de menor nivel) de los
+    loggers configurados. Se aplica la tasa del ancestro más cercano:
+    {"app": 0.5, "app.endpoints": 0.1} muestrea "app.endpoints.v1.users" al 10 %.
+    Los avisos y errores nunca se descartan.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, candidate = 1.0, name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+# Tipos de argumentos que pueden formatearse más tarde en el hilo del listener
+SAFE_ARG_TYPES = (str, int, float, bool)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea el mensaje en el hilo que registra: el
+    mensaje, sus argumentos y la excepción se formatean en el hilo del
+    QueueListener. Solo se difiere con argumentos inmutables (str, int, float,
+    None); con cualquier otro objeto (instancias ORM, sesiones...) el mensaje
+    se formatea al registrar, porque en el otro hilo podría haber cambiado.
+    Si la cola está llena el registro se descarta en lugar de bloquear la
+    petición.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Un único dict como argumento queda en record.args y también es mutable
+        args = record.args
+        if (
+            not isinstance(record.msg, str)
+            or isinstance(args, dict)
+            or not all(value is None or type(value) in SAFE_ARG_TYPES for value in args or ())
+        ):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    sampling: Optional[Dict[str, float]] = None,
+    stream=None,
+) -> QueueListener:
+    """
+    Configura el logger raíz con un único QueueHandler cuyo QueueListener
+    escribe en `stream` (stdout por defecto) desde un hilo propio. Si ya estaba
+    configurado, detiene el listener anterior y lo reemplaza.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if (fmt or settings.LOG_FORMAT) == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)-5s [%(name)s] %(message)s")
+        )
+
+    handler = LazyQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(
+        SamplingFilter(settings.LOG_SAMPLING if sampling is None else sampling)
+    )
+
+    root = logging.getLogger()
+    for previous in list(root.handlers):
+        root.removeHandler(previous)
+    root.addHandler(handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """
+    Detiene el listener, escribiendo antes los registros pendientes.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Muestras de un collector: (sufijo del nombre, etiquetas, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Métrica con etiquetas. Los valores se guardan por tupla de etiquetas y se
+    actualizan bajo un lock, para ser seguros con los hilos del threadpool.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield "_total", dict(zip(self.labelnames, labelvalues)), value
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield "", dict(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [conteo por bucket..., conteo de +Inf, suma]
+        self._values: Dict[tuple, List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(labelvalues)
+            if data is None:
+                data = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            data[index] += 1
+            data[-1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for labelvalues, data in items:
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data[:-1]):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_count", labels, cumulative
+            yield "_sum", labels, data[-1]
+
+
+class CallbackMetric(Metric):
+    """
+    Métrica cuyo valor se lee al exponerla (p. ej. estado del pool o contadores
+    de una caché), sin costo en el camino de las peticiones.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, documentation)
+        self.type = type
+        self.callback = callback
+
+    def samples(self) -> Iterable[Sample]:
+        suffix = "_total" if self.type == "counter" else ""
+        for labels, value in self.callback():
+            yield suffix, labels, value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Genera el formato de texto de Prometheus (0.0.4).
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(
+                    f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(
+    Counter("http_requests", "Peticiones HTTP atendidas.", ["method", "route", "status"])
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Latencia de las peticiones HTTP por ruta.",
+        ["method", "route"],
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "Peticiones HTTP en curso.")
+)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra latencia, código de estado y peticiones en curso
+    por plantilla de ruta (p. ej. /api/v1/users/{user_id}).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(elapsed, scope["method"], template)
+            http_requests.inc(scope["method"], template, str(status_code))
+
+
+def register_cache_metrics(caches: Dict[str, Callable[[], Dict[str, float]]]) -> None:
+    """
+    Publica los contadores de las cachés dadas (nombre -> función stats()).
+    """
+
+    def collector(key: str):
+        def collect():
+            for name, stats in caches.items():
+                yield {"cache": name}, stats()[key]
+
+        return collect
+
+    for key in ("hits", "misses", "evictions", "expirations"):
+        registry.register(
+            CallbackMetric(f"cache_{key}", f"Caché: {key}.", collector(key), type="counter")
+        )
+    registry.register(
+        CallbackMetric("cache_entries", "Caché: entradas almacenadas.", collector("size"))
+    )
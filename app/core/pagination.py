@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+# Columnas que forman la clave de ordenamiento de cada modo de paginación por cursor.
+# El id se incluye siempre como desempate para que la clave sea única.
+KEYSET_ORDERINGS = {
+    "id": ("id",),
+    "created_at": ("created_at", "id"),
+}
+
+
+class InvalidCursorError(ValueError):
+    """
+    El cursor recibido no se puede decodificar o no corresponde al ordenamiento pedido.
+    """
+
+
+def encode_cursor(order_by: str, row: Any) -> str:
+    """
+    Genera un cursor opaco a partir de la última fila de una página.
+    """
+    values = []
+    for column in KEYSET_ORDERINGS[order_by]:
+        value = getattr(row, column)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(value)
+    raw = json.dumps({"o": order_by, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, tuple]:
+    """
+    Decodifica un cursor opaco y devuelve el ordenamiento y los valores de la clave.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        order_by = data["o"]
+        columns = KEYSET_ORDERINGS[order_by]
+        values = list(data["v"])
+        if len(values) != len(columns):
+            raise InvalidCursorError("Cursor inválido.")
+        for i, column in enumerate(columns):
+            if column == "id":
+                values[i] = int(values[i])
+            elif column == "created_at":
+                values[i] = datetime.fromisoformat(values[i])
+    except InvalidCursorError:
+        raise
+    except Exception as e:
+        raise InvalidCursorError("Cursor inválido.") from e
+    return order_by, tuple(values)
@@ -0,0 +1,36 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Scope ASGI de la petición en curso. Se comparte con los hilos del threadpool,
+# que copian el contexto al ejecutar los endpoints síncronos.
+current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_scope", default=None)
+
+
+def current_route() -> Optional[str]:
+    """
+    Plantilla de ruta de la petición en curso (o su path si aún no se resolvió).
+    """
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que publica el scope de la petición en `current_scope`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
@@ -1,12 +1,25 @@
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Any, Deque, List, Optional, Union
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# passlib/bcrypt y python-jose se importan al primer uso y no al arrancar: las
+# rutas que no autentican no los necesitan y acortan el arranque en frío.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+    )
 
 
 ALGORITHM = "HS256"
@@ -19,16 +32,140 @@ def create_access_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+            minutes=int(settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    from jose import jwt
+
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    pwd_context = get_pwd_context()
+    return [pwd_context.hash(password) for password in passwords]
+
+
+class PasswordHasherBusy(RuntimeError):
+    """
+    Se alcanzó el máximo de cálculos de contraseña en espera.
+    """
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt (100-250 ms de CPU por llamada) fuera del proceso del
+    servidor, en un ProcessPoolExecutor de `workers` procesos creado al primer
+    uso; con `workers=0` usa un hilo. Con más de `max_pending` operaciones en
+    curso o en cola falla de inmediato con PasswordHasherBusy en lugar de
+    encolar sin límite.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # "spawn": los procesos no heredan hilos ni conexiones del servidor
+                    self._executor = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix="password-hasher")
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherBusy("Demasiados cálculos de contraseña en espera.")
+            self._pending += 1
+
+    def _release(self, *_: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args):
+        self._acquire()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(get_password_hash, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(verify_password, plain_password, hashed_password)
+        )
+
+    def hash_blocking(self, password: str) -> str:
+        """
+        Variante para código síncrono (p. ej. endpoints en el threadpool): espera
+        el resultado en el hilo que llama.
+        """
+        return self._submit(get_password_hash, password).result()
+
+    def hash_many_blocking(self, passwords: List[str], batch_size: int = 32) -> List[str]:
+        """
+        Calcula varios hashes repartidos en lotes entre los procesos. Toda la
+        llamada ocupa un único lugar de la cola y mantiene a lo sumo un lote por
+        proceso en el executor, de modo que los cálculos individuales (p. ej.
+        /auth/token) se intercalan con los lotes en lugar de esperar a todos.
+        Si un lote falla, los que aún no empezaron se cancelan.
+        """
+        self._acquire()
+        try:
+            executor = self._get_executor()
+            window = max(1, self.workers)
+            in_flight: Deque[Future] = deque()
+            hashes: List[str] = []
+            try:
+                for start in range(0, len(passwords), batch_size):
+                    if len(in_flight) >= window:
+                        hashes.extend(in_flight.popleft().result())
+                    batch = passwords[start : start + batch_size]
+                    in_flight.append(executor.submit(get_password_hashes, batch))
+                while in_flight:
+                    hashes.extend(in_flight.popleft().result())
+            except BaseException:
+                for future in in_flight:
+                    future.cancel()
+                raise
+            return hashes
+        finally:
+            self._release()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,89 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Type[BaseModel], many: bool) -> TypeAdapter:
+    # El serializador de pydantic-core se compila una sola vez por esquema
+    return TypeAdapter(List[schema] if many else schema)
+
+
+@lru_cache(maxsize=256)
+def partial_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Esquema con solo los campos `fields` de `schema` (mismos tipos y
+    restricciones). Se construye una vez por conjunto de campos.
+    """
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+
+def _row(obj: Any, fields: Iterable[str]) -> dict:
+    return {field: getattr(obj, field) for field in fields}
+
+
+def serialize(data: Any, schema: Type[BaseModel], *, many: bool = False, trusted: bool = True) -> bytes:
+    """
+    Serializa filas ORM directamente a JSON con la forma de `schema`.
+
+    Con `trusted`, los datos (leídos de nuestra propia base de datos) no se
+    vuelven a validar: se copian los atributos del esquema y se codifican con
+    orjson, o con el serializador de pydantic-core si orjson no está
+    instalado. Sin `trusted`, se validan con `from_attributes` como haría
+    `response_model`, pero sin pasar por `jsonable_encoder`.
+    """
+    adapter = _adapter(schema, many)
+    if not trusted:
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    fields = tuple(schema.model_fields)
+    rows = [_row(obj, fields) for obj in data] if many else _row(data, fields)
+    if orjson is not None:
+        return orjson.dumps(rows)
+    if many:
+        return adapter.dump_json([schema.model_construct(**row) for row in rows])
+    return adapter.dump_json(schema.model_construct(**rows))
+
+
+def json_response(
+    data: Any,
+    schema: Type[BaseModel],
+    *,
+    many: bool = False,
+    trusted: bool = True,
+    response: Response = None,
+    status_code: int = 200,
+) -> Response:
+    """
+    Respuesta JSON ya serializada. Como FastAPI no aplica a una respuesta
+    devuelta directamente los encabezados fijados en el parámetro `response`
+    del endpoint, aquí se copian.
+    """
+    return encoded_response(
+        serialize(data, schema, many=many, trusted=trusted),
+        response=response,
+        status_code=status_code,
+    )
+
+
+def encoded_response(
+    body: bytes, *, response: Response = None, status_code: int = 200
+) -> Response:
+    """
+    Respuesta con un cuerpo JSON ya codificado (p. ej. compartido entre
+    peticiones), con los encabezados fijados en `response`.
+    """
+    result = Response(body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import Counter, registry
+
+singleflight_coalesced = registry.register(
+    Counter(
+        "singleflight_coalesced",
+        "Lecturas que reutilizaron el resultado de una ejecución idéntica en curso.",
+        ["group"],
+    )
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave desde varios hilos (p. ej.
+    endpoints síncronos en el threadpool): solo la primera ejecuta `fn` y las
+    que llegan mientras está en curso esperan y reciben el mismo resultado o la
+    misma excepción. Nada se guarda al terminar: no es una caché.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            singleflight_coalesced.inc(self.group)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+    Variante para corrutinas en el event loop: las llamadas con la misma clave
+    esperan el futuro de la primera. Si la primera se cancela (p. ej. su
+    cliente se desconectó), la siguiente en espera repite la ejecución.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self.coalesced = 0
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            singleflight_coalesced.inc(self.group)
+            try:
+                # shield: cancelar a quien espera no cancela la ejecución compartida
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+            return await self.do(key, fn)
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Marca la excepción como recuperada si nadie más la esperaba
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
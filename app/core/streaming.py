@@ -0,0 +1,165 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+# Registro leído de un archivo de importación: (número de fila, datos o mensaje de error)
+ParsedRecord = Tuple[int, Union[Dict[str, Any], str]]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def encode_ndjson(
+    rows: Iterable[Mapping[str, Any]], columns: Sequence[str], batch_size: int = 500
+) -> Iterator[bytes]:
+    """
+    Codifica las filas como JSON delimitado por saltos de línea, agrupando
+    `batch_size` filas por bloque enviado.
+    """
+    buffer = []
+    for row in rows:
+        buffer.append(
+            json.dumps(
+                {column: row[column] for column in columns},
+                default=_json_default,
+                ensure_ascii=False,
+            )
+        )
+        if len(buffer) >= batch_size:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer.clear()
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
+
+
+def encode_csv(
+    rows: Iterable[Mapping[str, Any]], columns: Sequence[str], batch_size: int = 500
+) -> Iterator[bytes]:
+    """
+    Codifica las filas como CSV con encabezado, agrupando `batch_size` filas por bloque.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(
+            [
+                row[column].isoformat() if isinstance(row[column], datetime) else row[column]
+                for column in columns
+            ]
+        )
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+class LineTooLongError(ValueError):
+    """
+    Una línea del archivo de importación supera el tamaño máximo permitido.
+    """
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_line_length: int = 1 << 20
+) -> AsyncIterator[str]:
+    """
+    Divide un flujo de bytes UTF-8 en líneas sin cargarlo completo en memoria.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        if "\n" not in pending:
+            if len(pending) > max_line_length:
+                raise LineTooLongError("Línea demasiado larga.")
+            continue
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def parse_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[ParsedRecord]:
+    """
+    Interpreta cada línea no vacía como un objeto JSON.
+    """
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield row, "JSON inválido."
+            continue
+        if not isinstance(data, dict):
+            yield row, "Se esperaba un objeto JSON."
+            continue
+        yield row, data
+
+
+async def parse_csv(
+    lines: AsyncIterator[str], max_record_length: int = 1 << 20
+) -> AsyncIterator[ParsedRecord]:
+    """
+    Interpreta las líneas como CSV con encabezado. Los campos entre comillas pueden
+    contener saltos de línea; los campos vacíos se omiten para usar su valor por defecto.
+    Un registro de varias líneas de más de `max_record_length` caracteres (p. ej. por
+    una comilla sin cerrar) lanza LineTooLongError.
+    """
+    header = None
+    row = 0
+    parts: List[str] = []
+    length = 0
+    open_quote = False
+    async for line in lines:
+        parts.append(line)
+        length += len(line) + 1
+        # Paridad de comillas acumulada: solo se cuentan las de la línea nueva
+        open_quote ^= line.count('"') % 2 == 1
+        if open_quote:
+            if length > max_record_length:
+                raise LineTooLongError(
+                    "Registro demasiado largo o campo entre comillas sin cerrar."
+                )
+            continue  # Campo entre comillas que continúa en la siguiente línea
+        record = "\n".join(parts)
+        parts, length = [], 0
+        fields = next(csv.reader([record]), []) if record else []
+        if not fields:
+            continue
+        if header is None:
+            header = fields
+            continue
+        row += 1
+        if len(fields) != len(header):
+            yield row, "Número de columnas incorrecto."
+            continue
+        yield row, {k: v for k, v in zip(header, fields) if v != ""}
+    if parts:
+        yield row + 1, "Campo entre comillas sin cerrar."
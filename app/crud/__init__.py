@@ -1 +1,2 @@
-from .users import crud_user  # noqa: F401
+from .revoked_tokens import crud_revoked_token  # noqa: F401
+from .users import async_crud_user, crud_user  # noqa: F401
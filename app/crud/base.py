@@ -1,22 +1,164 @@
 from tokenize import String
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Set, Type, TypeVar, Union
 
 from app.db.base_class import Base
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, make_transient_to_detached
+
+from app.core.cache import MISSING, CacheBackend
+from app.core.pagination import KEYSET_ORDERINGS
+from app.crud.cache import ModelCache
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+# Construcción de consultas compartida por CRUDBase y AsyncCRUDBase
+
+
+def project_columns(model: Any, columns: Optional[Sequence[str]], order_by: str) -> list:
+    """
+    Opciones para cargar solo las columnas pedidas, más las del ordenamiento
+    (necesarias para el cursor de la página siguiente) y la clave primaria.
+    """
+    if not columns:
+        return []
+    names = dict.fromkeys([*columns, *KEYSET_ORDERINGS[order_by]])
+    return [load_only(*(getattr(model, name) for name in names))]
+
+
+def page_summary_statement(
+    model: Any,
+    *,
+    skip: int = 0,
+    after: Optional[tuple] = None,
+    limit: int = 100,
+    order_by: str = "id",
+    modified_column: str = "updated_at",
+):
+    """
+    Agregado sobre la misma ventana de filas que `get_multi` / `get_multi_keyset`
+    (cantidad, última modificación, mínimo, máximo y suma de los id y, si el
+    modelo la tiene, suma de las versiones).
+    """
+    columns = [getattr(model, column) for column in KEYSET_ORDERINGS[order_by]]
+    table = model.__table__
+    version = table.c.version if "version" in table.c else literal(0)
+    window = select(
+        model.id,
+        getattr(model, modified_column).label("modified"),
+        version.label("version"),
+    )
+    if after is not None:
+        window = window.where(
+            tuple_(*columns) > tuple_(*after, types=[c.type for c in columns])
+        )
+    window = window.order_by(*columns).offset(skip).limit(limit).subquery()
+    return select(
+        func.count().label("count"),
+        func.max(window.c.modified).label("last_modified"),
+        func.min(window.c.id).label("min_id"),
+        func.max(window.c.id).label("max_id"),
+        func.sum(window.c.id).label("sum_id"),
+        func.sum(window.c.version).label("sum_version"),
+    )
+
+
+def summarize_rows(
+    model: Any, rows: Sequence[Any], modified_column: str = "updated_at"
+) -> Dict[str, Any]:
+    """
+    El mismo resumen que `page_summary_statement`, calculado sobre las filas ya
+    leídas (deben incluir id, `modified_column` y, si existe, version).
+    """
+    versioned = "version" in model.__table__.c
+    modified = [getattr(row, modified_column) for row in rows]
+    ids = [row.id for row in rows]
+    return {
+        "count": len(rows),
+        "last_modified": max(modified) if rows else None,
+        "min_id": min(ids) if rows else None,
+        "max_id": max(ids) if rows else None,
+        "sum_id": sum(ids) if rows else None,
+        "sum_version": sum(row.version if versioned else 0 for row in rows) if rows else None,
+    }
+
+
+def update_statement(
+    model: Any, id: Any, values: Dict[str, Any], versions: Optional[Iterable[int]] = None
+):
+    """
+    UPDATE de la fila `id`; si el modelo tiene columna `version` la incrementa
+    y, con `versions`, solo actualiza si la versión actual es una de ellas.
+    """
+    table = model.__table__
+    values = dict(values)
+    stmt = update(table).where(table.c.id == id)
+    if "version" in table.c:
+        values["version"] = table.c.version + 1
+        if versions is not None:
+            stmt = stmt.where(table.c.version.in_(list(versions)))
+    return stmt.values(**values)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        cache: Optional[Union[CacheBackend, ModelCache]] = None,
+    ):
         self.model = model
+        # Un ModelCache se comparte tal cual (mismas invalidaciones); un backend
+        # se envuelve en uno propio
+        self.cache = cache if isinstance(cache, ModelCache) else ModelCache(model, cache)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        cached = self.cache.get_row(id)
+        if cached is not MISSING:
+            return self._from_cache(db, cached)
+        token = self.cache.fill_token()
+        obj = db.query(self.model).filter(self.model.id == id).first()
+        if self._fills_cache(db):
+            self.cache.set_row(id, obj, token)
+        return obj
+
+    def get_by_unique(self, db: Session, column: str, value: Any) -> Optional[ModelType]:
+        """
+        Obtiene una fila por una columna única, pasando por la caché de lectura.
+        """
+        cached_id = self.cache.get_pointer(column, value)
+        if cached_id is None:
+            return None
+        if cached_id is not MISSING:
+            obj = self.get(db, cached_id)
+            if obj is not None and getattr(obj, column) == value:
+                return obj
+        token = self.cache.fill_token()
+        obj = db.query(self.model).filter(getattr(self.model, column) == value).first()
+        if self._fills_cache(db):
+            self.cache.set_pointer(column, value, obj, token)
+            if obj is not None:
+                self.cache.set_row(obj.id, obj, token)
+        return obj
+
+    @staticmethod
+    def _fills_cache(db: Session) -> bool:
+        # Lo leído de una réplica puede estar atrasado respecto de una escritura
+        # que ya invalidó la caché: no se guarda para no servirlo hasta el TTL.
+        return not db.info.get("replica", False)
+
+    def _from_cache(self, db: Session, data: Optional[Dict[str, Any]]) -> Optional[ModelType]:
+        # Reconstruye la instancia desde la caché y la asocia a la sesión sin consultar la BD.
+        if data is None:
+            return None
+        obj = self.model(**data)
+        make_transient_to_detached(obj)
+        return db.merge(obj, load=False)
 
     def get_run(self, db: Session, run: String) -> Optional[ModelType]:
         return (
@@ -27,42 +169,274 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         )
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str = "id",
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        return (
+            self._project(db.query(self.model), columns, order_by)
+            .order_by(*self._keyset_columns(order_by))
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_multi_keyset(
+        self,
+        db: Session,
+        *,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        where: Iterable[Any] = (),
+        columns: Optional[Sequence[str]] = None,
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        """
+        Paginación por cursor: devuelve las filas posteriores a la clave `after`
+        que cumplen los filtros `where`. Cada página es una búsqueda por índice
+        sin importar su profundidad.
+        """
+        keys = self._keyset_columns(order_by)
+        query = self._project(db.query(self.model), columns, order_by).filter(*where)
+        if after is not None:
+            query = query.filter(
+                tuple_(*keys) > tuple_(*after, types=[c.type for c in keys])
+            )
+        return query.order_by(*keys).limit(limit).all()
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
+    def _project(self, query, columns: Optional[Sequence[str]], order_by: str):
+        return query.options(*project_columns(self.model, columns, order_by))
 
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
+    def get_page_summary(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        modified_column: str = "updated_at",
+    ) -> RowMapping:
+        """
+        Resume la misma ventana de filas que `get_multi` / `get_multi_keyset`
+        sin traer las filas (ver `page_summary_statement`); sirve como validador
+        de la página.
+        """
+        stmt = page_summary_statement(
+            self.model,
+            skip=skip,
+            after=after,
+            limit=limit,
+            order_by=order_by,
+            modified_column=modified_column,
+        )
+        return db.execute(stmt).mappings().one()
+
+    def summarize_page(
+        self, rows: Sequence[Any], modified_column: str = "updated_at"
+    ) -> Dict[str, Any]:
+        """
+        El mismo resumen que `get_page_summary`, calculado sobre las filas ya leídas.
+        """
+        return summarize_rows(self.model, rows, modified_column)
+
+    def stream(
+        self,
+        db: Session,
+        *,
+        where: Iterable[Any] = (),
+        order_by: str = "id",
+        yield_per: int = 1000,
+    ) -> Iterator[RowMapping]:
+        """
+        Recorre las filas con un cursor del lado del servidor, trayendo `yield_per`
+        filas por vez; la memoria usada no depende del tamaño de la tabla.
+        """
+        stmt = (
+            select(*self.model.__table__.c)
+            .where(*where)
+            .order_by(*self._keyset_columns(order_by))
+            .execution_options(yield_per=yield_per)
+        )
+        yield from db.execute(stmt).mappings()
+
+    def _keyset_columns(self, order_by: str) -> list:
+        return [getattr(self.model, column) for column in KEYSET_ORDERINGS[order_by]]
+
+    def create(
+        self, db: Session, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        Inserta el registro con un único INSERT ... RETURNING (o INSERT + SELECT
+        por clave primaria si el dialecto no soporta RETURNING).
+        """
+        table = self.model.__table__
+        stmt = insert(table).values(**self._column_values(obj_in))
+        if db.get_bind().dialect.insert_returning:
+            row = db.execute(stmt.returning(*table.c)).mappings().one()
+        else:
+            primary_key = db.execute(stmt).inserted_primary_key
+            row = self._fetch_row(db, primary_key[0])
         db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        self.cache.invalidate(dict(row))
+        return self._from_cache(db, dict(row))
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: List[Union[CreateSchemaType, Dict[str, Any]]],
+        chunk_size: int = 500,
+    ) -> List[Optional[RowMapping]]:
+        """
+        Inserta registros en lotes de `chunk_size` filas, con un INSERT ... RETURNING
+        y un commit por lote. Devuelve las filas creadas en el mismo orden de
+        `objs_in`; None indica que el registro violó una restricción de unicidad.
+        """
+        table = self.model.__table__
+        returning = db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order
+        created: List[Optional[RowMapping]] = []
+        for start in range(0, len(objs_in), chunk_size):
+            chunk = [self._column_values(obj_in) for obj_in in objs_in[start : start + chunk_size]]
+            try:
+                if returning:
+                    stmt = insert(table).returning(*table.c, sort_by_parameter_order=True)
+                    created.extend(db.execute(stmt, chunk).mappings().all())
+                else:
+                    db.execute(insert(table), chunk)
+                    created.extend(self._fetch_inserted(db, chunk))
+                db.commit()
+            except IntegrityError:
+                # Otra petición insertó un valor único mientras tanto: se reintenta
+                # el lote fila por fila para identificar los registros en conflicto.
+                db.rollback()
+                created.extend(self._create_rows_one_by_one(db, chunk))
+            self.cache.invalidate(*chunk)
+        self.cache.invalidate(*(dict(row) for row in created if row is not None))
+        return created
+
+    def _create_rows_one_by_one(
+        self, db: Session, rows: List[Dict[str, Any]]
+    ) -> List[Optional[RowMapping]]:
+        table = self.model.__table__
+        returning = db.get_bind().dialect.insert_returning
+        created: List[Optional[RowMapping]] = []
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    if returning:
+                        stmt = insert(table).returning(*table.c)
+                        created.append(db.execute(stmt, row).mappings().one())
+                    else:
+                        db.execute(insert(table), row)
+                        created.extend(self._fetch_inserted(db, [row]))
+            except IntegrityError:
+                created.append(None)
+        db.commit()
+        return created
+
+    def _fetch_inserted(
+        self, db: Session, rows: List[Dict[str, Any]]
+    ) -> List[RowMapping]:
+        # Recupera las filas recién insertadas cuando el dialecto no soporta RETURNING
+        # en inserciones múltiples. Se usa la primera columna única del modelo.
+        column = next(c for c in self.model.__table__.c if c.unique)
+        values = [row[column.name] for row in rows]
+        found = {
+            r[column.name]: r
+            for r in db.execute(
+                select(*self.model.__table__.c).where(column.in_(values))
+            ).mappings()
+        }
+        return [found.get(value) for value in values]
+
+    def _column_values(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        # Valores a insertar: solo los campos que son columnas del modelo (un
+        # esquema puede traer campos que no se guardan tal cual, p. ej. password).
+        data = obj_in if isinstance(obj_in, dict) else jsonable_encoder(obj_in)
+        columns = self.model.__table__.c
+        return {key: value for key, value in data.items() if key in columns}
+
+    def _fetch_row(self, db: Session, id: Any) -> RowMapping:
+        # Relee la fila escrita cuando el dialecto no soporta RETURNING
+        table = self.model.__table__
+        return db.execute(select(*table.c).where(table.c.id == id)).mappings().one()
+
+    def get_existing_values(
+        self, db: Session, column: str, values: Iterable[Any]
+    ) -> Set[Any]:
+        """
+        Devuelve cuáles de `values` ya existen en la columna indicada, con una sola consulta IN.
+        """
+        values = set(values)
+        if not values:
+            return set()
+        attr = getattr(self.model, column)
+        return set(db.scalars(select(attr).where(attr.in_(values))))
 
     def update(
         self,
         db: Session,
         *,
-        db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
-    ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        db_obj: Optional[ModelType] = None,
+        id: Any = None,
+        versions: Optional[Iterable[int]] = None,
+    ) -> Optional[ModelType]:
+        """
+        Actualiza la fila `id` (o la de `db_obj`) con un único UPDATE ... RETURNING,
+        sin leerla antes. Si el modelo tiene columna `version` la incrementa y,
+        con `versions`, solo actualiza si la versión actual es una de ellas.
+        Devuelve None si ninguna fila cumplió las condiciones (rowcount 0).
+        """
+        if id is None:
+            id = db_obj.id
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
+        table = self.model.__table__
+        values = {key: value for key, value in update_data.items() if key in table.c}
+        if not values and versions is None:
+            return self.get(db, id)
 
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+        # Valores anteriores, si están a mano, para invalidar también sus claves únicas
+        previous = self.cache.snapshot(db_obj) if db_obj is not None else self.cache.get_row(id)
+        stmt = update_statement(self.model, id, values, versions)
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(stmt.returning(*table.c)).mappings().first()
+        else:
+            result = db.execute(stmt)
+            row = self._fetch_row(db, id) if result.rowcount else None
         db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        if row is None:
+            return None
+        self.cache.invalidate(previous if isinstance(previous, dict) else None, dict(row))
+        return self._from_cache(db, dict(row))
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
+    def remove(self, db: Session, *, id: int) -> Optional[RowMapping]:
+        """
+        Elimina la fila con un único DELETE ... RETURNING; devuelve sus valores, o
+        None si no existía (rowcount 0).
+        """
+        table = self.model.__table__
+        stmt = delete(table).where(table.c.id == id)
+        if db.get_bind().dialect.delete_returning:
+            row = db.execute(stmt.returning(*table.c)).mappings().first()
+        else:
+            row = {"id": id} if db.execute(stmt).rowcount else None
+        # Como con Session.delete, una instancia ya cargada queda separada de la
+        # sesión (conservando sus valores) en lugar de expirar apuntando a una
+        # fila inexistente.
+        loaded = db.identity_map.get(db.identity_key(self.model, id))
+        if row is not None and loaded is not None:
+            db.expunge(loaded)
         db.commit()
-        return obj
+        if row is None:
+            return None
+        self.cache.invalidate(dict(row))
+        return row
@@ -0,0 +1,208 @@
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Type, Union
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.cache import MISSING, CacheBackend
+from app.core.pagination import KEYSET_ORDERINGS
+from app.crud.base import (
+    CreateSchemaType,
+    ModelType,
+    UpdateSchemaType,
+    page_summary_statement,
+    project_columns,
+    summarize_rows,
+    update_statement,
+)
+from app.crud.cache import ModelCache
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Variante asíncrona de CRUDBase para usar con AsyncSession.
+    """
+
+    def __init__(
+        self,
+        model: Type[ModelType],
+        cache: Optional[Union[CacheBackend, ModelCache]] = None,
+    ):
+        self.model = model
+        self.cache = cache if isinstance(cache, ModelCache) else ModelCache(model, cache)
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        cached = self.cache.get_row(id)
+        if cached is not MISSING:
+            return await self._from_cache(db, cached)
+        token = self.cache.fill_token()
+        obj = await db.scalar(select(self.model).where(self.model.id == id))
+        self.cache.set_row(id, obj, token)
+        return obj
+
+    async def get_by_unique(
+        self, db: AsyncSession, column: str, value: Any
+    ) -> Optional[ModelType]:
+        cached_id = self.cache.get_pointer(column, value)
+        if cached_id is None:
+            return None
+        if cached_id is not MISSING:
+            obj = await self.get(db, cached_id)
+            if obj is not None and getattr(obj, column) == value:
+                return obj
+        token = self.cache.fill_token()
+        obj = await db.scalar(
+            select(self.model).where(getattr(self.model, column) == value)
+        )
+        self.cache.set_pointer(column, value, obj, token)
+        if obj is not None:
+            self.cache.set_row(obj.id, obj, token)
+        return obj
+
+    async def _from_cache(
+        self, db: AsyncSession, data: Optional[Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        if data is None:
+            return None
+        obj = self.model(**data)
+        make_transient_to_detached(obj)
+        return await db.merge(obj, load=False)
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str = "id",
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        stmt = (
+            select(self.model)
+            .options(*project_columns(self.model, columns, order_by))
+            .order_by(*self._keyset_columns(order_by))
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(await db.scalars(stmt))
+
+    async def get_multi_keyset(
+        self,
+        db: AsyncSession,
+        *,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        keys = self._keyset_columns(order_by)
+        stmt = select(self.model).options(*project_columns(self.model, columns, order_by))
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(*keys) > tuple_(*after, types=[c.type for c in keys])
+            )
+        return list(await db.scalars(stmt.order_by(*keys).limit(limit)))
+
+    async def get_page_summary(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        order_by: str = "id",
+        modified_column: str = "updated_at",
+    ) -> RowMapping:
+        stmt = page_summary_statement(
+            self.model,
+            skip=skip,
+            after=after,
+            limit=limit,
+            order_by=order_by,
+            modified_column=modified_column,
+        )
+        return (await db.execute(stmt)).mappings().one()
+
+    def summarize_page(
+        self, rows: Sequence[Any], modified_column: str = "updated_at"
+    ) -> Dict[str, Any]:
+        return summarize_rows(self.model, rows, modified_column)
+
+    def _keyset_columns(self, order_by: str) -> list:
+        return [getattr(self.model, column) for column in KEYSET_ORDERINGS[order_by]]
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        obj_in_data = obj_in if isinstance(obj_in, dict) else jsonable_encoder(obj_in)
+        columns = self.model.__table__.c
+        db_obj = self.model(**{k: v for k, v in obj_in_data.items() if k in columns})  # type: ignore
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        self.cache.invalidate(db_obj)
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        db_obj: Optional[ModelType] = None,
+        id: Any = None,
+        versions: Optional[Iterable[int]] = None,
+    ) -> Optional[ModelType]:
+        """
+        Como CRUDBase.update: un único UPDATE ... RETURNING condicionado, con
+        `versions`, a la versión actual. Devuelve None si ninguna fila cumplió
+        las condiciones.
+        """
+        if id is None:
+            id = db_obj.id
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        table = self.model.__table__
+        values = {key: value for key, value in update_data.items() if key in table.c}
+        if not values and versions is None:
+            return await self.get(db, id)
+
+        previous = self.cache.snapshot(db_obj) if db_obj is not None else self.cache.get_row(id)
+        stmt = update_statement(self.model, id, values, versions)
+        if db.get_bind().dialect.update_returning:
+            row = (await db.execute(stmt.returning(*table.c))).mappings().first()
+        else:
+            result = await db.execute(stmt)
+            row = None
+            if result.rowcount:
+                row = (
+                    await db.execute(select(*table.c).where(table.c.id == id))
+                ).mappings().one()
+        await db.commit()
+        if row is None:
+            return None
+        self.cache.invalidate(previous if isinstance(previous, dict) else None, dict(row))
+        return await self._from_cache(db, dict(row))
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[RowMapping]:
+        """
+        Como CRUDBase.remove: un único DELETE ... RETURNING; devuelve los valores
+        de la fila, o None si no existía (rowcount 0).
+        """
+        table = self.model.__table__
+        stmt = delete(table).where(table.c.id == id)
+        if db.get_bind().dialect.delete_returning:
+            row = (await db.execute(stmt.returning(*table.c))).mappings().first()
+        else:
+            row = {"id": id} if (await db.execute(stmt)).rowcount else None
+        loaded = db.identity_map.get(db.sync_session.identity_key(self.model, id))
+        if row is not None and loaded is not None:
+            db.expunge(loaded)
+        await db.commit()
+        if row is None:
+            return None
+        self.cache.invalidate(dict(row))
+        return row
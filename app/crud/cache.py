@@ -0,0 +1,95 @@
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.cache import CacheBackend, NullCache
+
+
+class ModelCache:
+    """
+    Caché de lectura de un modelo sobre un CacheBackend.
+
+    Las filas se guardan como diccionarios de columnas bajo la clave del id. Las
+    búsquedas por columnas únicas (username, email) guardan solo el id de la fila,
+    y al leerlas se comprueba que la fila siga teniendo ese valor; así un cambio de
+    username no necesita conocer el valor anterior para invalidar la caché. Las
+    búsquedas sin resultado se guardan como None (caché negativa).
+
+    Una lectura solo llena la caché si ninguna fila se invalidó desde que
+    empezó (ver `fill_token`): lo que leyó puede ser anterior a esa escritura y
+    se serviría hasta el TTL. Las invalidaciones son locales al proceso, por lo
+    que con varios workers un backend en memoria puede servir filas de otra
+    escritura hasta el TTL.
+    """
+
+    def __init__(self, model: Any, backend: Optional[CacheBackend] = None):
+        self.model = model
+        self.backend = backend or NullCache()
+        self.prefix = model.__tablename__
+        self.unique_columns = [c.name for c in model.__table__.columns if c.unique]
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _key(self, column: str, value: Any) -> tuple:
+        return (self.prefix, column, value)
+
+    def get_row(self, id: Any) -> Any:
+        """
+        Devuelve el diccionario de la fila, None si se sabe que no existe o MISSING.
+        """
+        return self.backend.get(self._key("id", id))
+
+    def fill_token(self) -> int:
+        """
+        Generación de invalidaciones; se toma antes de consultar la base y se
+        pasa a set_row/set_pointer, que no guardan nada si cambió.
+        """
+        return self._generation
+
+    def _fill(self, token: int, key: tuple, value: Any) -> None:
+        with self._lock:
+            if token == self._generation:
+                self.backend.set(key, value)
+
+    def set_row(self, id: Any, obj: Any, token: int) -> None:
+        self._fill(token, self._key("id", id), self.snapshot(obj))
+
+    def get_pointer(self, column: str, value: Any) -> Any:
+        """
+        Devuelve el id asociado al valor único, None si no existe o MISSING.
+        """
+        return self.backend.get(self._key(column, value))
+
+    def set_pointer(self, column: str, value: Any, obj: Any, token: int) -> None:
+        self._fill(token, self._key(column, value), None if obj is None else obj.id)
+
+    def invalidate(self, *rows: Any) -> None:
+        """
+        Elimina las entradas de las filas dadas (objetos o diccionarios de columnas).
+        """
+        keys = []
+        for row in rows:
+            if row is None:
+                continue
+            data = row if isinstance(row, dict) else self.snapshot(row)
+            if data.get("id") is not None:
+                keys.append(self._key("id", data["id"]))
+            for column in self.unique_columns:
+                if data.get(column) is not None:
+                    keys.append(self._key(column, data[column]))
+        with self._lock:
+            self._generation += 1
+            if keys:
+                self.backend.delete(*keys)
+
+    def snapshot(self, obj: Any) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        return {c.name: getattr(obj, c.name) for c in self.model.__table__.columns}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.revoked_tokens import RevokedToken
+
+
+class CRUDRevokedToken:
+    """
+    Acceso a la tabla de tokens revocados. Sin caché: las lecturas las hace el
+    sondeo periódico de RevocationIndex, no las peticiones.
+    """
+
+    def revoke(self, db: Session, *, jti: str, expires_at: int) -> None:
+        """
+        Registra la revocación; revocar dos veces el mismo token no es un error.
+        """
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    def revoked_since(
+        self, db: Session, *, since: Optional[datetime], now: int
+    ) -> List[Row]:
+        """
+        Revocaciones aún vigentes (no expiradas) registradas desde `since`, o
+        todas si `since` es None.
+        """
+        query = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(RevokedToken.expires_at >= now)
+        if since is not None:
+            query = query.where(RevokedToken.revoked_at >= since)
+        return db.execute(query).all()
+
+    def delete_expired(self, db: Session, *, now: int) -> int:
+        """
+        Elimina las filas de tokens ya expirados; devuelve cuántas se borraron.
+        """
+        result = db.execute(
+            RevokedToken.__table__.delete().where(RevokedToken.expires_at < now)
+        )
+        db.commit()
+        return result.rowcount
+
+
+crud_revoked_token = CRUDRevokedToken()
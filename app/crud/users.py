@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
-from typing import Optional
+import re
+from datetime import datetime
+from typing import Any, Iterator, List, Optional
 
 from app.schemas.users import UserBase
+from sqlalchemy import Integer, false, func, literal_column, or_, text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import build_cache
+from app.core.config import settings
 from app.crud.base import CRUDBase
-from app.models.users import User
+from app.crud.base_async import AsyncCRUDBase
+from app.crud.cache import ModelCache
+from app.models.users import SEARCH_COLUMNS, User, search_document
 
 
 class CRUDUser(CRUDBase[User, UserBase, UserBase]):
@@ -13,13 +22,126 @@ class CRUDUser(CRUDBase[User, UserBase, UserBase]):
         """
         Obtiene un usuario por su nombre de usuario.
         """
-        return db.query(User).filter(User.username == username).first()
+        return self.get_by_unique(db, "username", username)
 
     def get_user_by_email(self, db: Session, email: str):
         """
         Obtiene un usuario por su nombre de usuario.
         """
-        return db.query(User).filter(User.email == email).first()
+        return self.get_by_unique(db, "email", email)
 
+    def stream_users(
+        self,
+        db: Session,
+        *,
+        role: Optional[str] = None,
+        active: Optional[bool] = None,
+        updated_since: Optional[datetime] = None,
+        yield_per: int = 1000,
+    ) -> Iterator[RowMapping]:
+        """
+        Recorre los usuarios que cumplen los filtros, aplicados en la consulta SQL.
+        """
+        where = []
+        if role is not None:
+            where.append(User.role == role)
+        if active is not None:
+            where.append(User.active == active)
+        if updated_since is not None:
+            where.append(User.updated_at >= updated_since)
+        return self.stream(db, where=where, yield_per=yield_per)
+
+    def search_users(
+        self,
+        db: Session,
+        *,
+        role: Optional[str] = None,
+        active: Optional[bool] = None,
+        prefix: Optional[str] = None,
+        q: Optional[str] = None,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+    ) -> List[User]:
+        """
+        Busca usuarios por rol, estado, prefijo (sin distinguir mayúsculas) de
+        username / first_name / last_name y texto completo, paginando por id.
+        """
+        dialect = db.get_bind().dialect.name
+        where: List[Any] = []
+        if role is not None:
+            where.append(User.role == role)
+        if active is not None:
+            where.append(User.active == active)
+        if prefix:
+            where.append(_prefix_filter(dialect, prefix))
+        if q:
+            where.append(_full_text_filter(dialect, q))
+        return self.get_multi_keyset(db, after=after, limit=limit, order_by="id", where=where)
+
+
+# lower() de SQLite (sin ICU) solo convierte las letras ASCII
+SQLITE_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _prefix_filter(dialect: str, prefix: str):
+    # Usa los índices sobre lower(columna), y el prefijo se pasa a minúsculas
+    # con el mismo lower() de la base de datos. En SQLite el rango [prefijo,
+    # siguiente) aprovecha el índice (y la comparación sin distinguir
+    # mayúsculas solo abarca ASCII, como su lower()); en PostgreSQL el rango
+    # depende de la collation, así que se usa LIKE con text_pattern_ops.
+    columns = [func.lower(getattr(User, name)) for name in SEARCH_COLUMNS]
+    if dialect == "sqlite":
+        prefix = prefix.translate(SQLITE_LOWER)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return or_(*((column >= prefix) & (column < upper) for column in columns))
+    pattern = func.lower(re.sub(r"([\\%_])", r"\\\1", prefix) + "%")
+    return or_(*(column.like(pattern, escape="\\") for column in columns))
+
+
+def _full_text_filter(dialect: str, q: str):
+    if dialect == "sqlite":
+        # Cada palabra es un prefijo entre comillas: la sintaxis de FTS5 del
+        # texto del usuario no se interpreta.
+        words = re.findall(r"\w+", q)
+        if not words:
+            return false()
+        match = " ".join('"%s"*' % word for word in words)
+        matches = text("SELECT rowid FROM users_fts WHERE users_fts MATCH :match").bindparams(
+            match=match
+        )
+        return User.id.in_(matches.columns(rowid=Integer))
+    if dialect == "postgresql":
+        document = search_document(*(getattr(User, name) for name in SEARCH_COLUMNS))
+        return document.op("@@")(func.plainto_tsquery(literal_column("'simple'"), q))
+    term = func.lower("%" + q + "%")
+    return or_(*(func.lower(getattr(User, name)).like(term) for name in SEARCH_COLUMNS))
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserBase, UserBase]):
+    async def get_user_by_username(self, db: AsyncSession, username: str):
+        """
+        Obtiene un usuario por su nombre de usuario.
+        """
+        return await self.get_by_unique(db, "username", username)
+
+    async def get_user_by_email(self, db: AsyncSession, email: str):
+        """
+        Obtiene un usuario por su correo electrónico.
+        """
+        return await self.get_by_unique(db, "email", email)
+
+
+# Caché de lectura compartida por las variantes síncrona y asíncrona: un único
+# ModelCache, para que una escritura de cualquiera de ellas descarte los
+# llenados en curso de la otra
+users_cache = ModelCache(
+    User,
+    build_cache(
+        settings.USERS_CACHE_BACKEND,
+        max_size=settings.USERS_CACHE_MAX_SIZE,
+        ttl=settings.USERS_CACHE_TTL_SECONDS,
+    ),
+)
 
-crud_user = CRUDUser(User)
+crud_user = CRUDUser(User, cache=users_cache)
+async_crud_user = AsyncCRUDUser(User, cache=users_cache)
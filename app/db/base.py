@@ -1,3 +1,17 @@
 # imported by Alembic
 from app.db.base_class import Base
 from app.models.users import User  # noqa: F401
+from app.models.revoked_tokens import RevokedToken  # noqa: F401
+from app.models.idempotency_keys import IdempotencyKey  # noqa: F401
+
+# Tablas creadas con DDL propio, fuera de los metadatos: el índice FTS5 de
+# SQLite (users_fts y sus tablas internas users_fts_data, _idx, _docsize y
+# _config). La autogeneración de Alembic no debe proponer eliminarlas.
+UNMANAGED_TABLE_PREFIX = "users_fts"
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Filtro `include_object` de Alembic: omite las tablas no gestionadas.
+    """
+    return not (type_ == "table" and name.startswith(UNMANAGED_TABLE_PREFIX))
@@ -0,0 +1,169 @@
+import logging
+import random
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import DEFAULT_BUCKETS, CallbackMetric, Histogram, registry
+from app.core.request_context import current_route
+
+logger = logging.getLogger("app.db.sql")
+
+SQL_LOG_MODES = ("off", "slow", "sample")
+
+# Prefijo de EXPLAIN por dialecto; en el resto no se captura el plan
+EXPLAIN_PREFIXES = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS[:8]
+
+db_query_duration = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Duración de las sentencias SQL por tipo de operación.",
+        ["operation"],
+        buckets=QUERY_BUCKETS,
+    )
+)
+
+
+# Pools publicados en las métricas db_pool_*, como (nombre del motor, pool)
+_pools = []
+
+
+def _pool_stat(method: str):
+    def collect():
+        for name, pool in _pools:
+            if hasattr(pool, method):
+                yield {"engine": name}, getattr(pool, method)()
+
+    return collect
+
+
+for _metric, _method, _documentation in (
+    ("db_pool_size", "size", "Tamaño configurado del pool de conexiones."),
+    ("db_pool_checked_out", "checkedout", "Conexiones del pool en uso."),
+    ("db_pool_overflow", "overflow", "Conexiones abiertas por encima del tamaño del pool."),
+    ("db_pool_checked_in", "checkedin", "Conexiones libres en el pool."),
+):
+    registry.register(CallbackMetric(_metric, _documentation, _pool_stat(_method)))
+
+
+def _operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+
+
+def redact_parameters(parameters, executemany: bool = False) -> str:
+    """
+    Describe los parámetros de una sentencia sin exponer sus valores: solo se
+    registran sus tipos (o el número de filas en un executemany).
+    """
+    if executemany:
+        return f"<{len(parameters)} filas>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "[" + ", ".join(type(value).__name__ for value in parameters) + "]"
+    return type(parameters).__name__
+
+
+def explain_statement(conn, statement: str, parameters) -> Optional[str]:
+    """
+    Obtiene el plan de ejecución de una consulta SELECT con un cursor DBAPI
+    propio, sin pasar por los eventos del motor. Devuelve None si el dialecto no
+    está soportado o la captura falla.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or _operation(statement) not in ("SELECT", "WITH"):
+        return None
+    # En PostgreSQL un error dentro de la transacción la invalidaría: se aísla
+    # el EXPLAIN en un savepoint.
+    savepoint = conn.dialect.name == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT sql_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT sql_explain")
+            logger.debug("No se pudo obtener el plan de la consulta", exc_info=True)
+            return None
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT sql_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def instrument_engine(
+    engine: Engine,
+    name: str = "primary",
+    *,
+    record_metrics: bool = True,
+    log_mode: str = "off",
+    sample_rate: float = 0.0,
+    slow_query_ms: float = 200.0,
+    explain_slow: bool = False,
+) -> None:
+    """
+    Registra la duración y cantidad de sentencias SQL del motor, y publica el
+    estado de su pool de conexiones.
+
+    Según `log_mode`, además escribe en el logger "app.db.sql" las sentencias
+    que superan `slow_query_ms` ("slow") y una fracción `sample_rate` del resto
+    ("sample"), con la ruta HTTP que las originó y los parámetros redactados.
+    Con `explain_slow`, a las consultas SELECT lentas se les adjunta su plan.
+    """
+    if log_mode not in SQL_LOG_MODES:
+        raise ValueError(f"Modo de registro SQL desconocido: {log_mode!r}")
+    log_enabled = log_mode != "off"
+    if not record_metrics and not log_enabled:
+        return
+    slow_seconds = slow_query_ms / 1000
+    sampling = log_mode == "sample" and sample_rate > 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if record_metrics:
+            db_query_duration.observe(elapsed, _operation(statement))
+        if not log_enabled:
+            return
+        if elapsed >= slow_seconds:
+            plan = explain_statement(conn, statement, parameters) if explain_slow and not executemany else None
+            logger.warning(
+                "Consulta lenta (%.1f ms) en %s: %s | parámetros: %s%s",
+                elapsed * 1000,
+                current_route() or "-",
+                statement,
+                redact_parameters(parameters, executemany),
+                f"\nPlan:\n{plan}" if plan else "",
+            )
+        elif sampling and random.random() < sample_rate:
+            logger.info(
+                "Consulta (%.1f ms) en %s: %s | parámetros: %s",
+                elapsed * 1000,
+                current_route() or "-",
+                statement,
+                redact_parameters(parameters, executemany),
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+    if record_metrics:
+        _pools.append((name, engine.pool))
@@ -0,0 +1,252 @@
+"""
+Verificación rápida de migraciones al arrancar el contenedor.
+
+Compara las revisiones de la tabla alembic_version con el head del código y solo
+ejecuta `alembic upgrade head` si difieren. El head se lee del archivo
+alembic/HEAD, generado al construir la imagen con `--write-head`, o se obtiene
+recorriendo alembic/versions. La verificación usa directamente el driver
+(sqlite3 o psycopg2), sin importar Alembic ni SQLAlchemy. La migración se
+ejecuta bajo un bloqueo (pg_advisory_lock en PostgreSQL, flock en SQLite) para
+que varias instancias que arrancan a la vez no la apliquen en paralelo.
+
+Uso:
+    python -m app.db.migrate                # verifica y migra si hace falta
+    python -m app.db.migrate --check        # termina con código 1 si hay cambios pendientes
+    python -m app.db.migrate --write-head   # guarda el head actual en alembic/HEAD
+"""
+import argparse
+import ast
+import contextlib
+import logging
+import os
+import sys
+from typing import Any, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPT_LOCATION = os.path.join(ROOT, "alembic")
+HEAD_FILE = os.path.join(SCRIPT_LOCATION, "HEAD")
+
+# Clave del pg_advisory_lock de las migraciones (común a todas las instancias)
+MIGRATION_LOCK_KEY = 0x4C4154414D  # "LATAM"
+
+# Consulta que indica si existe la tabla alembic_version, por dialecto; en el
+# resto no hay verificación previa y siempre se ejecuta Alembic.
+VERSION_TABLE_QUERIES = {
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'alembic_version'",
+    "postgresql": "SELECT 1 WHERE to_regclass('alembic_version') IS NOT NULL",
+}
+
+
+def database_url() -> str:
+    """
+    Misma URL que usa alembic/env.py.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    url = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./sql_app.db")
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def _module_revisions(path: str):
+    revision, down_revision = None, None
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            target, value = node.target, node.value
+        else:
+            continue
+        if isinstance(target, ast.Name) and target.id == "revision":
+            revision = ast.literal_eval(value)
+        elif isinstance(target, ast.Name) and target.id == "down_revision":
+            down_revision = ast.literal_eval(value)
+    return revision, down_revision
+
+
+def scan_heads(script_location: str = SCRIPT_LOCATION) -> Set[str]:
+    """
+    Revisiones de alembic/versions que ninguna otra revisa (los heads).
+    """
+    versions = os.path.join(script_location, "versions")
+    revisions, parents = set(), set()
+    for name in os.listdir(versions):
+        if not name.endswith(".py"):
+            continue
+        revision, down_revision = _module_revisions(os.path.join(versions, name))
+        if revision is None:
+            continue
+        revisions.add(revision)
+        if isinstance(down_revision, str):
+            parents.add(down_revision)
+        elif down_revision:
+            parents.update(down_revision)
+    return revisions - parents
+
+
+def expected_heads(head_file: str = HEAD_FILE, script_location: str = SCRIPT_LOCATION) -> Set[str]:
+    """
+    Heads esperados: los del archivo generado en la imagen o, si no existe, los
+    obtenidos de alembic/versions.
+    """
+    if os.path.exists(head_file):
+        with open(head_file) as f:
+            return set(f.read().split())
+    return scan_heads(script_location)
+
+
+def write_head(head_file: str = HEAD_FILE, script_location: str = SCRIPT_LOCATION) -> Set[str]:
+    """
+    Guarda los heads según Alembic (se ejecuta al construir la imagen).
+    """
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory(script_location).get_heads())
+    with open(head_file, "w") as f:
+        f.write("\n".join(sorted(heads)) + "\n")
+    return heads
+
+
+def dialect_name(url: str) -> str:
+    return url.split("://", 1)[0].split("+", 1)[0]
+
+
+def sqlite_path(url: str) -> str:
+    """
+    Ruta del archivo de una URL sqlite:///ruta ("" para la base en memoria).
+    """
+    path = url.split("://", 1)[1].split("?", 1)[0]
+    return path[1:] if path.startswith("/") else path
+
+
+def connect(url: str) -> Any:
+    """
+    Conexión DBAPI en modo autocommit, o None si el dialecto no se verifica.
+    """
+    dialect = dialect_name(url)
+    if dialect == "sqlite":
+        import sqlite3
+
+        return sqlite3.connect(sqlite_path(url) or ":memory:", isolation_level=None)
+    if dialect == "postgresql":
+        import psycopg2
+
+        conn = psycopg2.connect("postgresql://" + url.split("://", 1)[1])
+        conn.autocommit = True
+        return conn
+    return None
+
+
+def current_revisions(conn: Any, dialect: str) -> Set[str]:
+    """
+    Revisiones aplicadas según alembic_version; vacío si la tabla no existe.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(VERSION_TABLE_QUERIES[dialect])
+        if cursor.fetchone() is None:
+            return set()
+        cursor.execute("SELECT version_num FROM alembic_version")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+@contextlib.contextmanager
+def migration_lock(conn: Any, url: str) -> Iterator[None]:
+    """
+    Bloqueo exclusivo entre instancias mientras se migra.
+    """
+    dialect = dialect_name(url)
+    if dialect == "postgresql":
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            cursor.close()
+    elif dialect == "sqlite" and sqlite_path(url) not in ("", ":memory:"):
+        import fcntl
+
+        with open(f"{sqlite_path(url)}.migrate.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        logger.warning("Sin bloqueo de migraciones para el dialecto %s.", dialect)
+        yield
+
+
+def run_upgrade(config_file: str = os.path.join(ROOT, "alembic.ini")) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(config_file), "head")
+
+
+def migrate(url: Optional[str] = None, heads: Optional[Set[str]] = None, check: bool = False) -> bool:
+    """
+    Aplica las migraciones pendientes. Devuelve True si el esquema ya estaba al
+    día (o lo dejó al día otra instancia) y False si hubo que migrar, o si hay
+    cambios pendientes con `check`.
+    """
+    url = url or database_url()
+    dialect = dialect_name(url)
+    heads = expected_heads() if heads is None else heads
+    conn = connect(url)
+    if conn is None:
+        logger.info("Sin verificación previa para el dialecto %s.", dialect)
+        if not check:
+            run_upgrade()
+        return False
+    try:
+        current = current_revisions(conn, dialect)
+        if current == heads:
+            logger.info("Esquema al día (%s); no se ejecuta Alembic.", ", ".join(sorted(heads)))
+            return True
+        if check:
+            logger.warning(
+                "Migraciones pendientes: base en %s, código en %s.",
+                ", ".join(sorted(current)) or "vacía",
+                ", ".join(sorted(heads)),
+            )
+            return False
+        with migration_lock(conn, url):
+            if current_revisions(conn, dialect) == heads:
+                logger.info("Otra instancia aplicó las migraciones.")
+                return True
+            logger.info("Aplicando migraciones hasta %s.", ", ".join(sorted(heads)))
+            run_upgrade()
+        return False
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--check", action="store_true",
+                        help="Solo verifica; código 1 si hay migraciones pendientes")
+    parser.add_argument("--write-head", action="store_true",
+                        help="Guarda el head actual en alembic/HEAD")
+    args = parser.parse_args(argv)
+
+    # Sin app.core.log: importaría la configuración (pydantic) en cada arranque
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    if args.write_head:
+        logger.info("Head guardado: %s", ", ".join(sorted(write_head())))
+        return 0
+    up_to_date = migrate(check=args.check)
+    return 1 if args.check and not up_to_date else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import Histogram, registry
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+db_pool_wait = registry.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Espera para obtener una conexión del pool.",
+        buckets=POOL_WAIT_BUCKETS,
+    )
+)
+
+
+class PoolWaitTracker:
+    """
+    Media móvil exponencial de la espera por una conexión del pool. El valor
+    decae con el tiempo aunque no haya nuevas esperas (semivida `half_life`),
+    para que el rechazo de carga que depende de él no se quede activo cuando
+    deja de llegar tráfico a la base de datos.
+    """
+
+    def __init__(self, half_life: float = 1.0, alpha: float = 0.2):
+        self.half_life = half_life
+        self.alpha = alpha
+        self._value = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * 0.5 ** ((now - self._updated) / self.half_life)
+
+    def observe(self, seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            current = self._decayed(now)
+            self._value = current + self.alpha * (seconds - current)
+            self._updated = now
+
+    def value(self) -> float:
+        """
+        Espera reciente estimada, en segundos.
+        """
+        return self._decayed(time.monotonic())
+
+
+pool_wait = PoolWaitTracker()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout por una conexión libre.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_wait.observe(elapsed)
+            pool_wait.observe(elapsed)
+
+
+def pool_options(url: str) -> dict:
+    """
+    Argumentos de create_engine para el pool; SQLite en memoria conserva su
+    pool por defecto (una sola base por conexión).
+    """
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return {}
+    return {"poolclass": TimedQueuePool}
@@ -1,12 +1,65 @@
 from app.core.config import settings
+from app.db.pool import pool_options
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL
-if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
-    SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace(
-        "postgres://", "postgresql://", 1
-    )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, echo=True)
+
+def normalize_database_url(url: str) -> str:
+    """
+    Acepta el esquema "postgres://" (usado por algunos proveedores) como alias
+    de "postgresql://".
+    """
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+SQLALCHEMY_DATABASE_URL = normalize_database_url(settings.SQLALCHEMY_DATABASE_URL)
+
+# El pool mide la espera de cada checkout (control de admisión y métricas)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, **pool_options(SQLALCHEMY_DATABASE_URL)
+)
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Réplica de solo lectura: sus sesiones se marcan con info["replica"] para que
+# lo leído no alimente la caché compartida.
+replica_engine = None
+ReplicaSession = None
+if settings.SQLALCHEMY_REPLICA_URL:
+    replica_url = normalize_database_url(settings.SQLALCHEMY_REPLICA_URL)
+    replica_engine = create_engine(replica_url, pool_pre_ping=True, **pool_options(replica_url))
+    ReplicaSession = sessionmaker(
+        autocommit=False, autoflush=False, bind=replica_engine, info={"replica": True}
+    )
+
+# Drivers asíncronos equivalentes a cada driver síncrono
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Traduce la URL síncrona de la base de datos a su variante asíncrona.
+    """
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+async_engine = None
+AsyncSession = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        get_async_database_url(SQLALCHEMY_DATABASE_URL), pool_pre_ping=True
+    )
+    # expire_on_commit=False: en modo asíncrono no se puede recargar un atributo
+    # expirado de forma implícita.
+    AsyncSession = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
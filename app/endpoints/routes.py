@@ -1,5 +1,26 @@
 from fastapi import APIRouter
-from .v1 import users
+
+from app.core.config import settings
+
+from .v1 import auth, users, users_async
 
 api_router_v1 = APIRouter(prefix="/api/v1")
-api_router_v1.include_router(users.router, tags=["users"])
+
+if settings.DB_ASYNC:
+    # Los endpoints CRUD asíncronos reemplazan a sus equivalentes síncronos en la
+    # misma posición (el orden importa para rutas como /users/{user_id}); el resto
+    # de rutas de usuarios se mantiene con la sesión síncrona.
+    async_routes = {
+        (route.path, frozenset(route.methods)): route
+        for route in users_async.router.routes
+    }
+    users_router = APIRouter()
+    users_router.routes = [
+        async_routes.get((route.path, frozenset(route.methods)), route)
+        for route in users.router.routes
+    ]
+    api_router_v1.include_router(users_router, tags=["users"])
+else:
+    api_router_v1.include_router(users.router, tags=["users"])
+
+api_router_v1.include_router(auth.router, tags=["auth"])
@@ -0,0 +1,108 @@
+# Emisión de tokens de acceso
+import logging
+import secrets
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.auth.auth_bearer import JWTBearer
+from app.auth.revocation import revocation_index, token_expiry
+from app.core import deps
+from app.core.security import PasswordHasherBusy, create_access_token, password_hasher
+
+from .users import hasher_busy
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# Hash con el que se verifica la contraseña cuando el usuario no existe, para que
+# el tiempo de respuesta no revele qué nombres de usuario están registrados.
+_dummy_hash: Optional[str] = None
+
+
+async def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await password_hasher.hash(secrets.token_urlsafe(16))
+    return _dummy_hash
+
+
+@router.post(
+    "/auth/token",
+    response_model=schemas.Token,
+    summary="Obtener un token de acceso",
+    response_description="Token JWT de acceso",
+    description=(
+        "Verifica el nombre de usuario y la contraseña y emite un token JWT de acceso. "
+        "La verificación bcrypt se ejecuta en un pool de procesos; si está saturado "
+        "responde 503 con `Retry-After`."
+    ),
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Credenciales inválidas"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Servicio saturado"},
+    },
+)
+async def issue_token(
+    credentials: schemas.TokenRequest, db: Session = Depends(deps.get_db)
+):
+    """
+    Emite un token de acceso.
+    - **username**: Nombre de usuario.
+    - **password**: Contraseña.
+    """
+    user = await run_in_threadpool(
+        crud.crud_user.get_user_by_username, db, credentials.username
+    )
+    hashed_password = user.hashed_password if user is not None and user.active else None
+    try:
+        valid = await password_hasher.verify(
+            credentials.password, hashed_password or await _get_dummy_hash()
+        )
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
+    if hashed_password is None or not valid:
+        logger.warning("Credenciales inválidas para '%s'.", credentials.username)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return schemas.Token(access_token=create_access_token(user.id))
+
+
+@router.post(
+    "/auth/revoke",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Revocar el token de acceso",
+    description=(
+        "Revoca el token presentado en `Authorization` (cierre de sesión). El token deja "
+        "de aceptarse de inmediato en este proceso y, en los demás, en el siguiente "
+        "sondeo de revocaciones (`TOKEN_REVOCATION_POLL_SECONDS`)."
+    ),
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Token sin identificador (jti)"},
+        status.HTTP_403_FORBIDDEN: {"description": "Token inválido, expirado o ya revocado"},
+    },
+)
+def revoke_token(
+    db: Session = Depends(deps.get_db),
+    claims: Dict[str, Any] = Depends(JWTBearer()),
+):
+    """
+    Revoca el token de acceso con el que se autentica la petición.
+    """
+    jti = claims.get("jti")
+    if not jti:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El token no tiene identificador (jti) y no puede revocarse.",
+        )
+    expires_at = token_expiry(claims)
+    crud.crud_revoked_token.revoke(db, jti=jti, expires_at=expires_at)
+    revocation_index.add(jti, expires_at)
+    logger.info("Token %s revocado.", jti)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
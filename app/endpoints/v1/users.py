@@ -1,26 +1,82 @@
 # Endpoints CRUD para usuarios
+import json
 import logging
-from typing import List
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.auth.auth_bearer import JWTBearer
 from app.core import deps
+from app.core.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    parse_if_match,
+    set_validators,
+    version_etag,
+)
+from app.core.config import settings
+from app.core.idempotency import (
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
+    build_idempotency_store,
+    fingerprint,
+    run_idempotent,
+)
+from app.core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.core.serialization import encoded_response, json_response, partial_schema, serialize
+from app.core.singleflight import SingleFlight
+from app.core.streaming import (
+    LineTooLongError,
+    encode_csv,
+    encode_ndjson,
+    iter_lines,
+    parse_csv,
+    parse_ndjson,
+)
+from app.db import session
 
 router = APIRouter()
 
-logging.basicConfig(
-    format="%(asctime)s %(levelname)-5s [%(filename)s:%(lineno)d]\n%(message)s\n",
-    datefmt="%Y-%m-%d:%H:%M:%S",
-    level=logging.INFO,
-)
 logger = logging.getLogger(__name__)
 
+# Columnas exportadas, en el mismo orden que UserResponse
+EXPORT_COLUMNS = list(schemas.UserResponse.model_fields)
+FIELDS_DESCRIPTION = "Campos a devolver, separados por comas: " + ", ".join(EXPORT_COLUMNS)
+IDEMPOTENCY_KEY_DESCRIPTION = "Clave del cliente para reintentar la creación sin duplicarla"
+EXPORT_FORMATS = {
+    "ndjson": (encode_ndjson, "application/x-ndjson"),
+    "csv": (encode_csv, "text/csv"),
+}
+IMPORT_PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+# Columnas que necesita el validador de una página (ver summarize_page)
+VALIDATOR_COLUMNS = ("updated_at", "version")
+
+# Lecturas idénticas en curso desde los hilos del threadpool
+user_reads = SingleFlight("users")
+
+# Respuestas de POST /users/ por Idempotency-Key
+user_creations = build_idempotency_store(
+    settings.IDEMPOTENCY_BACKEND,
+    max_size=settings.IDEMPOTENCY_MAX_KEYS,
+    session_factory=session.Session,
+)
+
 
 @router.post(
     "/users/",
+    dependencies=[Depends(deps.mark_write)],
     response_model=schemas.UserResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Crear un nuevo usuario",
@@ -38,7 +94,18 @@ logger = logging.getLogger(__name__)
         },
     },
 )
-def create_user(user: schemas.UserCreate, db: Session = Depends(deps.get_db)):
+def create_user(
+    user: schemas.UserCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        min_length=1,
+        max_length=255,
+        description=IDEMPOTENCY_KEY_DESCRIPTION,
+    ),
+    db: Session = Depends(deps.get_db),
+):
     """
     Crea un nuevo usuario en la base de datos.
     - **username**: Nombre de usuario único.
@@ -47,60 +114,519 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(deps.get_db)):
     - **last_name**: Apellido del usuario (opcional).
     - **role**: Rol del usuario (admin, user, guest). Por defecto "user".
     - **active**: Booleano que indica si el usuario está activo. Por defecto True.
+
+    Con el encabezado **Idempotency-Key**, la primera respuesta (201 o error 4xx)
+    se guarda y se repite, con `Idempotent-Replayed: true`, a los reintentos con
+    la misma clave y el mismo cuerpo; un reintento con otro cuerpo recibe 422.
     """
+    if idempotency_key is None:
+        return insert_user(db, user)
+
+    def execute():
+        try:
+            created = insert_user(db, user)
+        except HTTPException as e:
+            return stored_error(e)
+        return status.HTTP_201_CREATED, serialize_users(created)
+
     try:
-        # Validar si el username ya existe
-        existing_username = crud.crud_user.get_user_by_username(db, user.username)
-        existing_email = crud.crud_user.get_user_by_email(db, user.email)
-
-        if existing_username or existing_email:
-            if existing_email:
-                detail_error = "La dirección de correo electrónico ya existe."
-                logger.warning(detail_error)
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=detail_error,
-                )
-            else:
-                detail_error = "El nombre de usuario ya existe."
-                logger.warning(detail_error)
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=detail_error,
-                )
+        status_code, body, replayed = run_idempotent(
+            user_creations,
+            f"users.create:{idempotency_key}",
+            fingerprint(user.model_dump(mode="json")),
+            execute,
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+            wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+        )
+    except (IdempotencyKeyMismatch, IdempotencyKeyInProgress) as e:
+        raise idempotency_error(e)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return encoded_response(body, response=response, status_code=status_code)
 
-        db_user = crud.crud_user.create(db=db, obj_in=user)
-        return db_user
+
+def stored_error(error: HTTPException) -> tuple:
+    """
+    Respuesta que se guarda para una Idempotency-Key cuando el alta falla. Los
+    errores 5xx no se guardan (se relanzan): el cliente puede reintentar.
+    """
+    if error.status_code >= 500:
+        raise error
+    return error.status_code, json.dumps({"detail": error.detail}).encode()
+
+
+def idempotency_error(error: Exception) -> HTTPException:
+    if isinstance(error, IdempotencyKeyMismatch):
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="La Idempotency-Key ya se usó con otro cuerpo de petición.",
+        )
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Hay una petición en curso con la misma Idempotency-Key, reintente más tarde.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def insert_user(db: Session, user: schemas.UserCreate):
+    """
+    Inserta el usuario y traduce los errores a HTTPException (409 si el nombre
+    de usuario o el correo ya existen).
+    """
+    try:
+        # Un único INSERT; las restricciones de unicidad detectan los duplicados
+        return crud.crud_user.create(db=db, obj_in=user_rows([user])[0])
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
+    except IntegrityError:
+        db.rollback()
+        detail_error = conflict_detail(db, username=user.username, email=user.email)
+        if detail_error is None:
+            logger.error("Error de integridad inesperado al crear usuario.")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+        logger.warning(detail_error)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail_error)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Error inesperado al crear usuario: {str(e)}")
+        logger.error("Error inesperado al crear usuario: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
         )
 
 
+@router.post(
+    "/users/bulk",
+    dependencies=[Depends(deps.mark_write)],
+    response_model=schemas.UserBulkResponse,
+    summary="Crear usuarios de forma masiva",
+    response_description="Resultado por cada registro enviado",
+    description=(
+        "Crea varios usuarios en una sola petición. Los conflictos de nombre de usuario "
+        "o correo se detectan para todo el lote y se informan por registro."
+    ),
+    responses={
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Error de validación de entrada"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Error interno del servidor"
+        },
+    },
+)
+def create_users_bulk(
+    users: List[schemas.UserCreate] = Body(
+        ..., min_length=1, max_length=settings.USERS_BULK_MAX_ITEMS
+    ),
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Crea usuarios de forma masiva.
+    - **users**: Lista de usuarios con el mismo formato que `POST /users/`.
+    """
+    try:
+        logger.info("Alta masiva de %d usuarios.", len(users))
+        results = bulk_create_users(db, users)
+        created = sum(1 for r in results if r.status == "created")
+        logger.info("Alta masiva: %d creados, %d rechazados.", created, len(results) - created)
+        return schemas.UserBulkResponse(
+            created=created, failed=len(results) - created, results=results
+        )
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
+    except Exception as e:
+        logger.error("Error inesperado en el alta masiva de usuarios: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+def bulk_create_users(
+    db: Session, users: List[schemas.UserCreate], chunk_size: Optional[int] = None
+) -> List[schemas.UserBulkItemResult]:
+    """
+    Detecta conflictos de todo el lote (una consulta IN por columna más los duplicados
+    dentro del propio lote) e inserta los registros válidos en bloques.
+    """
+    existing_usernames = crud.crud_user.get_existing_values(
+        db, "username", (u.username for u in users)
+    )
+    existing_emails = crud.crud_user.get_existing_values(
+        db, "email", (u.email for u in users)
+    )
+
+    results: List[Optional[schemas.UserBulkItemResult]] = [None] * len(users)
+    pending = []
+    for index, user in enumerate(users):
+        if user.email in existing_emails:
+            detail = "La dirección de correo electrónico ya existe."
+        elif user.username in existing_usernames:
+            detail = "El nombre de usuario ya existe."
+        else:
+            existing_emails.add(user.email)
+            existing_usernames.add(user.username)
+            pending.append(index)
+            continue
+        results[index] = schemas.UserBulkItemResult(
+            index=index, status="conflict", detail=detail
+        )
+
+    rows = crud.crud_user.create_many(
+        db,
+        objs_in=user_rows([users[i] for i in pending]),
+        chunk_size=chunk_size or settings.USERS_BULK_CHUNK_SIZE,
+    )
+    for index, row in zip(pending, rows):
+        if row is None:
+            results[index] = schemas.UserBulkItemResult(
+                index=index,
+                status="conflict",
+                detail="Nombre de usuario o correo electrónico ya existe",
+            )
+        else:
+            results[index] = schemas.UserBulkItemResult(
+                index=index,
+                status="created",
+                user=schemas.UserResponse.model_validate(dict(row)),
+            )
+    return results
+
+
+@router.post(
+    "/users/import",
+    dependencies=[Depends(deps.mark_write)],
+    response_class=StreamingResponse,
+    summary="Importar usuarios desde NDJSON o CSV",
+    response_description="Resumen y reporte de errores por fila, en NDJSON",
+    description=(
+        "Importa usuarios desde el cuerpo de la petición (NDJSON o CSV con encabezado), "
+        "leído como flujo. Cada fila se valida como en `POST /users/` y se escribe en "
+        "bloques de filas por transacción. La respuesta es NDJSON: una primera línea "
+        "con el resumen y luego una línea por cada fila rechazada."
+    ),
+    responses={
+        status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}},
+    },
+)
+async def import_users(
+    request: Request,
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Importa usuarios de forma masiva.
+    - **format**: Formato del cuerpo, `ndjson` (por defecto) o `csv`.
+    """
+    chunk_size = settings.USERS_IMPORT_CHUNK_SIZE
+    # Los errores se guardan en memoria hasta 1 MiB y luego en disco
+    report = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+b")
+    summary = {"type": "summary", "total": 0, "created": 0, "failed": 0, "aborted": False}
+
+    def add_error(row: int, detail: Any) -> None:
+        summary["failed"] += 1
+        line = {"type": "error", "row": row, "detail": detail}
+        report.write(json.dumps(line, ensure_ascii=False).encode() + b"\n")
+
+    async def flush(rows: List[int], users: List[schemas.UserCreate]) -> None:
+        results = await run_in_threadpool(bulk_create_users, db, users, chunk_size)
+        for row, result in zip(rows, results):
+            if result.status == "created":
+                summary["created"] += 1
+            else:
+                add_error(row, result.detail)
+
+    try:
+        rows: List[int] = []
+        users: List[schemas.UserCreate] = []
+        records = IMPORT_PARSERS[import_format](iter_lines(request.stream()))
+        try:
+            async for row, data in records:
+                summary["total"] += 1
+                if isinstance(data, str):
+                    add_error(row, data)
+                    continue
+                try:
+                    users.append(schemas.UserCreate.model_validate(data))
+                    rows.append(row)
+                except ValidationError as e:
+                    add_error(
+                        row,
+                        [
+                            {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                            for err in e.errors()
+                        ],
+                    )
+                if len(users) >= chunk_size:
+                    await flush(rows, users)
+                    rows, users = [], []
+        except (LineTooLongError, UnicodeDecodeError) as e:
+            # Las filas de los bloques anteriores ya están guardadas
+            summary["aborted"] = True
+            add_error(summary["total"] + 1, f"No se pudo leer el archivo: {e}")
+        if users:
+            await flush(rows, users)
+    except PasswordHasherBusy as e:
+        report.close()
+        raise hasher_busy(e)
+    except Exception as e:
+        report.close()
+        logger.error("Error inesperado al importar usuarios: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+    logger.info(
+        "Importación de usuarios: %d creados, %d rechazados.", summary["created"], summary["failed"]
+    )
+
+    def content():
+        try:
+            yield json.dumps(summary).encode() + b"\n"
+            report.seek(0)
+            while True:
+                block = report.read(64 * 1024)
+                if not block:
+                    break
+                yield block
+        finally:
+            report.close()
+
+    streaming = StreamingResponse(content(), media_type="application/x-ndjson")
+    # Las dependencias no alteran una respuesta devuelta directamente
+    deps.mark_write(streaming)
+    return streaming
+
+
+def resolve_cursor(cursor: Optional[str], order_by: str) -> Optional[tuple]:
+    """
+    Decodifica el cursor de paginación. Lanza HTTPException 400 si es inválido
+    o si no corresponde al ordenamiento solicitado.
+    """
+    if not cursor:
+        return None
+    try:
+        cursor_order_by, after = decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if cursor_order_by != order_by:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El cursor no corresponde al ordenamiento solicitado.",
+        )
+    return after
+
+
 @router.get(
     "/users/",
     response_model=List[schemas.UserResponse],
     summary="Obtener todos los usuarios",
     response_description="Lista de usuarios",
-    description="Recupera una lista de todos los perfiles de usuario, con opciones de paginación.",
+    description=(
+        "Recupera una lista de todos los perfiles de usuario, con opciones de paginación. "
+        "Si la página está completa, el encabezado `X-Next-Cursor` contiene el cursor "
+        "para pedir la siguiente página. Admite peticiones condicionales con "
+        "`If-None-Match` / `If-Modified-Since`. Con `fields` solo se leen y devuelven "
+        "los campos indicados."
+    ),
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "La página no cambió"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Cursor o campos inválidos"},
+    },
 )
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_db)):
+def read_users(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.USERS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", pattern="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(deps.get_read_db),
+):
     """
     Recupera una lista de usuarios.
-    - **skip**: Número de usuarios a omitir (para paginación).
+    - **skip**: Número de usuarios a omitir (para paginación por desplazamiento).
     - **limit**: Número máximo de usuarios a devolver.
+    - **cursor**: Cursor opaco devuelto en `X-Next-Cursor`; si se envía, se ignora `skip`.
+    - **order_by**: Clave de ordenamiento, `id` o `created_at`.
+    - **fields**: Campos a devolver, separados por comas (opcional).
     """
+    after = resolve_cursor(cursor, order_by)
+    selected = resolve_fields(fields)
     try:
-        logger.info(f"Recuperando usuarios (skip: {skip}, limit: {limit}).")
-        users = crud.crud_user.get_multi(db, skip=skip, limit=limit)
-        logger.info(f"Se recuperaron {len(users)} usuarios.")
-        return users
+        logger.info("Recuperando usuarios (skip: %s, limit: %s, cursor: %s).", skip, limit, cursor)
+        window = {"skip": 0, "after": after} if cursor else {"skip": skip, "after": None}
+        source = read_source(db)
+
+        def validators(summary) -> tuple:
+            # El ETag identifica la ventana, los campos y el contenido de la página
+            etag = make_etag(
+                "users", order_by, window["skip"], window["after"], limit, selected,
+                *summary.values(),
+            )
+            return etag, summary["last_modified"]
+
+        # En una petición condicional el validador sale de un agregado sobre la
+        # misma ventana de filas, de modo que un 304 no necesita leer ni
+        # serializar la página; sin ella se calcula de las filas leídas.
+        if is_conditional(request):
+            summary = coalesce_reads(
+                request,
+                ("summary", order_by, window["skip"], window["after"], limit, source),
+                lambda: crud.crud_user.get_page_summary(
+                    db, limit=limit, order_by=order_by, **window
+                ),
+            )
+            etag, last_modified = validators(summary)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+        # Con `fields` se leen además las columnas del validador
+        columns = selected and (*selected, *VALIDATOR_COLUMNS)
+
+        def load_page():
+            if cursor:
+                users = crud.crud_user.get_multi_keyset(
+                    db, after=after, limit=limit, order_by=order_by, columns=columns
+                )
+            else:
+                users = crud.crud_user.get_multi(
+                    db, skip=skip, limit=limit, order_by=order_by, columns=columns
+                )
+            next_cursor = encode_cursor(order_by, users[-1]) if len(users) == limit else None
+            body = serialize_users(users, many=True, fields=selected)
+            return len(users), next_cursor, crud.crud_user.summarize_page(users), body
+
+        count, next_cursor, summary, body = coalesce_reads(
+            request,
+            ("page", order_by, window["skip"], window["after"], limit, selected, source),
+            load_page,
+        )
+        set_validators(response, *validators(summary))
+        logger.info("Se recuperaron %d usuarios.", count)
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return encoded_response(body, response=response)
     except Exception as e:
-        logger.error(f"Error inesperado al recuperar usuarios: {str(e)}")
+        logger.error("Error inesperado al recuperar usuarios: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.get(
+    "/users/export",
+    response_class=StreamingResponse,
+    summary="Exportar usuarios",
+    response_description="Usuarios en formato NDJSON o CSV",
+    description=(
+        "Exporta todos los usuarios que cumplen los filtros como un flujo NDJSON o CSV. "
+        "Las filas se leen con un cursor del lado del servidor y se codifican a medida "
+        "que se envían, por lo que la memoria usada no depende del número de usuarios."
+    ),
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+    },
+)
+def export_users(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    role: Optional[str] = Query(None, pattern="^(admin|user|guest)$"),
+    active: Optional[bool] = None,
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(deps.get_read_db),
+):
+    """
+    Exporta usuarios.
+    - **format**: `ndjson` (por defecto) o `csv`.
+    - **role**: Filtra por rol (opcional).
+    - **active**: Filtra por estado activo (opcional).
+    - **updated_since**: Solo usuarios actualizados desde esta fecha (opcional).
+    """
+    encoder, media_type = EXPORT_FORMATS[export_format]
+    logger.info(
+        "Exportando usuarios (format: %s, role: %s, active: %s, updated_since: %s).",
+        export_format, role, active, updated_since,
+    )
+
+    def content():
+        # La sesión se usa mientras se envía la respuesta, después de que la
+        # dependencia terminó; se cierra al agotar el flujo.
+        try:
+            rows = crud.crud_user.stream_users(
+                db,
+                role=role,
+                active=active,
+                updated_since=updated_since,
+                yield_per=settings.USERS_EXPORT_BATCH_SIZE,
+            )
+            yield from encoder(rows, EXPORT_COLUMNS)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{export_format}"'
+        },
+    )
+
+
+@router.get(
+    "/users/search",
+    response_model=List[schemas.UserResponse],
+    summary="Buscar usuarios",
+    response_description="Usuarios que cumplen los filtros",
+    description=(
+        "Busca usuarios por rol, estado, prefijo de `username` / `first_name` / "
+        "`last_name` (sin distinguir mayúsculas; en SQLite solo las letras ASCII) "
+        "y texto completo, resolviendo los "
+        "filtros con índices. Los resultados se ordenan por id; si la página está "
+        "completa, el encabezado `X-Next-Cursor` contiene el cursor de la siguiente."
+    ),
+    responses={status.HTTP_400_BAD_REQUEST: {"description": "Cursor inválido"}},
+)
+def search_users(
+    response: Response,
+    role: Optional[str] = Query(None, pattern="^(admin|user|guest)$"),
+    active: Optional[bool] = None,
+    prefix: Optional[str] = Query(None, min_length=1, max_length=50),
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    limit: int = Query(100, ge=1, le=settings.USERS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    db: Session = Depends(deps.get_read_db),
+):
+    """
+    Busca usuarios.
+    - **role**: Filtra por rol (opcional).
+    - **active**: Filtra por estado activo (opcional).
+    - **prefix**: Prefijo de nombre de usuario, nombre o apellido (opcional).
+    - **q**: Texto completo sobre nombre de usuario, nombre y apellido (opcional).
+    - **limit**: Número máximo de usuarios a devolver.
+    - **cursor**: Cursor opaco devuelto en `X-Next-Cursor`.
+    """
+    after = resolve_cursor(cursor, "id")
+    try:
+        logger.info(
+            "Buscando usuarios (role: %s, active: %s, prefix: %s, q: %s).", role, active, prefix, q
+        )
+        users = crud.crud_user.search_users(
+            db, role=role, active=active, prefix=prefix, q=q, after=after, limit=limit
+        )
+        if len(users) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor("id", users[-1])
+        return render_users(users, response, many=True)
+    except Exception as e:
+        logger.error("Error inesperado al buscar usuarios: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -112,26 +638,53 @@ def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(deps.get_d
     response_model=schemas.UserResponse,
     summary="Obtener un usuario por ID",
     response_description="El usuario solicitado",
-    description="Recupera un perfil de usuario específico por su ID único.",
-    responses={status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"}},
+    description=(
+        "Recupera un perfil de usuario específico por su ID único. Admite peticiones "
+        "condicionales con `If-None-Match` / `If-Modified-Since`. Con `fields` solo "
+        "se devuelven los campos indicados."
+    ),
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "El usuario no cambió"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Campos inválidos"},
+        status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"},
+    },
 )
-def read_user(user_id: int, db: Session = Depends(deps.get_db)):
+def read_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(deps.get_read_db),
+):
     """
     Recupera un usuario por su ID.
     - **user_id**: El ID del usuario a recuperar.
+    - **fields**: Campos a devolver, separados por comas (opcional).
     """
+    # La fila completa sale de la caché de lectura por id; solo se proyecta
+    # la salida.
+    selected = resolve_fields(fields)
     try:
-        db_user = crud.crud_user.get(db, id=user_id)
-        if db_user is None:
-            logger.warning(f"Usuario con ID {user_id} no encontrado.")
+        loaded = coalesce_reads(
+            request,
+            ("user", user_id, selected, read_source(db)),
+            lambda: load_user(db, user_id, selected),
+        )
+        if loaded is None:
+            logger.warning("Usuario con ID %s no encontrado.", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
             )
-        return db_user
+        version, updated_at, body = loaded
+        etag = version_etag(version, selected)
+        if is_not_modified(request, etag, updated_at):
+            return not_modified(etag, updated_at)
+        set_validators(response, etag, updated_at)
+        return encoded_response(body, response=response)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Error inesperado al recuperar usuario: {str(e)}")
+        logger.error("Error inesperado al recuperar usuario: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -140,68 +693,81 @@ def read_user(user_id: int, db: Session = Depends(deps.get_db)):
 
 @router.put(
     "/users/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
     response_model=schemas.UserResponse,
     summary="Actualizar un usuario existente",
     response_description="El usuario actualizado",
-    description="Actualiza un perfil de usuario existente por su ID. Los campos no proporcionados no se modifican.",
+    description=(
+        "Actualiza un perfil de usuario existente por su ID. Los campos no proporcionados "
+        "no se modifican. Con `If-Match` (el `ETag` de una lectura previa) la "
+        "actualización solo se aplica si el usuario no cambió desde entonces."
+    ),
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"},
         status.HTTP_409_CONFLICT: {
             "description": "Nombre de usuario o correo electrónico ya existe"
         },
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "El usuario cambió desde la versión indicada en If-Match"
+        },
         status.HTTP_422_UNPROCESSABLE_ENTITY: {
             "description": "Error de validación de entrada"
         },
     },
 )
 def update_user(
-    user_id: int, user: schemas.UserUpdate, db: Session = Depends(deps.get_db)
+    user_id: int,
+    user: schemas.UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag de la versión a actualizar"),
+    db: Session = Depends(deps.get_db),
 ):
     """
     Actualiza un usuario existente.
     - **user_id**: El ID del usuario a actualizar.
     - **user**: Objeto con los campos a actualizar (opcionales).
+    - **If-Match**: ETag de la versión leída (opcional).
     """
+    versions = parse_if_match(if_match) if if_match is not None else None
     try:
-
-        # Obtener usuario actual
-        db_user_actual = crud.crud_user.get(db, id=user_id)
-        if db_user_actual is None:
+        # Un único UPDATE ... RETURNING (condicionado a la versión con If-Match):
+        # sin lectura previa; la fila inexistente o modificada se detecta por el
+        # rowcount y los duplicados por las restricciones.
+        db_user = crud.crud_user.update(db, id=user_id, obj_in=user, versions=versions)
+        if db_user is None and if_match is not None:
+            logger.warning(
+                "No se pudo actualizar: Usuario con ID %s no coincide con If-Match.", user_id
+            )
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="El usuario fue modificado por otra petición.",
+            )
+        if db_user is None:
             logger.warning(
-                f"No se pudo actualizar: Usuario con ID {user_id} no encontrado."
+                "No se pudo actualizar: Usuario con ID %s no encontrado.", user_id
             )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
             )
-
-        # Validar username si fue modificado
-        if user.username and user.username != db_user_actual.username:
-            existing_username = crud.crud_user.get_user_by_username(db, user.username)
-            if existing_username and existing_username.id != user_id:
-                logger.warning(f"El nombre de usuario '{user.username}' ya existe.")
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="El nombre de usuario ya existe.",
-                )
-
-        # Validar email si fue modificado
-        if user.email and user.email != db_user_actual.email:
-            existing_email = crud.crud_user.get_user_by_email(db, user.email)
-            if existing_email and existing_email.id != user_id:
-                logger.warning(
-                    f"La dirección de correo electrónico '{user.email}' ya existe."
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="La dirección de correo electrónico ya existe.",
-                )
-
-        db_user = crud.crud_user.update(db, db_obj=db_user_actual, obj_in=user)
+        response.headers["ETag"] = version_etag(db_user.version)
         return db_user
+    except IntegrityError:
+        db.rollback()
+        detail_error = conflict_detail(
+            db, username=user.username, email=user.email, exclude_id=user_id
+        )
+        if detail_error is None:
+            logger.error("Error de integridad inesperado al actualizar usuario.")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+        logger.warning(detail_error)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail_error)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Error inesperado al actualizar usuario: {str(e)}")
+        logger.error("Error inesperado al actualizar usuario: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -210,6 +776,7 @@ def update_user(
 
 @router.delete(
     "/users/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Eliminar un usuario",
     response_description="No Content",
@@ -227,6 +794,7 @@ def delete_user(user_id: int, db: Session = Depends(deps.get_db)):
 
 @router.delete(
     "/users/secure/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Eliminar un usuario con metodo de Seguridad JWT",
     response_description="No Content",
@@ -236,7 +804,7 @@ def delete_user(user_id: int, db: Session = Depends(deps.get_db)):
 def delete_secure_user(
     user_id: int,
     db: Session = Depends(deps.get_db),
-    current_user: any = Depends(JWTBearer()),
+    current_user: Dict[str, Any] = Depends(JWTBearer()),
 ):
     """
     Elimina un usuario por su ID usando autenticación JWT.
@@ -251,25 +819,147 @@ def eliminar_usuario_por_id(db: Session, user_id: int) -> None:
     Elimina un usuario por su ID. Lanza HTTPException si no existe o si ocurre un error.
     """
     try:
-        db_user_actual = crud.crud_user.get(db, id=user_id)
-        if db_user_actual:
-            success = crud.crud_user.remove(db=db, id=user_id)
-            if not success:
-                logger.warning(f"No se pudo eliminar: Usuario con ID {user_id} no encontrado.")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
-                )
-            logger.info(f"Usuario con ID {user_id} eliminado con éxito.")
-        else:
-            logger.warning(f"Usuario con ID {user_id} no encontrado para eliminar.")
+        # Un único DELETE; la fila inexistente se detecta por el rowcount
+        if crud.crud_user.remove(db=db, id=user_id) is None:
+            logger.warning("Usuario con ID %s no encontrado para eliminar.", user_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
             )
+        logger.info("Usuario con ID %s eliminado con éxito.", user_id)
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Error inesperado al eliminar usuario: {str(e)}")
+        logger.error("Error inesperado al eliminar usuario: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
-        )
\ No newline at end of file
+        )
+
+
+def conflict_detail(
+    db: Session,
+    *,
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    exclude_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Mensaje del conflicto 409 tras violar una restricción de unicidad: indica
+    qué valor ya usa otro usuario. None si ninguno está en uso (la violación
+    fue de otra restricción).
+    """
+    if email:
+        existing = crud.crud_user.get_user_by_email(db, email)
+        if existing is not None and existing.id != exclude_id:
+            return "La dirección de correo electrónico ya existe."
+    if username:
+        existing = crud.crud_user.get_user_by_username(db, username)
+        if existing is not None and existing.id != exclude_id:
+            return "El nombre de usuario ya existe."
+    return None
+
+
+def user_rows(users: List[schemas.UserCreate]) -> List[Dict[str, Any]]:
+    """
+    Valores a insertar para cada usuario: la contraseña se reemplaza por su hash
+    bcrypt, calculado en el pool de procesos de hash.
+    """
+    rows = [jsonable_encoder(user, exclude={"password"}) for user in users]
+    with_password = [i for i, user in enumerate(users) if user.password]
+    if with_password:
+        hashes = password_hasher.hash_many_blocking([users[i].password for i in with_password])
+        for i, hashed in zip(with_password, hashes):
+            rows[i]["hashed_password"] = hashed
+    return rows
+
+
+def hasher_busy(error: PasswordHasherBusy) -> HTTPException:
+    logger.warning("%s", error)
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servicio temporalmente saturado, reintente más tarde.",
+        headers={"Retry-After": "1"},
+    )
+
+
+def resolve_fields(fields: Optional[str]) -> Optional[tuple]:
+    """
+    Normaliza el parámetro `fields` a una tupla de campos de UserResponse en el
+    orden del esquema. Lanza HTTPException 400 si incluye campos desconocidos.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(EXPORT_COLUMNS)
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(sorted(unknown)) or fields!r}.",
+        )
+    return tuple(name for name in EXPORT_COLUMNS if name in requested)
+
+
+def read_source(db: Session) -> str:
+    """
+    Origen de las lecturas de la sesión: las de la réplica y las del primario
+    no se agrupan entre sí (lectura de las propias escrituras).
+    """
+    return "replica" if db.info.get("replica") else "primary"
+
+
+def coalesce_reads(request: Request, key: tuple, fn):
+    """
+    Ejecuta `fn` una sola vez para todas las peticiones concurrentes con la
+    misma clave (USERS_COALESCE_READS). Un cliente que acaba de escribir (cookie
+    de lectura de las propias escrituras) no se une a una lectura en curso, que
+    pudo empezar antes de que su escritura se confirmara.
+    """
+    if not settings.USERS_COALESCE_READS or deps.reads_from_primary(request):
+        return fn()
+    return user_reads.do(key, fn)
+
+
+def load_user(db: Session, user_id: int, fields: Optional[tuple]) -> Optional[tuple]:
+    """
+    (versión, fecha de modificación, JSON) del usuario, o None si no existe.
+    """
+    db_user = crud.crud_user.get(db, id=user_id)
+    if db_user is None:
+        return None
+    return db_user.version, db_user.updated_at, serialize_users(db_user, fields=fields)
+
+
+def serialize_users(data: Any, many: bool = False, fields: Optional[tuple] = None) -> bytes:
+    """
+    JSON de uno o varios usuarios con la forma de UserResponse (o de los
+    campos `fields`), listo para compartirse entre peticiones.
+    """
+    schema = schemas.UserResponse if fields is None else partial_schema(schemas.UserResponse, fields)
+    return serialize(
+        data,
+        schema,
+        many=many,
+        trusted=settings.USERS_FAST_SERIALIZATION and settings.USERS_SERIALIZATION_TRUSTED,
+    )
+
+
+def render_users(
+    data: Any, response: Response, many: bool = False, fields: Optional[tuple] = None
+) -> Any:
+    """
+    Con USERS_FAST_SERIALIZATION o con `fields` devuelve los usuarios ya
+    serializados (con un esquema parcial en el segundo caso); si no, los
+    devuelve tal cual para que los procese `response_model`. El esquema
+    OpenAPI es el mismo en todos los casos.
+    """
+    fast = settings.USERS_FAST_SERIALIZATION
+    if fields is None and not fast:
+        return data
+    schema = schemas.UserResponse if fields is None else partial_schema(schemas.UserResponse, fields)
+    return json_response(
+        data,
+        schema,
+        many=many,
+        trusted=fast and settings.USERS_SERIALIZATION_TRUSTED,
+        response=response,
+    )
@@ -0,0 +1,472 @@
+# Endpoints CRUD asíncronos para usuarios (se activan con DB_ASYNC=true)
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud, schemas
+from app.auth.auth_bearer import JWTBearer
+from app.core import deps
+from app.core.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    parse_if_match,
+    set_validators,
+    version_etag,
+)
+from app.core.config import settings
+from app.core.idempotency import (
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
+    fingerprint,
+    run_idempotent_async,
+)
+from app.core.pagination import encode_cursor
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.core.serialization import encoded_response
+from app.core.singleflight import AsyncSingleFlight
+
+from . import users as users_sync
+from .users import (
+    FIELDS_DESCRIPTION,
+    IDEMPOTENCY_KEY_DESCRIPTION,
+    VALIDATOR_COLUMNS,
+    hasher_busy,
+    idempotency_error,
+    resolve_cursor,
+    resolve_fields,
+    serialize_users,
+    stored_error,
+)
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# Lecturas idénticas en curso en el event loop
+user_reads = AsyncSingleFlight("users_async")
+
+
+async def coalesce_reads(request: Request, key: tuple, fn):
+    """
+    Espera `fn` una sola vez para todas las peticiones concurrentes con la
+    misma clave (USERS_COALESCE_READS; ver users.coalesce_reads).
+    """
+    if not settings.USERS_COALESCE_READS or deps.reads_from_primary(request):
+        return await fn()
+    return await user_reads.do(key, fn)
+
+
+@router.post(
+    "/users/",
+    dependencies=[Depends(deps.mark_write)],
+    response_model=schemas.UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear un nuevo usuario",
+    response_description="El usuario recién creado",
+    description="Crea un nuevo perfil de usuario con un nombre de usuario y correo electrónico únicos.",
+    responses={
+        status.HTTP_409_CONFLICT: {
+            "description": "Nombre de usuario o correo electrónico ya existe"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Error de validación de entrada"
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            "description": "Error interno del servidor"
+        },
+    },
+)
+async def create_user(
+    user: schemas.UserCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        min_length=1,
+        max_length=255,
+        description=IDEMPOTENCY_KEY_DESCRIPTION,
+    ),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Crea un nuevo usuario en la base de datos.
+    - **username**: Nombre de usuario único.
+    - **email**: Dirección de correo electrónico única.
+    - **first_name**: Nombre del usuario (opcional).
+    - **last_name**: Apellido del usuario (opcional).
+    - **role**: Rol del usuario (admin, user, guest). Por defecto "user".
+    - **active**: Booleano que indica si el usuario está activo. Por defecto True.
+
+    Con el encabezado **Idempotency-Key** se comporta como la variante síncrona
+    y comparte con ella el almacén de claves (ver users.create_user).
+    """
+    if idempotency_key is None:
+        return await insert_user(db, user)
+
+    async def execute():
+        try:
+            created = await insert_user(db, user)
+        except HTTPException as e:
+            return stored_error(e)
+        return status.HTTP_201_CREATED, serialize_users(created)
+
+    try:
+        status_code, body, replayed = await run_idempotent_async(
+            users_sync.user_creations,
+            f"users.create:{idempotency_key}",
+            fingerprint(user.model_dump(mode="json")),
+            execute,
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+            wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+        )
+    except (IdempotencyKeyMismatch, IdempotencyKeyInProgress) as e:
+        raise idempotency_error(e)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return encoded_response(body, response=response, status_code=status_code)
+
+
+async def conflict_detail(
+    db: AsyncSession,
+    *,
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    exclude_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Variante asíncrona de users.conflict_detail (mismos mensajes 409).
+    """
+    if email:
+        existing = await crud.async_crud_user.get_user_by_email(db, email)
+        if existing is not None and existing.id != exclude_id:
+            return "La dirección de correo electrónico ya existe."
+    if username:
+        existing = await crud.async_crud_user.get_user_by_username(db, username)
+        if existing is not None and existing.id != exclude_id:
+            return "El nombre de usuario ya existe."
+    return None
+
+
+async def insert_user(db: AsyncSession, user: schemas.UserCreate):
+    """
+    Inserta el usuario y traduce los errores a HTTPException (409 si el nombre
+    de usuario o el correo ya existen).
+    """
+    try:
+        # Un único INSERT; las restricciones de unicidad detectan los duplicados
+        values = jsonable_encoder(user, exclude={"password"})
+        if user.password:
+            values["hashed_password"] = await password_hasher.hash(user.password)
+        return await crud.async_crud_user.create(db=db, obj_in=values)
+    except PasswordHasherBusy as e:
+        raise hasher_busy(e)
+    except IntegrityError:
+        await db.rollback()
+        detail_error = await conflict_detail(db, username=user.username, email=user.email)
+        if detail_error is None:
+            logger.error("Error de integridad inesperado al crear usuario.")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+        logger.warning(detail_error)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail_error)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error inesperado al crear usuario: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.get(
+    "/users/",
+    response_model=List[schemas.UserResponse],
+    summary="Obtener todos los usuarios",
+    response_description="Lista de usuarios",
+    description=(
+        "Recupera una lista de todos los perfiles de usuario, con opciones de paginación. "
+        "Si la página está completa, el encabezado `X-Next-Cursor` contiene el cursor "
+        "para pedir la siguiente página. Admite peticiones condicionales con "
+        "`If-None-Match` / `If-Modified-Since`. Con `fields` solo se leen y devuelven "
+        "los campos indicados."
+    ),
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "La página no cambió"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Cursor o campos inválidos"},
+    },
+)
+async def read_users(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.USERS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", pattern="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Recupera una lista de usuarios.
+    - **skip**: Número de usuarios a omitir (para paginación por desplazamiento).
+    - **limit**: Número máximo de usuarios a devolver.
+    - **cursor**: Cursor opaco devuelto en `X-Next-Cursor`; si se envía, se ignora `skip`.
+    - **order_by**: Clave de ordenamiento, `id` o `created_at`.
+    - **fields**: Campos a devolver, separados por comas (opcional).
+    """
+    after = resolve_cursor(cursor, order_by)
+    selected = resolve_fields(fields)
+    # Mismos validadores que la variante síncrona (ver users.read_users)
+    window = {"skip": 0, "after": after} if cursor else {"skip": skip, "after": None}
+
+    def validators(summary) -> tuple:
+        etag = make_etag(
+            "users", order_by, window["skip"], window["after"], limit, selected,
+            *summary.values(),
+        )
+        return etag, summary["last_modified"]
+
+    columns = selected and (*selected, *VALIDATOR_COLUMNS)
+
+    async def load_page():
+        if cursor:
+            users = await crud.async_crud_user.get_multi_keyset(
+                db, after=after, limit=limit, order_by=order_by, columns=columns
+            )
+        else:
+            users = await crud.async_crud_user.get_multi(
+                db, skip=skip, limit=limit, order_by=order_by, columns=columns
+            )
+        next_cursor = encode_cursor(order_by, users[-1]) if len(users) == limit else None
+        body = serialize_users(users, many=True, fields=selected)
+        return next_cursor, crud.async_crud_user.summarize_page(users), body
+
+    try:
+        if is_conditional(request):
+            summary = await coalesce_reads(
+                request,
+                ("summary", order_by, window["skip"], window["after"], limit),
+                lambda: crud.async_crud_user.get_page_summary(
+                    db, limit=limit, order_by=order_by, **window
+                ),
+            )
+            etag, last_modified = validators(summary)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+        key = ("page", order_by, window["skip"], window["after"], limit, selected)
+        next_cursor, summary, body = await coalesce_reads(request, key, load_page)
+        set_validators(response, *validators(summary))
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return encoded_response(body, response=response)
+    except Exception as e:
+        logger.error("Error inesperado al recuperar usuarios: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.get(
+    "/users/{user_id}",
+    response_model=schemas.UserResponse,
+    summary="Obtener un usuario por ID",
+    response_description="El usuario solicitado",
+    description=(
+        "Recupera un perfil de usuario específico por su ID único. Admite peticiones "
+        "condicionales con `If-None-Match` / `If-Modified-Since`. Con `fields` solo "
+        "se devuelven los campos indicados."
+    ),
+    responses={
+        status.HTTP_304_NOT_MODIFIED: {"description": "El usuario no cambió"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Campos inválidos"},
+        status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"},
+    },
+)
+async def read_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Recupera un usuario por su ID.
+    - **user_id**: El ID del usuario a recuperar.
+    - **fields**: Campos a devolver, separados por comas (opcional).
+    """
+    selected = resolve_fields(fields)
+
+    async def load_user():
+        db_user = await crud.async_crud_user.get(db, id=user_id)
+        if db_user is None:
+            return None
+        return db_user.version, db_user.updated_at, serialize_users(db_user, fields=selected)
+
+    loaded = await coalesce_reads(request, ("user", user_id, selected), load_user)
+    if loaded is None:
+        logger.warning("Usuario con ID %s no encontrado.", user_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
+        )
+    version, updated_at, body = loaded
+    etag = version_etag(version, selected)
+    if is_not_modified(request, etag, updated_at):
+        return not_modified(etag, updated_at)
+    set_validators(response, etag, updated_at)
+    return encoded_response(body, response=response)
+
+
+@router.put(
+    "/users/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
+    response_model=schemas.UserResponse,
+    summary="Actualizar un usuario existente",
+    response_description="El usuario actualizado",
+    description=(
+        "Actualiza un perfil de usuario existente por su ID. Los campos no proporcionados "
+        "no se modifican. Con `If-Match` (el `ETag` de una lectura previa) la "
+        "actualización solo se aplica si el usuario no cambió desde entonces."
+    ),
+    responses={
+        status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"},
+        status.HTTP_409_CONFLICT: {
+            "description": "Nombre de usuario o correo electrónico ya existe"
+        },
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "El usuario cambió desde la versión indicada en If-Match"
+        },
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {
+            "description": "Error de validación de entrada"
+        },
+    },
+)
+async def update_user(
+    user_id: int,
+    user: schemas.UserUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag de la versión a actualizar"),
+    db: AsyncSession = Depends(deps.get_async_db),
+):
+    """
+    Actualiza un usuario existente.
+    - **user_id**: El ID del usuario a actualizar.
+    - **user**: Objeto con los campos a actualizar (opcionales).
+    - **If-Match**: ETag de la versión leída (opcional).
+    """
+    versions = parse_if_match(if_match) if if_match is not None else None
+    try:
+        # Un único UPDATE ... RETURNING condicionado a la versión con If-Match;
+        # los duplicados los detectan las restricciones (ver users.update_user)
+        db_user = await crud.async_crud_user.update(
+            db, id=user_id, obj_in=user, versions=versions
+        )
+        if db_user is None and if_match is not None:
+            logger.warning(
+                "No se pudo actualizar: Usuario con ID %s no coincide con If-Match.", user_id
+            )
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="El usuario fue modificado por otra petición.",
+            )
+        if db_user is None:
+            logger.warning(
+                "No se pudo actualizar: Usuario con ID %s no encontrado.", user_id
+            )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
+            )
+        response.headers["ETag"] = version_etag(db_user.version)
+        return db_user
+    except IntegrityError:
+        await db.rollback()
+        detail_error = await conflict_detail(
+            db, username=user.username, email=user.email, exclude_id=user_id
+        )
+        if detail_error is None:
+            logger.error("Error de integridad inesperado al actualizar usuario.")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+        logger.warning(detail_error)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail_error)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error inesperado al actualizar usuario: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
+
+@router.delete(
+    "/users/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Eliminar un usuario",
+    response_description="No Content",
+    description="Elimina un perfil de usuario por su ID único.",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"}},
+)
+async def delete_user(user_id: int, db: AsyncSession = Depends(deps.get_async_db)):
+    """
+    Elimina un usuario por su ID.
+    - **user_id**: El ID del usuario a eliminar.
+    """
+    await eliminar_usuario_por_id(db, user_id)
+    return {"message": "Usuario eliminado con éxito"}
+
+
+@router.delete(
+    "/users/secure/{user_id}",
+    dependencies=[Depends(deps.mark_write)],
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Eliminar un usuario con metodo de Seguridad JWT",
+    response_description="No Content",
+    description="Elimina un perfil de usuario por su ID único.",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado"}},
+)
+async def delete_secure_user(
+    user_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Dict[str, Any] = Depends(JWTBearer()),
+):
+    """
+    Elimina un usuario por su ID usando autenticación JWT.
+    - **user_id**: El ID del usuario a eliminar.
+    """
+    await eliminar_usuario_por_id(db, user_id)
+    return {"message": "Usuario eliminado con éxito"}
+
+
+async def eliminar_usuario_por_id(db: AsyncSession, user_id: int) -> None:
+    """
+    Elimina un usuario por su ID. Lanza HTTPException si no existe o si ocurre un error.
+    """
+    try:
+        if await crud.async_crud_user.remove(db=db, id=user_id) is None:
+            logger.warning("Usuario con ID %s no encontrado para eliminar.", user_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado"
+            )
+        logger.info("Usuario con ID %s eliminado con éxito.", user_id)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error("Error inesperado al eliminar usuario: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
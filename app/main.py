@@ -1,13 +1,25 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import FastAPI
+from fastapi.responses import Response
 import logging
+import asyncio
+from .auth.auth_bearer import JWTBearer, token_cache_stats
+from .auth.revocation import poll_revocations, revocation_index
+from .core import metrics
+from .core.admission import AdmissionMiddleware, build_rate_limit_store
+from .core.request_context import RequestContextMiddleware
+from .core.config import settings
+from .core.log import setup_logging
+from .core.security import password_hasher
+from .crud.users import users_cache
+from .db import session
+from .db.instrumentation import instrument_engine
+from .db.pool import pool_wait
 from .endpoints.routes import api_router_v1
 
-# Configuración básica de logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Logging estructurado: la escritura ocurre en el hilo del QueueListener
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Inicializa la aplicación FastAPI
@@ -19,9 +31,65 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 app.include_router(api_router_v1)
+
+# Métricas de las sentencias SQL y registro de consultas lentas o muestreadas
+_sql_instrumentation = dict(
+    record_metrics=settings.METRICS_ENABLED,
+    log_mode=settings.SQL_LOG_MODE,
+    sample_rate=settings.SQL_LOG_SAMPLE_RATE,
+    slow_query_ms=settings.SQL_SLOW_QUERY_MS,
+    explain_slow=settings.SQL_EXPLAIN_SLOW,
+)
+instrument_engine(session.engine, **_sql_instrumentation)
+if session.replica_engine is not None:
+    instrument_engine(session.replica_engine, name="replica", **_sql_instrumentation)
+if session.async_engine is not None:
+    instrument_engine(session.async_engine.sync_engine, name="async", **_sql_instrumentation)
+
+# Control de admisión: rechaza con 429/503 antes de ocupar un hilo o una conexión
+if settings.RATE_LIMIT_PER_SECOND or settings.MAX_IN_FLIGHT_REQUESTS or settings.MAX_POOL_WAIT_MS:
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        _rate_limit_options = dict(
+            path=settings.RATE_LIMIT_SHARED_PATH, slots=settings.RATE_LIMIT_SHARED_SLOTS
+        )
+    else:
+        _rate_limit_options = {}
+    app.add_middleware(
+        AdmissionMiddleware,
+        store=build_rate_limit_store(settings.RATE_LIMIT_BACKEND, **_rate_limit_options),
+        rate=settings.RATE_LIMIT_PER_SECOND,
+        burst=settings.RATE_LIMIT_BURST,
+        max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS,
+        max_pool_wait=settings.MAX_POOL_WAIT_MS / 1000,
+        pool_wait=pool_wait.value,
+        decode_claims=JWTBearer(auto_error=False).decode_claims,
+    )
+
+# Métricas en formato Prometheus expuestas en /metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.register_cache_metrics({"users": users_cache.stats, "jwt": token_cache_stats})
+    metrics.registry.register(
+        metrics.CallbackMetric(
+            "revoked_tokens",
+            "Tokens revocados en el índice en memoria del proceso.",
+            lambda: [({}, len(revocation_index))],
+        )
+    )
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """
+        Expone las métricas de la aplicación en formato de texto de Prometheus.
+        """
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+# Expone el scope de la petición (p. ej. su ruta) al registro de SQL
+app.add_middleware(RequestContextMiddleware)
+
 # Evento de inicio: las tablas serán gestionadas por Alembic.
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     """
     Se ejecuta al iniciar la aplicación.
     Las tablas serán gestionadas por Alembic, así que no se usa create_all aquí.
@@ -29,6 +97,16 @@ def on_startup():
     logger.info("Iniciando la aplicación.")
     # Base.metadata.create_all(bind=engine) # <-- LÍNEA ELIMINADA: Alembic gestiona las migraciones
     logger.info("Tablas de la base de datos gestionadas por Alembic.")
+    # Sondeo periódico de los tokens revocados por cualquier proceso
+    app.state.revocation_poller = asyncio.create_task(poll_revocations(session.Session))
+
+# Evento de cierre: detiene el sondeo de revocaciones y los procesos de hash de contraseñas
+@app.on_event("shutdown")
+async def on_shutdown():
+    poller = getattr(app.state, "revocation_poller", None)
+    if poller is not None:
+        poller.cancel()
+    password_hasher.shutdown()
 
 # Endpoint de prueba para verificar que la API está funcionando
 @app.get("/", summary="Verificar estado de la API", response_description="Mensaje de bienvenida")
@@ -0,0 +1,25 @@
+# app/models/idempotency_keys.py
+
+from sqlalchemy import Column, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.models.users import Timestamp
+
+
+class IdempotencyKey(Base):
+    """
+    Respuestas guardadas por Idempotency-Key. Una fila sin status_code es una
+    petición aún en curso: reserva la clave para quien la insertó.
+    """
+    __tablename__ = "idempotency_keys"
+
+    # Clave con el prefijo de la operación (p. ej. "users.create:<Idempotency-Key>")
+    key = Column(String(300), primary_key=True)
+    # Hash del cuerpo de la petición; otra petición con la misma clave debe coincidir
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(Timestamp, default=func.now(), nullable=False)
+    # Segundos epoch: fin de la reserva de una petición en curso o del TTL de la respuesta
+    expires_at = Column(Integer, nullable=False, index=True)
@@ -0,0 +1,20 @@
+# app/models/revoked_tokens.py
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.models.users import Timestamp
+
+
+class RevokedToken(Base):
+    """
+    Tokens JWT revocados antes de su expiración, identificados por su claim "jti".
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    # Expiración del token (claim "exp", segundos epoch); pasada esta fecha la fila ya no es necesaria
+    expires_at = Column(Integer, nullable=False, index=True)
+    # Fecha de revocación según el servidor de base de datos; marca de agua del sondeo incremental
+    revoked_at = Column(Timestamp, default=func.now(), nullable=False, index=True)
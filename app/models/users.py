@@ -1,9 +1,37 @@
 # app/models.py
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.sql import func
+from sqlalchemy import DDL, Column, Integer, String, Boolean, DateTime, Index, event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import func, literal_column
 from app.db.base_class import Base
 
+# En SQLite func.now() guarda las fechas sin microsegundos; los parámetros deben
+# usar el mismo formato para que las comparaciones (cursores, filtros) sean correctas.
+Timestamp = DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+# Columnas de texto que cubren la búsqueda por prefijo y de texto completo
+SEARCH_COLUMNS = ("username", "first_name", "last_name")
+
+
+def search_document(*columns):
+    """
+    Documento de texto completo de PostgreSQL; el índice GIN y las consultas
+    deben usar exactamente la misma expresión.
+    """
+    text = func.coalesce(columns[0], "")
+    for column in columns[1:]:
+        text = text + " " + func.coalesce(column, "")
+    return func.to_tsvector(literal_column("'simple'"), text)
+
+
+def _prefix_index(name: str, column) -> Index:
+    label = f"{name}_lower"
+    return Index(
+        f"ix_users_{label}",
+        func.lower(column).label(label),
+        postgresql_ops={label: "text_pattern_ops"},
+    )
+
 
 class User(Base):
     """
@@ -18,9 +46,59 @@ class User(Base):
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
     role = Column(String, default="user", nullable=False) # admin, user, guest
-    created_at = Column(DateTime, default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(Timestamp, default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now(), nullable=False)
     active = Column(Boolean, default=True, nullable=False)
+    # Hash bcrypt de la contraseña; NULL si el usuario no tiene contraseña
+    hashed_password = Column(String, nullable=True)
+    # Versión de la fila para control de concurrencia optimista (ETag / If-Match)
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+
+    __table_args__ = (
+        # Soporta la paginación por cursor ordenada por (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Búsqueda filtrada por rol/estado, ordenada por id
+        Index("ix_users_role_active_id", "role", "active", "id"),
+        # Búsqueda por prefijo sin distinguir mayúsculas: lower(col) por rango
+        # (SQLite) o LIKE 'prefijo%' (PostgreSQL, con text_pattern_ops)
+        _prefix_index("username", username),
+        _prefix_index("first_name", first_name),
+        _prefix_index("last_name", last_name),
+        # Texto completo en PostgreSQL; en SQLite se usa la tabla FTS5 users_fts
+        Index(
+            "ix_users_search_document",
+            search_document(username, first_name, last_name),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    # Las actualizaciones del ORM incrementan la versión y verifican la leída
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
-        return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>"
\ No newline at end of file
+        return f"<User(id={self.id}, username='{self.username}', email='{self.email}')>"
+
+
+# Índice de texto completo en SQLite: tabla FTS5 de contenido externo sobre
+# users, sincronizada con triggers. Se crea y elimina junto con la tabla.
+USERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5("
+    "username, first_name, last_name, content='users', content_rowid='id')",
+    "CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+    "CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); END",
+    "CREATE TRIGGER users_fts_au AFTER UPDATE ON users BEGIN "
+    "INSERT INTO users_fts(users_fts, rowid, username, first_name, last_name) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name); "
+    "INSERT INTO users_fts(rowid, username, first_name, last_name) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name); END",
+)
+
+for _statement in USERS_FTS_DDL:
+    event.listen(User.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    User.__table__, "before_drop", DDL("DROP TABLE IF EXISTS users_fts").execute_if(dialect="sqlite")
+)
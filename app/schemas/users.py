@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
@@ -22,8 +22,9 @@ class UserCreate(UserBase):
     Esquema para la creación de un nuevo usuario.
     """
 
-    # No se añaden campos adicionales aquí, ya que UserBase contiene lo necesario para la creación.
-    pass
+    # Opcional: sin contraseña el usuario no puede obtener tokens con /auth/token.
+    # bcrypt solo usa los primeros 72 bytes.
+    password: Optional[str] = Field(None, min_length=8, max_length=72, example="s3cr3t-pass")
 
 
 class UserUpdate(BaseModel):
@@ -59,3 +60,42 @@ class UserResponse(UserBase):
         """
 
         from_attributes = True  # Anteriormente orm_mode = True en Pydantic v1
+
+
+class UserBulkItemResult(BaseModel):
+    """
+    Resultado de un registro dentro de un alta masiva.
+    """
+
+    index: int = Field(..., example=0)
+    status: str = Field(..., pattern="^(created|conflict|error)$", example="created")
+    user: Optional[UserResponse] = None
+    detail: Optional[str] = Field(None, example="El nombre de usuario ya existe.")
+
+
+class UserBulkResponse(BaseModel):
+    """
+    Esquema para la respuesta del alta masiva de usuarios.
+    """
+
+    created: int = Field(..., example=1)
+    failed: int = Field(..., example=0)
+    results: List[UserBulkItemResult]
+
+
+class TokenRequest(BaseModel):
+    """
+    Credenciales para obtener un token de acceso.
+    """
+
+    username: str = Field(..., example="jrujano")
+    password: str = Field(..., example="s3cr3t-pass")
+
+
+class Token(BaseModel):
+    """
+    Token de acceso emitido por /auth/token.
+    """
+
+    access_token: str
+    token_type: str = Field("bearer", example="bearer")
@@ -0,0 +1,172 @@
+"""
+Benchmark de inicio de sesión (POST /auth/token) según el número de procesos bcrypt.
+
+Siembra una base SQLite con un usuario con contraseña y, para cada número de
+procesos del pool de hashing, ejecuta peticiones concurrentes de login contra
+la aplicación real mediante el transporte ASGI. Reporta logins por segundo y
+latencias p50/p95/p99 para comprobar que el rendimiento escala con los núcleos.
+
+Uso:
+    python -m benchmarks.login --workers 0 1 2 4 --requests 200 --concurrency 20 \\
+        --output login.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, insert
+
+from benchmarks.run import API, _asgi_app, run_scenario
+
+USERNAME = "bench_login"
+PASSWORD = "bench-password"
+
+
+def seed_login_user(url: str, rounds: int) -> None:
+    """
+    Crea las tablas e inserta el usuario del benchmark con su contraseña hasheada
+    con `rounds` rondas de bcrypt (el costo de cada verificación).
+    """
+    from app.db.base import Base
+    from app.models.users import User
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            {
+                "username": USERNAME,
+                "email": f"{USERNAME}@example.com",
+                "hashed_password": context.hash(PASSWORD),
+            },
+        )
+    engine.dispose()
+
+
+def default_workers() -> List[int]:
+    """
+    0 (un hilo) y potencias de dos hasta el número de núcleos.
+    """
+    cpus = os.cpu_count() or 1
+    workers, n = [0], 1
+    while n < cpus:
+        workers.append(n)
+        n *= 2
+    return workers + [cpus]
+
+
+async def run_login_benchmark(
+    *,
+    workers: Optional[List[int]] = None,
+    requests: int = 100,
+    concurrency: int = 10,
+    rounds: int = 12,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    from app.core.security import password_hasher
+    from app.main import app
+
+    workers = workers if workers is not None else default_workers()
+    workdir = workdir or tempfile.mkdtemp(prefix="latam-bench-")
+    url = f"sqlite:///{os.path.join(workdir, 'login.db')}"
+    seed_login_user(url, rounds)
+
+    def scenario(i):
+        return (
+            "POST",
+            f"{API}/auth/token",
+            {"json": {"username": USERNAME, "password": PASSWORD}},
+            (200,),
+        )
+
+    previous_overrides = dict(app.dependency_overrides)
+    previous_workers = password_hasher.workers
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=_asgi_app(app, url))
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(
+            base_url="http://bench", transport=transport, limits=limits, timeout=120
+        ) as client:
+            for count in workers:
+                password_hasher.shutdown()
+                password_hasher.workers = count
+                # Calentamiento: arranca los procesos fuera de la medición
+                await run_scenario(client, scenario, max(count, 1), max(count, 1))
+                results[str(count)] = await run_scenario(
+                    client, scenario, requests, concurrency
+                )
+    finally:
+        password_hasher.shutdown()
+        password_hasher.workers = previous_workers
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(previous_overrides)
+
+    return {
+        "meta": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "rounds": rounds,
+            "cpus": os.cpu_count(),
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(
+        f"Logins: {meta['requests']} peticiones, concurrencia {meta['concurrency']}, "
+        f"{meta['rounds']} rondas bcrypt, {meta['cpus']} CPUs"
+    )
+    header = f"{'procesos':>8} {'logins/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errores':>8}"
+    print(header)
+    print("-" * len(header))
+    for workers, r in report["results"].items():
+        print(
+            f"{workers:>8} {r['rps']:>10.2f} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+            f"{r['p99_ms']:>10.2f} {r['errors']:>8}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="Procesos del pool a medir (0 = un hilo)")
+    parser.add_argument("--requests", type=int, default=100, help="Logins por medición")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=12, help="Rondas de bcrypt")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(
+        run_login_benchmark(
+            workers=args.workers,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            rounds=args.rounds,
+        )
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
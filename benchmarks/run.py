@@ -0,0 +1,335 @@
+"""
+Benchmark de carga y latencia de los endpoints de usuarios.
+
+Ejecuta la aplicación real (app.main:app) sobre una base SQLite sembrada con
+usuarios, a través de un transporte ASGI en el mismo proceso o de un proceso
+uvicorn local, y reporta peticiones por segundo y latencias p50/p95/p99 por ruta.
+
+Uso:
+    python -m benchmarks.run --users 10000 --requests 500 --concurrency 20 \\
+        --output bench.json
+    python -m benchmarks.run --compare bench.json --threshold 0.1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+API = "/api/v1"
+ROUTES = ["create", "list", "get", "update", "delete", "secure_delete"]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Percentil por rango más cercano sobre una lista ordenada.
+    """
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+def seed_database(url: str, users: int, victims: int) -> List[int]:
+    """
+    Crea las tablas e inserta `users` usuarios más `victims` usuarios que se usan
+    en los escenarios de eliminación. Devuelve los ids de estos últimos.
+    """
+    from app.db.base import Base
+    from app.models.users import User
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    rows = [
+        {"username": f"seed{i}", "email": f"seed{i}@example.com", "first_name": "Seed"}
+        for i in range(users + victims)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(User), rows[start : start + 5000])
+    engine.dispose()
+    return list(range(users + 1, users + victims + 1))
+
+
+def build_scenarios(users: int, victims: List[int], requests: int, token: str) -> Dict[str, Callable]:
+    """
+    Cada escenario recibe el número de petición y devuelve (método, url, kwargs, estados esperados).
+    """
+    half = len(victims) // 2
+    delete_ids, secure_ids = victims[:half], victims[half:]
+    run_id = int(time.time() * 1000)
+    return {
+        "create": lambda i: (
+            "POST",
+            f"{API}/users/",
+            {"json": {"username": f"bench{run_id}_{i}", "email": f"bench{run_id}_{i}@example.com"}},
+            (201,),
+        ),
+        "list": lambda i: ("GET", f"{API}/users/", {"params": {"limit": 100}}, (200,)),
+        "get": lambda i: ("GET", f"{API}/users/{random.randint(1, users)}", {}, (200,)),
+        "update": lambda i: (
+            "PUT",
+            f"{API}/users/{random.randint(1, users)}",
+            {"json": {"first_name": f"Bench{i}"}},
+            (200,),
+        ),
+        "delete": lambda i: ("DELETE", f"{API}/users/{delete_ids[i]}", {}, (204,)),
+        "secure_delete": lambda i: (
+            "DELETE",
+            f"{API}/users/secure/{secure_ids[i]}",
+            {"headers": {"Authorization": f"Bearer {token}"}},
+            (204,),
+        ),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Callable, requests: int, concurrency: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs, expected = scenario(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in expected:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("El servidor uvicorn no respondió a tiempo.")
+            await asyncio.sleep(0.1)
+
+
+def _asgi_app(app, url: str):
+    """
+    Devuelve la aplicación con las dependencias de base de datos apuntando a `url`.
+    """
+    from app.core import deps
+    from app.crud import crud_user
+    from app.db.session import get_async_database_url
+
+    engine = create_engine(url)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[deps.get_db] = get_db
+    try:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_session_factory = async_sessionmaker(
+            bind=create_async_engine(get_async_database_url(url)),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+        async def get_async_db():
+            async with async_session_factory() as db:
+                yield db
+
+        app.dependency_overrides[deps.get_async_db] = get_async_db
+    except ImportError:
+        pass  # Sin driver asíncrono: solo se mide el modo síncrono
+    crud_user.cache.clear()
+    return app
+
+
+async def run_benchmark(
+    *,
+    users: int = 1000,
+    requests: int = 200,
+    concurrency: int = 10,
+    transport: str = "asgi",
+    routes: Optional[List[str]] = None,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    from app.auth.auth_handler import signJWT
+
+    routes = routes or ROUTES
+    workdir = workdir or tempfile.mkdtemp(prefix="latam-bench-")
+    url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    victims = seed_database(url, users, 2 * requests)
+    token = signJWT("bench")["access_token"]
+    scenarios = build_scenarios(users, victims, requests, token)
+
+    server = None
+    app = None
+    if transport == "uvicorn":
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+             "--log-level", "warning", "--no-access-log"],
+            env={**os.environ, "SQLALCHEMY_DATABASE_URL": url},
+        )
+        client_kwargs = {"base_url": base_url}
+    else:
+        from app.main import app
+
+        previous_overrides = dict(app.dependency_overrides)
+        client_kwargs = {
+            "base_url": "http://bench",
+            "transport": httpx.ASGITransport(app=_asgi_app(app, url)),
+        }
+
+    results = {}
+    try:
+        if server is not None:
+            await _wait_until_ready(client_kwargs["base_url"])
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=60, **client_kwargs) as client:
+            for route in routes:
+                results[route] = await run_scenario(
+                    client, scenarios[route], requests, concurrency
+                )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if app is not None:
+            app.dependency_overrides.clear()
+            app.dependency_overrides.update(previous_overrides)
+
+    return {
+        "meta": {
+            "users": users,
+            "requests": requests,
+            "concurrency": concurrency,
+            "transport": transport,
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Devuelve las regresiones respecto a la línea base: caída de rps o aumento de
+    p95/p99 mayor que `threshold` (fracción), o nuevos errores.
+    """
+    regressions = []
+    for route, result in current["results"].items():
+        base = baseline.get("results", {}).get(route)
+        if base is None:
+            continue
+        if base["rps"] and result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{route}: rps {base['rps']} -> {result['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if base[key] and result[key] > base[key] * (1 + threshold):
+                regressions.append(f"{route}: {key} {base[key]} -> {result[key]}")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{route}: errores {base['errors']} -> {result['errors']}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    header = f"{'ruta':<14}{'req':>7}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for route, r in report["results"].items():
+        print(
+            f"{route:<14}{r['requests']:>7}{r['errors']:>6}{r['rps']:>10.1f}"
+            f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1000, help="Usuarios sembrados")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones por ruta")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Archivo JSON de línea base a comparar")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Variación tolerada antes de marcar una regresión")
+    parser.add_argument("--with-logs", action="store_true",
+                        help="Mantiene los logs de la aplicación durante la medición")
+    args = parser.parse_args(argv)
+
+    if not args.with_logs:
+        logging.disable(logging.INFO)
+
+    report = asyncio.run(
+        run_benchmark(
+            users=args.users,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            transport=args.transport,
+            routes=args.routes,
+        )
+    )
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegresiones detectadas:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\nSin regresiones respecto a la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Perfil de arranque en frío de la aplicación.
+
+Mide, en procesos nuevos, el tiempo de importación de app.main (desglosado por
+paquete y por módulo de la aplicación, a partir de `python -X importtime`) y el
+tiempo hasta la primera respuesta exitosa de un proceso uvicorn recién lanzado.
+Con `--cold` cada medición usa una copia del código sin bytecode compilado
+(como una imagen construida sin `compileall`).
+
+Uso:
+    python -m benchmarks.startup --runs 5 --top 15 --output startup.json
+    python -m benchmarks.startup --cold
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.run import _free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _workdir(cold: bool) -> str:
+    """
+    Directorio desde el que se lanza el proceso: el repositorio, o una copia de
+    `app/` sin __pycache__ si se mide sin bytecode compilado.
+    """
+    if not cold:
+        return ROOT
+    workdir = tempfile.mkdtemp(prefix="latam-startup-")
+    shutil.copytree(
+        os.path.join(ROOT, "app"),
+        os.path.join(workdir, "app"),
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    return workdir
+
+
+def _cleanup(workdir: str) -> None:
+    if workdir != ROOT:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _env(cold: bool) -> Dict[str, str]:
+    # Base en memoria: el arranque no debe dejar archivos ni depender de migraciones
+    env = {**os.environ, "SQLALCHEMY_DATABASE_URL": "sqlite://"}
+    if cold:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def parse_importtime(output: str) -> List[Tuple[str, float, float]]:
+    """
+    Convierte la salida de `-X importtime` en (módulo, propio ms, acumulado ms).
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def profile_imports(module: str = "app.main", cold: bool = False) -> Dict[str, Any]:
+    """
+    Importa `module` en un proceso nuevo y devuelve el tiempo total, el tiempo
+    propio por paquete de primer nivel y el acumulado de cada módulo `app.*`.
+    """
+    workdir = _workdir(cold)
+    try:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=workdir,
+            env=_env(cold),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    finally:
+        _cleanup(workdir)
+    rows = parse_importtime(result.stderr)
+    packages: Dict[str, float] = defaultdict(float)
+    for name, self_ms, _ in rows:
+        packages[name.split(".")[0]] += self_ms
+    return {
+        "total_ms": next(cumulative for name, _, cumulative in rows if name == module),
+        "packages": dict(packages),
+        "modules": {name: cumulative for name, _, cumulative in rows if name.startswith("app.")},
+    }
+
+
+def time_to_first_request(path: str = "/", cold: bool = False, timeout: float = 60.0) -> float:
+    """
+    Segundos desde que se lanza uvicorn hasta la primera respuesta 200 en `path`.
+    """
+    workdir = _workdir(cold)
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir,
+        env=_env(cold),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client() as client:
+            while True:
+                try:
+                    if client.get(url).status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("El servidor uvicorn no respondió a tiempo.")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        _cleanup(workdir)
+
+
+def run_startup_profile(
+    *, runs: int = 5, path: str = "/", cold: bool = False, top: int = 15
+) -> Dict[str, Any]:
+    imports = [profile_imports(cold=cold) for _ in range(runs)]
+    first_request = [time_to_first_request(path, cold=cold) for _ in range(runs)]
+
+    def median_of(key: str) -> Dict[str, float]:
+        names = set().union(*(profile[key] for profile in imports))
+        medians = {
+            name: statistics.median(profile[key].get(name, 0.0) for profile in imports)
+            for name in names
+        }
+        return dict(sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top])
+
+    return {
+        "meta": {
+            "runs": runs,
+            "path": path,
+            "cold": cold,
+            "python": sys.version.split()[0],
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "import_ms": round(statistics.median(p["total_ms"] for p in imports), 1),
+        "first_request_ms": round(statistics.median(first_request) * 1000, 1),
+        "packages_ms": median_of("packages"),
+        "modules_ms": median_of("modules"),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    meta = report["meta"]
+    print(
+        f"Arranque ({meta['runs']} ejecuciones, mediana"
+        f"{', sin bytecode' if meta['cold'] else ''}): "
+        f"import app.main {report['import_ms']:.1f} ms, "
+        f"primera respuesta en {meta['path']} {report['first_request_ms']:.1f} ms"
+    )
+    for title, key in (("Paquete (tiempo propio)", "packages_ms"), ("Módulo (acumulado)", "modules_ms")):
+        print(f"\n{title:<40} {'ms':>10}")
+        print("-" * 51)
+        for name, ms in report[key].items():
+            print(f"{name:<40} {ms:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="Procesos medidos")
+    parser.add_argument("--path", default="/", help="Ruta de la primera petición")
+    parser.add_argument("--top", type=int, default=15, help="Filas por tabla")
+    parser.add_argument("--cold", action="store_true",
+                        help="Mide sin bytecode compilado del código de la aplicación")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    args = parser.parse_args(argv)
+
+    report = run_startup_profile(runs=args.runs, path=args.path, cold=args.cold, top=args.top)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
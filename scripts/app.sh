@@ -1,6 +1,7 @@
 #!/bin/bash
 echo "Corriendo migraciones"
-alembic upgrade head
+# Solo ejecuta Alembic si alembic_version no coincide con el head de la imagen
+python -m app.db.migrate
 echo "Ajuste de BD realizados....."
 
 
@@ -4,7 +4,9 @@
 echo "Running database migrations..."
 # SQLALCHEMY_DATABASE_URL se espera que esté configurada en el entorno de Cloud Run
 # o como un secreto. Para desarrollo local, Alembic usará alembic.ini o el valor por defecto.
-alembic upgrade head
+# app.db.migrate solo ejecuta Alembic si alembic_version no coincide con el head,
+# bajo un bloqueo para que las instancias que arrancan a la vez no migren en paralelo.
+python -m app.db.migrate
 echo "Migrations applied."
 
 echo "Starting Uvicorn server..."
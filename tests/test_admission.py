@@ -0,0 +1,178 @@
+# tests/test_admission.py
+
+import fcntl
+import os
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.auth.auth_bearer import JWTBearer
+from app.auth.auth_handler import signJWT
+from app.core.admission import (
+    AdmissionMiddleware,
+    InMemoryRateLimitStore,
+    SharedRateLimitStore,
+    http_requests_rejected,
+    rate_limit_local_fallbacks,
+)
+from app.db import pool as pool_module
+from app.db.pool import PoolWaitTracker, TimedQueuePool, pool_options
+
+
+def _rejected(reason: str) -> float:
+    return sum(
+        value for _, labels, value in http_requests_rejected.samples() if labels["reason"] == reason
+    )
+
+
+def test_in_memory_token_bucket():
+    """
+    El bucket admite la ráfaga, luego indica cuánto esperar y se repone con el tiempo.
+    """
+    store = InMemoryRateLimitStore()
+    assert store.take("a", rate=1, burst=2, now=100.0) == 0
+    assert store.take("a", rate=1, burst=2, now=100.0) == 0
+    assert store.take("a", rate=1, burst=2, now=100.0) == 1.0
+    assert store.take("b", rate=1, burst=2, now=100.0) == 0  # Otro cliente
+    assert store.take("a", rate=1, burst=2, now=101.0) == 0
+
+
+def test_shared_token_bucket_across_workers(tmp_path):
+    """
+    Dos almacenes sobre el mismo archivo (como dos workers) comparten los buckets.
+    """
+    path = str(tmp_path / "ratelimit")
+    first = SharedRateLimitStore(path, slots=16)
+    second = SharedRateLimitStore(path, slots=16)
+    assert first.take("ip:1.2.3.4", rate=1, burst=2, now=100.0) == 0
+    assert second.take("ip:1.2.3.4", rate=1, burst=2, now=100.0) == 0
+    assert first.take("ip:1.2.3.4", rate=1, burst=2, now=100.0) == 1.0
+    assert second.take("ip:1.2.3.4", rate=1, burst=2, now=100.5) == 0.5
+    # Con la tabla llena se reutiliza la entrada más antigua en lugar de fallar
+    for i in range(40):
+        assert first.take(f"ip:10.0.0.{i}", rate=1, burst=2, now=200.0 + i) == 0
+    first.close()
+    second.close()
+
+
+def test_shared_store_refuses_other_layout_and_never_blocks(tmp_path):
+    """
+    Un archivo con otro tamaño se rechaza sin truncarlo, y si otro worker tiene
+    el bloqueo la petición se limita con los buckets del proceso sin esperar.
+    """
+    path = str(tmp_path / "ratelimit")
+    store = SharedRateLimitStore(path, slots=16)
+    with pytest.raises(ValueError):
+        SharedRateLimitStore(path, slots=32)
+    assert os.path.getsize(path) == 16 * SharedRateLimitStore.SLOT.size
+
+    # Otro descriptor (como otro worker) mantiene el bloqueo del archivo
+    holder = os.open(path, os.O_RDWR)
+    fcntl.flock(holder, fcntl.LOCK_EX)
+    try:
+        before = sum(value for _, _, value in rate_limit_local_fallbacks.samples())
+        started = time.monotonic()
+        assert store.take("ip:1.2.3.4", rate=1, burst=1, now=100.0) == 0
+        assert store.take("ip:1.2.3.4", rate=1, burst=1, now=100.0) == 1.0
+        assert time.monotonic() - started < 1
+        assert sum(value for _, _, value in rate_limit_local_fallbacks.samples()) == before + 2
+    finally:
+        fcntl.flock(holder, fcntl.LOCK_UN)
+        os.close(holder)
+    # Liberado, vuelve al archivo compartido (cuyo bucket sigue lleno)
+    assert store.take("ip:1.2.3.4", rate=1, burst=1, now=100.0) == 0
+    store.close()
+
+
+def _app(**options) -> FastAPI:
+    demo = FastAPI()
+
+    @demo.get("/")
+    def root():
+        return {"ok": True}
+
+    @demo.get("/items")
+    def items():
+        return {"ok": True}
+
+    demo.add_middleware(AdmissionMiddleware, **options)
+    return demo
+
+
+def test_rate_limit_per_client():
+    """
+    Cada cliente (IP o sujeto del JWT) tiene su propio bucket; al agotarlo se
+    responde 429 con Retry-After. Las rutas exentas siempre se admiten.
+    """
+    before = _rejected("rate_limit")
+    client = TestClient(
+        _app(
+            store=InMemoryRateLimitStore(),
+            rate=0.5,
+            burst=2,
+            decode_claims=JWTBearer(auto_error=False).decode_claims,
+        )
+    )
+    assert client.get("/items").status_code == 200
+    assert client.get("/items").status_code == 200
+    limited = client.get("/items")
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert client.get("/").status_code == 200
+
+    headers = {"Authorization": f"Bearer {signJWT('alice')['access_token']}"}
+    assert client.get("/items", headers=headers).status_code == 200
+    assert client.get("/items", headers=headers).status_code == 200
+    assert client.get("/items", headers=headers).status_code == 429
+    # Un token inválido no cambia la clave: cuenta contra la IP
+    assert client.get("/items", headers={"Authorization": "Bearer x"}).status_code == 429
+    assert _rejected("rate_limit") - before == 3
+
+
+def test_load_shedding_in_flight_and_pool_wait():
+    """
+    Con el máximo de peticiones en curso o con espera alta por el pool se
+    responde 503 de inmediato.
+    """
+    middleware = AdmissionMiddleware(None, max_in_flight=1)
+    scope = {"type": "http", "path": "/items", "headers": [], "client": ("1.2.3.4", 1)}
+    assert middleware.check(scope) is None
+    middleware.in_flight = 1
+    rejection = middleware.check(scope)
+    assert rejection.status_code == 503
+    assert rejection.headers["Retry-After"] == "1"
+
+    wait = {"value": 0.0}
+    client = TestClient(_app(max_pool_wait=0.1, pool_wait=lambda: wait["value"]))
+    assert client.get("/items").status_code == 200
+    wait["value"] = 0.5
+    assert client.get("/items").status_code == 503
+    assert client.get("/").status_code == 200
+    wait["value"] = 0.05
+    assert client.get("/items").status_code == 200
+
+
+def test_timed_pool_tracks_checkout_wait(monkeypatch, tmp_path):
+    """
+    El pool registra la espera de cada checkout y la media decae con el tiempo.
+    """
+    tracker = PoolWaitTracker(half_life=1.0, alpha=1.0)
+    tracker.observe(0.8)
+    assert 0.7 < tracker.value() <= 0.8
+    tracker._updated -= 3  # Tres semividas sin nuevas esperas
+    assert tracker.value() < 0.11
+
+    assert pool_options("sqlite://") == {}
+    assert pool_options("sqlite:///:memory:") == {}
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **pool_options(url))
+    assert isinstance(engine.pool, TimedQueuePool)
+    observed = []
+    monkeypatch.setattr(pool_module.pool_wait, "observe", observed.append)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert len(observed) == 1
+    engine.dispose()
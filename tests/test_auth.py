@@ -0,0 +1,146 @@
+# tests/test_auth.py
+
+import time
+from concurrent.futures import Future
+
+import pytest
+from jose import jwt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.auth import auth_bearer
+from app.auth.auth_bearer import JWTBearer, token_cache, token_cache_stats
+from app.auth.auth_handler import JWT_ALGORITHM, JWT_SECRET, signJWT
+from app.auth.revocation import RevocationIndex, revocation_index, token_expiry
+from app.core.security import PasswordHasher, PasswordHasherBusy
+from app.crud import crud_revoked_token
+from app.db.base import Base
+
+
+def test_decode_claims_is_cached():
+    """
+    La segunda verificación del mismo token se resuelve desde la caché.
+    """
+    token_cache.clear()
+    token = signJWT("42")["access_token"]
+    bearer = JWTBearer()
+    before = token_cache_stats()
+
+    claims = bearer.decode_claims(token)
+    assert claims["user_id"] == "42"
+    assert bearer.decode_claims(token) == claims
+
+    after = token_cache_stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert 0 < after["hit_rate"] <= 1
+
+
+def test_decode_claims_rejects_invalid_and_expired_tokens(monkeypatch):
+    """
+    Los tokens inválidos no se guardan y los cacheados dejan de valer al expirar.
+    """
+    token_cache.clear()
+    bearer = JWTBearer()
+    assert bearer.decode_claims("no-es-un-token") is None
+    assert token_cache.stats()["size"] == 0
+
+    token = jwt.encode(
+        {"user_id": "7", "exp": time.time() + 5}, JWT_SECRET, algorithm=JWT_ALGORITHM
+    )
+    assert bearer.verify_jwt(token)
+    monkeypatch.setattr(auth_bearer.time, "time", lambda: 10**12)
+    assert bearer.decode_claims(token) is None
+
+
+def test_revocation_index_refresh_and_prune():
+    """
+    El índice incorpora solo las revocaciones nuevas (desde la marca de agua,
+    menos el margen) y descarta las de tokens expirados.
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = int(time.time())
+    index = RevocationIndex(grace_seconds=0)
+
+    crud_revoked_token.revoke(db, jti="a", expires_at=now + 60)
+    crud_revoked_token.revoke(db, jti="a", expires_at=now + 60)  # Idempotente
+    crud_revoked_token.revoke(db, jti="old", expires_at=now - 1)
+    assert index.refresh(db, now=now) == 1
+    assert index.is_revoked("a") and not index.is_revoked("old")
+    assert not index.is_revoked(None)
+
+    crud_revoked_token.revoke(db, jti="b", expires_at=now + 5)
+    # Con margen 0 solo se releen las filas de la última marca de agua en adelante
+    assert index.refresh(db, now=now) <= 2
+    assert index.is_revoked("b")
+
+    assert index.prune(now=now + 10) == 1
+    assert index.is_revoked("a") and not index.is_revoked("b")
+    assert crud_revoked_token.delete_expired(db, now=now + 10) == 2
+    db.close()
+
+
+def test_decode_claims_rejects_revoked_tokens():
+    """
+    Un token revocado se rechaza aunque sus claims ya estén en caché.
+    """
+    token_cache.clear()
+    revocation_index.clear()
+    bearer = JWTBearer()
+    token = signJWT("9")["access_token"]
+    claims = bearer.decode_claims(token)
+    assert claims["jti"]
+
+    revocation_index.add(claims["jti"], token_expiry(claims))
+    assert bearer.decode_claims(token) is None
+    token_cache.clear()
+    assert bearer.decode_claims(token) is None
+    revocation_index.clear()
+    assert bearer.decode_claims(token) == claims
+
+
+class _RecordingExecutor:
+    """
+    Executor de prueba: resuelve cada lote al instante sin calcular bcrypt y
+    puede fallar a partir de la llamada `fail_at`.
+    """
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.submitted = []
+
+    def submit(self, fn, batch):
+        if self.fail_at is not None and len(self.submitted) >= self.fail_at:
+            raise RuntimeError("executor caído")
+        future = Future()
+        self.submitted.append(future)
+        if self.fail_at is None:
+            future.set_result([f"hash:{password}" for password in batch])
+        return future
+
+
+def test_hash_many_takes_a_single_pending_slot():
+    """
+    Un alta masiva con más lotes que lugares en la cola no falla con 503 y,
+    mientras tanto, solo ocupa un lugar; si un envío falla, se cancelan los
+    lotes ya enviados.
+    """
+    hasher = PasswordHasher(workers=2, max_pending=2)
+    hasher._executor = _RecordingExecutor()
+    passwords = [f"clave{i}" for i in range(2049)]
+    assert hasher.hash_many_blocking(passwords) == [f"hash:{p}" for p in passwords]
+    assert len(hasher._executor.submitted) == 65
+    assert hasher.pending == 0
+
+    hasher._executor = _RecordingExecutor(fail_at=1)
+    with pytest.raises(RuntimeError):
+        hasher.hash_many_blocking(passwords)
+    assert all(future.cancelled() for future in hasher._executor.submitted)
+    assert hasher.pending == 0
+
+    hasher.max_pending = 0
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash_many_blocking(passwords)
@@ -0,0 +1,83 @@
+# tests/test_benchmarks.py
+
+import asyncio
+
+from benchmarks.login import run_login_benchmark
+from benchmarks.run import ROUTES, compare, percentile, run_benchmark
+from benchmarks.startup import parse_importtime, profile_imports
+
+
+def test_percentile():
+    """
+    Prueba el cálculo de percentiles por rango más cercano.
+    """
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_compare_flags_regressions():
+    """
+    Prueba la detección de regresiones respecto a una línea base.
+    """
+    base = {"results": {"get": {"rps": 100.0, "p95_ms": 10.0, "p99_ms": 20.0, "errors": 0}}}
+    same = {"results": {"get": {"rps": 95.0, "p95_ms": 10.5, "p99_ms": 21.0, "errors": 0}}}
+    worse = {"results": {"get": {"rps": 80.0, "p95_ms": 15.0, "p99_ms": 20.0, "errors": 2}}}
+    assert compare(same, base, 0.10) == []
+    assert len(compare(worse, base, 0.10)) == 3
+
+
+def test_run_benchmark_asgi(tmp_path):
+    """
+    Ejecuta una medición mínima de todas las rutas con el transporte ASGI.
+    """
+    report = asyncio.run(
+        run_benchmark(users=20, requests=4, concurrency=2, workdir=str(tmp_path))
+    )
+    assert list(report["results"]) == ROUTES
+    for result in report["results"].values():
+        assert result["requests"] == 4
+        assert result["errors"] == 0
+        assert result["p50_ms"] <= result["p99_ms"]
+
+
+def test_run_login_benchmark(tmp_path):
+    """
+    Ejecuta una medición mínima de login con un hilo y con un proceso.
+    """
+    report = asyncio.run(
+        run_login_benchmark(
+            workers=[0, 1], requests=4, concurrency=2, rounds=4, workdir=str(tmp_path)
+        )
+    )
+    assert list(report["results"]) == ["0", "1"]
+    for result in report["results"].values():
+        assert result["requests"] == 4
+        assert result["errors"] == 0
+
+
+def test_parse_importtime():
+    """
+    Prueba la lectura de la salida de `python -X importtime`.
+    """
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   jose.jwt\n"
+        "import time:      2500 |       2620 | app.main\n"
+    )
+    assert parse_importtime(output) == [("jose.jwt", 0.12, 0.12), ("app.main", 2.5, 2.62)]
+
+
+def test_profile_imports_defers_heavy_dependencies():
+    """
+    El perfil de importación de app.main no incluye passlib ni python-jose, que
+    se cargan al primer uso.
+    """
+    profile = profile_imports()
+    assert profile["total_ms"] > 0
+    assert "app.core.security" in profile["modules"]
+    assert "passlib" not in profile["packages"]
+    assert "jose" not in profile["packages"]
+
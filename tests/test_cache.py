@@ -0,0 +1,161 @@
+# tests/test_cache.py
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.cache import MISSING, InMemoryCache, build_cache
+from app.crud import users as crud_users
+from app.crud.cache import ModelCache
+from app.crud.users import AsyncCRUDUser, CRUDUser
+from app.db.base import Base
+from app.models.users import User
+from app.schemas import UserCreate, UserUpdate
+
+engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statements(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+@pytest.fixture(name="db")
+def db_fixture():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(name="crud")
+def crud_fixture():
+    return CRUDUser(User, cache=InMemoryCache(max_size=100, ttl=60))
+
+
+def test_in_memory_cache_lru_and_ttl():
+    """
+    Prueba el desalojo LRU, la expiración por TTL y los contadores.
+    """
+    cache = InMemoryCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == 1  # "b" pasa a ser el menos usado
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == 3
+
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d") is MISSING
+    assert cache.stats() == {
+        "hits": 2, "misses": 2, "evictions": 2, "expirations": 1, "size": 1
+    }
+
+    with pytest.raises(ValueError):
+        build_cache("desconocido")
+
+
+def test_get_is_read_through(db, crud):
+    """
+    La segunda lectura por id, username o email no consulta la base de datos.
+    """
+    user = crud.create(db, obj_in=UserCreate(username="cached", email="cached@example.com"))
+    db.expunge_all()
+    assert crud.get(db, user.id).username == "cached"
+    statements.clear()
+    assert crud.get(db, user.id).email == "cached@example.com"
+    assert crud.get_user_by_username(db, "cached").id == user.id
+    assert crud.get_user_by_email(db, "cached@example.com").id == user.id
+    assert crud.get_user_by_username(db, "cached").id == user.id
+    # Solo la primera búsqueda por username y por email llega a la base de datos
+    assert len(statements) == 2
+
+
+def test_negative_lookup_is_invalidated_by_create(db, crud):
+    """
+    Una búsqueda sin resultado queda en caché hasta que se crea el usuario.
+    """
+    assert crud.get_user_by_username(db, "later") is None
+    statements.clear()
+    assert crud.get_user_by_username(db, "later") is None
+    assert statements == []
+
+    crud.create(db, obj_in=UserCreate(username="later", email="later@example.com"))
+    assert crud.get_user_by_username(db, "later").email == "later@example.com"
+
+
+def test_update_and_remove_invalidate(db, crud):
+    """
+    Actualizar o eliminar invalida las entradas de id, username y email.
+    """
+    user = crud.create(db, obj_in=UserCreate(username="before", email="before@example.com"))
+    assert crud.get_user_by_username(db, "after") is None
+    assert crud.get_user_by_username(db, "before").id == user.id
+
+    crud.update(db, db_obj=crud.get(db, user.id), obj_in=UserUpdate(username="after"))
+    assert crud.get_user_by_username(db, "before") is None
+    assert crud.get_user_by_username(db, "after").id == user.id
+    assert crud.get(db, user.id).username == "after"
+
+    crud.remove(db, id=user.id)
+    assert crud.get(db, user.id) is None
+    assert crud.get_user_by_email(db, "before@example.com") is None
+
+
+def test_stale_fill_after_invalidation_is_dropped(db, crud):
+    """
+    Una lectura que empezó antes de una escritura no guarda en caché la fila
+    anterior si la invalidación llegó antes que ella.
+    """
+    user = crud.create(db, obj_in=UserCreate(username="racer", email="racer@example.com"))
+    stale = User(**crud.cache.snapshot(user))
+
+    # Lectura lenta: toma el token, otra petición actualiza la fila y luego llena la caché
+    token = crud.cache.fill_token()
+    crud.update(db, db_obj=crud.get(db, user.id), obj_in=UserUpdate(username="racer2"))
+    crud.cache.set_row(user.id, stale, token)
+    crud.cache.set_pointer("username", "racer", stale, token)
+    assert crud.cache.get_row(user.id) is MISSING
+    assert crud.cache.get_pointer("username", "racer") is MISSING
+    assert crud.get(db, user.id).username == "racer2"
+
+    # Sin invalidaciones entre medio, la lectura sí llena la caché
+    crud.cache.set_row(user.id, stale, crud.cache.fill_token())
+    assert crud.cache.get_row(user.id)["username"] == "racer"
+
+
+def test_sync_write_during_async_fill_is_dropped(db):
+    """
+    Las variantes síncrona y asíncrona comparten el ModelCache: una escritura
+    síncrona que llega durante una lectura asíncrona impide que esta guarde la
+    fila anterior.
+    """
+    assert crud_users.crud_user.cache is crud_users.async_crud_user.cache
+    shared = ModelCache(User, InMemoryCache(max_size=100, ttl=60))
+    crud = CRUDUser(User, cache=shared)
+    async_crud = AsyncCRUDUser(User, cache=shared)
+    user = crud.create(db, obj_in=UserCreate(username="racer", email="racer@example.com"))
+    stale = User(**shared.snapshot(user))
+
+    class SlowAsyncSession:
+        async def scalar(self, statement):
+            # La consulta asíncrona ya leyó la fila cuando se confirma la escritura
+            crud.update(db, db_obj=crud.get(db, user.id), obj_in=UserUpdate(username="racer2"))
+            return stale
+
+    assert asyncio.run(async_crud.get(SlowAsyncSession(), user.id)) is stale
+    assert shared.get_row(user.id) is MISSING
+    assert crud.get(db, user.id).username == "racer2"
@@ -0,0 +1,137 @@
+# tests/test_idempotency.py
+
+import hashlib
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.idempotency import (
+    DatabaseIdempotencyStore,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyMismatch,
+    IdempotencyRecord,
+    InMemoryIdempotencyStore,
+    build_idempotency_store,
+    fingerprint,
+    run_idempotent,
+)
+from app.db.base import Base
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield build_idempotency_store("memory", max_size=10)
+        return
+    engine = create_engine(f"sqlite:///{tmp_path / 'idempotency.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield build_idempotency_store(
+        "database", session_factory=sessionmaker(bind=engine), poll_interval=0.01
+    )
+    engine.dispose()
+
+
+def test_reserve_complete_and_expire(store):
+    """
+    La primera reserva gana; las siguientes ven la petición en curso y luego su
+    respuesta, hasta que expira el TTL.
+    """
+    assert store.reserve("k", "fp", now=100.0, lock_ttl=10) is None
+    pending = store.reserve("k", "fp", now=101.0, lock_ttl=10)
+    assert pending.fingerprint == "fp" and not pending.completed
+
+    store.complete("k", IdempotencyRecord("fp", 201, b'{"id":1}'), now=102.0, ttl=60)
+    stored = store.reserve("k", "fp", now=103.0, lock_ttl=10)
+    assert (stored.status_code, stored.body) == (201, b'{"id":1}')
+
+    # Expirada la respuesta, la clave vuelve a estar libre
+    assert store.reserve("k", "fp", now=200.0, lock_ttl=10) is None
+
+
+def test_release_and_abandoned_reservation(store):
+    """
+    Una reserva liberada o cuya petición nunca terminó deja la clave libre.
+    """
+    assert store.reserve("k", "fp", now=100.0, lock_ttl=10) is None
+    store.release("k")
+    assert store.reserve("k", "fp", now=100.0, lock_ttl=10) is None
+    assert store.reserve("k", "fp", now=105.0, lock_ttl=10) is not None
+    assert store.reserve("k", "fp", now=111.0, lock_ttl=10) is None
+
+
+def test_run_idempotent(store):
+    """
+    La función se ejecuta una vez por clave; un cuerpo distinto o una petición
+    que sigue en curso se rechazan, y un error libera la clave.
+    """
+    calls = []
+
+    def create():
+        calls.append(1)
+        return 201, b"{}"
+
+    options = {"ttl": 60, "lock_ttl": 10, "wait_timeout": 0.05}
+    assert run_idempotent(store, "a", "fp", create, **options) == (201, b"{}", False)
+    assert run_idempotent(store, "a", "fp", create, **options) == (201, b"{}", True)
+    assert len(calls) == 1
+    with pytest.raises(IdempotencyKeyMismatch):
+        run_idempotent(store, "a", "otro", create, **options)
+
+    def fail():
+        raise RuntimeError("fallo")
+
+    with pytest.raises(RuntimeError):
+        run_idempotent(store, "b", "fp", fail, **options)
+    assert run_idempotent(store, "b", "fp", create, **options)[2] is False
+
+    store.reserve("c", "fp", now=time.time(), lock_ttl=10)
+    with pytest.raises(IdempotencyKeyInProgress):
+        run_idempotent(store, "c", "fp", create, **options)
+
+
+def test_memory_store_bounded_and_fingerprint():
+    """
+    El almacén en memoria descarta las claves más antiguas al superar su tamaño
+    y la huella no depende del orden de las claves del cuerpo.
+    """
+    store = InMemoryIdempotencyStore(max_size=2)
+    for key in "abc":
+        store.reserve(key, "fp", now=0.0, lock_ttl=10)
+    assert len(store) == 2
+    assert fingerprint({"b": 1, "a": 2}) == fingerprint({"a": 2, "b": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_fingerprint_is_keyed(monkeypatch):
+    """
+    La huella que se guarda es un HMAC con SECRET_KEY: no coincide con el
+    SHA-256 del cuerpo (que permitiría probar contraseñas) y cambia con la clave.
+    """
+    payload = {"username": "u", "password": "secreta"}
+    plain = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+    keyed = fingerprint(payload)
+    assert keyed != plain
+    assert fingerprint(dict(payload)) == keyed
+    monkeypatch.setattr(settings, "SECRET_KEY", "otra-clave")
+    assert fingerprint(payload) != keyed
+
+
+def test_database_store_shared_between_instances(tmp_path):
+    """
+    Dos almacenes sobre la misma base (como dos instancias) comparten las claves.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'shared.db'}")
+    Base.metadata.create_all(bind=engine)
+    first = DatabaseIdempotencyStore(sessionmaker(bind=engine))
+    second = DatabaseIdempotencyStore(sessionmaker(bind=engine))
+    assert first.reserve("k", "fp", now=100.0, lock_ttl=10) is None
+    assert not second.reserve("k", "fp", now=100.0, lock_ttl=10).completed
+    first.complete("k", IdempotencyRecord("fp", 409, b"{}"), now=101.0, ttl=60)
+    assert second.reserve("k", "fp", now=102.0, lock_ttl=10).status_code == 409
+    engine.dispose()
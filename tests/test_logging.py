@@ -0,0 +1,89 @@
+# tests/test_logging.py
+
+import io
+import json
+import logging
+import queue
+
+from app.core.log import JsonFormatter, LazyQueueHandler, SamplingFilter, setup_logging, shutdown_logging
+
+
+def _record(name="app.test", level=logging.INFO, msg="hola %s", args=("mundo",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    """
+    Cada registro es una línea JSON con el mensaje ya interpolado y los campos extra.
+    """
+    line = JsonFormatter().format(_record(user_id=7))
+    payload = json.loads(line)
+    assert payload["message"] == "hola mundo"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "app.test"
+    assert payload["user_id"] == 7
+
+
+def test_sampling_filter_uses_closest_logger_and_keeps_warnings():
+    """
+    La tasa del ancestro más cercano decide; los avisos siempre pasan.
+    """
+    sampling = SamplingFilter({"app": 1.0, "app.endpoints": 0.0})
+    assert sampling.filter(_record(name="app.crud"))
+    assert not sampling.filter(_record(name="app.endpoints.v1.users"))
+    assert sampling.filter(_record(name="app.endpoints.v1.users", level=logging.WARNING))
+    assert sampling.filter(_record(name="uvicorn"))
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    """
+    El mensaje no se formatea al encolar y una cola llena no bloquea ni falla.
+    """
+    handler = LazyQueueHandler(queue.Queue(1))
+    record = _record()
+    handler.handle(record)
+    handler.handle(_record())
+    queued = handler.queue.get_nowait()
+    assert queued is record
+    assert queued.msg == "hola %s" and queued.args == ("mundo",)
+    assert handler.queue.empty()
+
+
+def test_queue_handler_formats_mutable_args_eagerly():
+    """
+    Con argumentos que no son inmutables el mensaje se formatea al encolar,
+    con el valor que tenían en ese momento.
+    """
+    handler = LazyQueueHandler(queue.Queue(2))
+    payload = {"estado": "antes"}
+    handler.handle(_record(args=(payload,)))
+    payload["estado"] = "después"
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "hola {'estado': 'antes'}" and queued.args is None
+
+    handler.handle(_record(args=(7, None), msg="%s %s"))
+    assert handler.queue.get_nowait().args == (7, None)
+
+
+def test_setup_logging_writes_from_listener():
+    """
+    Los registros llegan al stream configurado a través del QueueListener.
+    """
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_handlers, previous_level = list(root.handlers), root.level
+    try:
+        setup_logging(level="INFO", fmt="json", sampling={}, stream=stream)
+        logging.getLogger("app.test").info("usuario %s creado", 42)
+        shutdown_logging()
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in previous_handlers:
+            root.addHandler(handler)
+        root.setLevel(previous_level)
+
+    payload = json.loads(stream.getvalue().strip().splitlines()[-1])
+    assert payload["message"] == "usuario 42 creado"
@@ -0,0 +1,110 @@
+# tests/test_metrics.py
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+import logging
+
+from app.core.metrics import Counter, Histogram, Registry
+from app.core.request_context import current_scope
+from app.db.instrumentation import db_query_duration, instrument_engine
+from app.main import app
+
+
+def test_registry_renders_prometheus_text():
+    """
+    Prueba el formato de texto de contadores e histogramas.
+    """
+    registry = Registry()
+    counter = registry.register(Counter("demo_requests", "Peticiones.", ["route"]))
+    histogram = registry.register(
+        Histogram("demo_latency_seconds", "Latencia.", ["route"], buckets=(0.1, 1.0))
+    )
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    output = registry.render()
+    assert "# TYPE demo_requests counter" in output
+    assert 'demo_requests_total{route="/a\\"b"} 3' in output
+    assert 'demo_latency_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'demo_latency_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'demo_latency_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'demo_latency_seconds_count{route="/a"} 3' in output
+    assert 'demo_latency_seconds_sum{route="/a"} 5.55' in output
+
+
+def test_metrics_endpoint_reports_route_templates():
+    """
+    Las peticiones se agrupan por plantilla de ruta y se exponen en /metrics.
+    """
+    client = TestClient(app)
+    client.get("/")
+    client.get("/no-existe")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+    assert 'route="unmatched",status="404"' in response.text
+    assert 'db_pool_checked_out{engine="primary"}' in response.text
+    assert 'cache_hits_total{cache="users"}' in response.text
+    assert 'cache_hits_total{cache="jwt"}' in response.text
+
+
+def _select_count() -> int:
+    data = db_query_duration._values.get(("SELECT",))
+    return sum(data[:-1]) if data else 0
+
+
+def test_instrument_engine_records_queries():
+    """
+    Las sentencias ejecutadas en un motor instrumentado se registran por operación.
+    """
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, name="test")
+    before = _select_count()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    after = _select_count()
+    assert after - before == 1
+
+
+def test_slow_query_log_redacts_parameters_and_captures_plan(caplog):
+    """
+    Las consultas lentas se registran con su ruta, los tipos de sus parámetros
+    (nunca sus valores) y el plan de ejecución.
+    """
+    engine = create_engine("sqlite://")
+    instrument_engine(
+        engine, name="slow", record_metrics=False, log_mode="slow", slow_query_ms=0, explain_slow=True
+    )
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, secret TEXT)"))
+        token = current_scope.set({"type": "http", "path": "/api/v1/users/"})
+        try:
+            with caplog.at_level(logging.WARNING, logger="app.db.sql"):
+                conn.execute(text("SELECT * FROM t WHERE secret = :secret"), {"secret": "s3cr3t"})
+        finally:
+            current_scope.reset(token)
+
+    record = caplog.records[-1]
+    message = record.getMessage()
+    assert "Consulta lenta" in message
+    assert "/api/v1/users/" in message
+    assert "s3cr3t" not in message
+    assert "[str]" in message
+    assert "Plan:" in message and "SCAN" in message
+
+
+def test_sql_log_off_and_fast_queries_are_silent(caplog):
+    """
+    Sin modo de registro, o por debajo del umbral, no se escribe nada.
+    """
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, name="quiet", record_metrics=False, log_mode="slow", slow_query_ms=60_000)
+    with caplog.at_level(logging.DEBUG, logger="app.db.sql"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert not caplog.records
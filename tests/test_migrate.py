@@ -0,0 +1,83 @@
+# tests/test_migrate.py
+
+import sqlite3
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+from app.db import migrate
+from app.db.base import Base, include_object
+
+
+def test_scan_heads_matches_alembic(tmp_path):
+    """
+    El head obtenido de alembic/versions coincide con el de Alembic, y el
+    archivo generado en la imagen tiene prioridad.
+    """
+    heads = set(ScriptDirectory(migrate.SCRIPT_LOCATION).get_heads())
+    assert migrate.scan_heads() == heads
+
+    head_file = str(tmp_path / "HEAD")
+    assert migrate.write_head(head_file) == heads
+    assert migrate.expected_heads(head_file) == heads
+    assert migrate.expected_heads(str(tmp_path / "missing")) == heads
+
+
+def test_sqlite_path():
+    """
+    Prueba la ruta del archivo de las URLs de SQLite.
+    """
+    assert migrate.sqlite_path("sqlite:///./sql_app.db") == "./sql_app.db"
+    assert migrate.sqlite_path("sqlite:////tmp/app.db") == "/tmp/app.db"
+    assert migrate.sqlite_path("sqlite://") == ""
+    assert migrate.dialect_name("postgresql+psycopg2://u@h/db") == "postgresql"
+
+
+def test_migrate_skips_alembic_when_at_head(tmp_path, monkeypatch):
+    """
+    Alembic solo se ejecuta si alembic_version no coincide con el head.
+    """
+    path = tmp_path / "app.db"
+    url = f"sqlite:///{path}"
+    upgrades = []
+
+    def fake_upgrade():
+        upgrades.append(1)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)")
+        conn.execute("INSERT INTO alembic_version VALUES ('abc123')")
+        conn.commit()
+        conn.close()
+
+    monkeypatch.setattr(migrate, "run_upgrade", fake_upgrade)
+    assert migrate.migrate(url, heads={"abc123"}, check=True) is False
+    assert upgrades == []
+
+    assert migrate.migrate(url, heads={"abc123"}) is False
+    assert upgrades == [1]
+    assert migrate.migrate(url, heads={"abc123"}) is True
+    assert migrate.migrate(url, heads={"abc123"}, check=True) is True
+    assert upgrades == [1]
+
+
+def test_autogenerate_ignores_fts_tables(tmp_path):
+    """
+    La autogeneración no propone eliminar la tabla FTS5 de SQLite ni sus
+    tablas internas, que no están en los metadatos.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names())
+        assert {"users_fts", "users_fts_data", "users_fts_config"} <= tables
+
+        def removed(opts):
+            context = MigrationContext.configure(connection, opts=opts)
+            diffs = compare_metadata(context, Base.metadata)
+            return {diff[1].name for diff in diffs if diff[0] == "remove_table"}
+
+        assert "users_fts" in removed({})
+        assert removed({"include_object": include_object}) == set()
+    engine.dispose()
@@ -0,0 +1,106 @@
+# tests/test_singleflight.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import AsyncSingleFlight, SingleFlight, singleflight_coalesced
+
+
+def _coalesced(group: str) -> float:
+    return sum(value for _, labels, value in singleflight_coalesced.samples() if labels["group"] == group)
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_single_flight_shares_result_between_threads():
+    """
+    Las llamadas concurrentes con la misma clave ejecutan la función una vez;
+    las de otra clave no se agrupan.
+    """
+    flight = SingleFlight("test-threads")
+    calls = []
+
+    def load():
+        calls.append(1)
+        # Espera a que las demás llamadas estén agrupadas
+        _wait_for(lambda: flight.coalesced == 4)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", load))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5 and all(result is results[0] for result in results)
+    assert flight.coalesced == 4
+    assert _coalesced("test-threads") == 4
+    # Terminada la ejecución no queda nada guardado
+    assert flight.do("k", lambda: "nuevo") == "nuevo"
+    assert flight.do("otra", lambda: "otra") == "otra"
+
+
+def test_single_flight_propagates_errors():
+    """
+    Si la ejecución compartida falla, todas las llamadas agrupadas reciben el error.
+    """
+    flight = SingleFlight("test-errors")
+
+    def fail():
+        _wait_for(lambda: flight.coalesced == 1)
+        raise ValueError("fallo")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 2
+
+
+def test_async_single_flight():
+    """
+    En el event loop las corrutinas con la misma clave comparten una ejecución;
+    si la primera se cancela, la siguiente en espera repite la ejecución.
+    """
+    flight = AsyncSingleFlight("test-async")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("k", load) for _ in range(5)))
+        assert results == [1] * 5
+        assert flight.coalesced == 4
+
+        leader = asyncio.ensure_future(flight.do("c", load))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("c", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 3
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
@@ -1,12 +1,31 @@
 # tests/test_users.py
 
+import asyncio
+import csv
+import io
+import json
+import threading
+import time
+
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
-from app.core.deps import get_db
+from app.auth.auth_handler import signJWT
+from app.auth.revocation import RevocationIndex, revocation_index
+from app.core.config import settings
+from app.crud import crud_user
+from app.core.deps import PRIMARY_UNTIL_COOKIE, get_db
+from app.core.idempotency import InMemoryIdempotencyStore
+from app.core import serialization
+from app.core.security import password_hasher
+from app.core.streaming import LineTooLongError, parse_csv
+from app.db import session as db_session_module
 from app.db.base import Base
+from app.endpoints.v1 import users as users_endpoints
 from app.main import app
 from app.models.users import User
 
@@ -29,6 +48,7 @@ def db_session_fixture():
     Crea las tablas antes de cada prueba y las elimina después.
     """
     Base.metadata.create_all(bind=engine)  # Crea las tablas
+    crud_user.cache.clear()  # Evita entradas de pruebas anteriores
     db = TestingSessionLocal()
     try:
         yield db
@@ -138,6 +158,141 @@ def test_create_user_invalid_role(client):
     assert "string_pattern_mismatch" in response.json()["detail"][0]["type"]
 
 
+def test_create_users_bulk(client):
+    """
+    Prueba el alta masiva con conflictos contra la base de datos y dentro del lote.
+    """
+    client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "taken", "email": "taken@example.com"},
+    )
+    response = client.post(
+        f"{API_VERSION_URL}/users/bulk",
+        json=[
+            {"username": "bulk1", "email": "bulk1@example.com"},
+            {"username": "taken", "email": "other@example.com"},
+            {"username": "bulk2", "email": "taken@example.com"},
+            {"username": "bulk1", "email": "bulk1b@example.com"},
+            {"username": "bulk3", "email": "bulk3@example.com", "role": "admin"},
+        ],
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 3
+    assert [r["status"] for r in data["results"]] == [
+        "created", "conflict", "conflict", "conflict", "created"
+    ]
+    assert data["results"][1]["detail"] == "El nombre de usuario ya existe."
+    assert data["results"][2]["detail"] == "La dirección de correo electrónico ya existe."
+    assert data["results"][4]["user"]["role"] == "admin"
+    assert data["results"][4]["user"]["id"] is not None
+
+    users = client.get(f"{API_VERSION_URL}/users/").json()
+    assert [u["username"] for u in users] == ["taken", "bulk1", "bulk3"]
+
+
+def test_create_users_bulk_chunked(client, monkeypatch):
+    """
+    Prueba que el alta masiva inserte correctamente en varios lotes.
+    """
+    monkeypatch.setattr(settings, "USERS_BULK_CHUNK_SIZE", 3)
+    payload = [{"username": f"chunk{i}", "email": f"chunk{i}@example.com"} for i in range(8)]
+    response = client.post(f"{API_VERSION_URL}/users/bulk", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 8
+    assert [r["user"]["username"] for r in data["results"]] == [p["username"] for p in payload]
+
+
+def test_import_users_ndjson(client, monkeypatch):
+    """
+    Prueba la importación NDJSON con filas inválidas, duplicadas y varios bloques.
+    """
+    monkeypatch.setattr(settings, "USERS_IMPORT_CHUNK_SIZE", 2)
+    body = "\n".join(
+        [
+            json.dumps({"username": "imp1", "email": "imp1@example.com"}),
+            "no es json",
+            json.dumps({"username": "imp2", "email": "imp2@example.com", "role": "admin"}),
+            json.dumps({"username": "x", "email": "imp3@example.com"}),
+            "",
+            json.dumps({"username": "imp1", "email": "imp4@example.com"}),
+            json.dumps({"username": "imp5", "email": "imp5@example.com"}),
+        ]
+    )
+    response = client.post(f"{API_VERSION_URL}/users/import", content=body)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {
+        "type": "summary", "total": 6, "created": 3, "failed": 3, "aborted": False
+    }
+    errors = {line["row"]: line["detail"] for line in lines[1:]}
+    assert errors[2] == "JSON inválido."
+    assert errors[4][0]["loc"] == ["username"]
+    assert errors[5] == "El nombre de usuario ya existe."
+
+    users = client.get(f"{API_VERSION_URL}/users/").json()
+    assert [u["username"] for u in users] == ["imp1", "imp2", "imp5"]
+
+
+def test_import_users_csv(client):
+    """
+    Prueba la importación CSV con encabezado y campos opcionales vacíos.
+    """
+    body = (
+        "username,email,first_name,active\n"
+        'csv1,csv1@example.com,"Nombre, con coma",false\n'
+        "csv2,csv2@example.com,,\n"
+    )
+    response = client.post(
+        f"{API_VERSION_URL}/users/import", params={"format": "csv"}, content=body
+    )
+    summary = json.loads(response.text.splitlines()[0])
+    assert summary["created"] == 2
+    users = client.get(f"{API_VERSION_URL}/users/").json()
+    assert users[0]["first_name"] == "Nombre, con coma"
+    assert users[0]["active"] is False
+    assert users[1]["first_name"] is None
+    assert users[1]["active"] is True
+
+
+def test_import_csv_unterminated_quote(client):
+    """
+    Una comilla sin cerrar no acumula el resto del archivo: al final se rechaza
+    el registro y, si supera el tamaño máximo, se deja de leer.
+    """
+    body = (
+        "username,email,first_name\n"
+        "bien,bien@example.com,\n"
+        'mal,mal@example.com,"sin cerrar\n'
+        "otra,otra@example.com,\n"
+    )
+    response = client.post(
+        f"{API_VERSION_URL}/users/import", params={"format": "csv"}, content=body
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["created"] == 1
+    assert lines[1:] == [
+        {"type": "error", "row": 2, "detail": "Campo entre comillas sin cerrar."}
+    ]
+
+    async def parse(lines):
+        async def source():
+            for line in lines:
+                yield line
+
+        return [record async for record in parse_csv(source(), max_record_length=100)]
+
+    header = ["username,email,first_name", "a,a@example.com,x"]
+    with pytest.raises(LineTooLongError):
+        asyncio.run(parse(header + ['b,b@example.com,"abierta'] + ["x" * 20] * 10))
+    assert asyncio.run(parse(header + ['b,b@example.com,"dos', 'líneas"'])) == [
+        (1, {"username": "a", "email": "a@example.com", "first_name": "x"}),
+        (2, {"username": "b", "email": "b@example.com", "first_name": "dos\nlíneas"}),
+    ]
+
+
 def test_get_users(client):
     """
     Prueba la recuperación de todos los usuarios.
@@ -158,6 +313,107 @@ def test_get_users(client):
     assert data[1]["username"] == "user2"
 
 
+def test_get_users_cursor_pagination(client):
+    """
+    Prueba la paginación por cursor usando el encabezado X-Next-Cursor.
+    """
+    for i in range(5):
+        client.post(
+            f"{API_VERSION_URL}/users/",
+            json={"username": f"page{i}", "email": f"page{i}@example.com"},
+        )
+    response = client.get(f"{API_VERSION_URL}/users/", params={"limit": 2})
+    assert response.status_code == 200
+    assert [u["username"] for u in response.json()] == ["page0", "page1"]
+
+    seen = [u["username"] for u in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+    while cursor:
+        response = client.get(
+            f"{API_VERSION_URL}/users/", params={"limit": 2, "cursor": cursor}
+        )
+        assert response.status_code == 200
+        seen.extend(u["username"] for u in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+    assert seen == [f"page{i}" for i in range(5)]
+
+
+def test_get_users_cursor_by_created_at(client):
+    """
+    Prueba la paginación por cursor ordenada por (created_at, id).
+    """
+    for i in range(3):
+        client.post(
+            f"{API_VERSION_URL}/users/",
+            json={"username": f"created{i}", "email": f"created{i}@example.com"},
+        )
+    first = client.get(
+        f"{API_VERSION_URL}/users/", params={"limit": 2, "order_by": "created_at"}
+    )
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(
+        f"{API_VERSION_URL}/users/",
+        params={"limit": 2, "order_by": "created_at", "cursor": cursor},
+    )
+    assert second.status_code == 200
+    assert [u["username"] for u in second.json()] == ["created2"]
+    assert "X-Next-Cursor" not in second.headers
+
+    mismatch = client.get(f"{API_VERSION_URL}/users/", params={"cursor": cursor})
+    assert mismatch.status_code == 400
+
+
+def test_get_users_invalid_cursor_and_limit(client):
+    """
+    Prueba que un cursor inválido o un límite excesivo sean rechazados.
+    """
+    response = client.get(f"{API_VERSION_URL}/users/", params={"cursor": "no-valido"})
+    assert response.status_code == 400
+
+    response = client.get(f"{API_VERSION_URL}/users/", params={"limit": 10**6})
+    assert response.status_code == 422
+
+
+def test_export_users(client):
+    """
+    Prueba la exportación en NDJSON y CSV, con filtros.
+    """
+    client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "export1", "email": "export1@example.com", "role": "admin"},
+    )
+    client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "export2", "email": "export2@example.com", "active": False},
+    )
+
+    response = client.get(f"{API_VERSION_URL}/users/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == client.get(f"{API_VERSION_URL}/users/").json()
+
+    response = client.get(f"{API_VERSION_URL}/users/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["username"] for r in rows] == ["export1", "export2"]
+    assert list(rows[0]) == list(lines[0])
+
+    response = client.get(
+        f"{API_VERSION_URL}/users/export", params={"role": "admin"}
+    )
+    assert [json.loads(line)["username"] for line in response.text.splitlines()] == ["export1"]
+    response = client.get(
+        f"{API_VERSION_URL}/users/export",
+        params={"active": "false", "updated_since": "2000-01-01T00:00:00"},
+    )
+    assert [json.loads(line)["username"] for line in response.text.splitlines()] == ["export2"]
+    response = client.get(
+        f"{API_VERSION_URL}/users/export", params={"updated_since": "2999-01-01T00:00:00"}
+    )
+    assert response.text == ""
+
+
 def test_get_user_by_id(client):
     """
     Prueba la recuperación de un usuario por su ID.
@@ -298,3 +554,598 @@ def test_delete_non_existent_user(client):
     response = client.delete(f"{API_VERSION_URL}/users/999")
     assert response.status_code == 404
     assert "Usuario no encontrado" in response.json()["detail"]
+
+
+def test_delete_secure_user(client):
+    """
+    Prueba la eliminación protegida con JWT.
+    """
+    create_response = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "secure_me", "email": "secure@example.com"}
+    )
+    user_id = create_response.json()["id"]
+
+    response = client.delete(f"{API_VERSION_URL}/users/secure/{user_id}")
+    assert response.status_code == 403
+
+    response = client.delete(
+        f"{API_VERSION_URL}/users/secure/{user_id}",
+        headers={"Authorization": "Bearer token-invalido"},
+    )
+    assert response.status_code == 403
+
+    token = signJWT(str(user_id))["access_token"]
+    response = client.delete(
+        f"{API_VERSION_URL}/users/secure/{user_id}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 204
+
+
+def test_reads_use_replica_except_after_own_writes(client, monkeypatch):
+    """
+    Las lecturas van a la réplica, salvo durante la ventana posterior a una
+    escritura del mismo cliente; lo leído de la réplica no se guarda en caché.
+    """
+    replica = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=replica)  # Réplica vacía: aún sin replicar
+    monkeypatch.setattr(
+        db_session_module, "ReplicaSession", sessionmaker(bind=replica, info={"replica": True})
+    )
+
+    response = client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "replicauser", "email": "replica@example.com", "first_name": "R", "last_name": "U"},
+    )
+    assert response.status_code == 201
+    assert PRIMARY_UNTIL_COOKIE in response.cookies
+    user_id = response.json()["id"]
+
+    # Otro cliente (sin cookie) lee de la réplica
+    primary_until = client.cookies.get(PRIMARY_UNTIL_COOKIE)
+    client.cookies.clear()
+    assert client.get(f"{API_VERSION_URL}/users/{user_id}").status_code == 404
+    assert client.get(f"{API_VERSION_URL}/users/").json() == []
+
+    # El cliente que escribió lee del primario
+    client.cookies.set(PRIMARY_UNTIL_COOKIE, primary_until)
+    assert client.get(f"{API_VERSION_URL}/users/{user_id}").status_code == 200
+
+
+def test_read_user_conditional_get(client):
+    """
+    Un usuario sin cambios responde 304 a If-None-Match / If-Modified-Since.
+    """
+    user_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "etaguser", "email": "etag@example.com"}
+    ).json()["id"]
+    response = client.get(f"{API_VERSION_URL}/users/{user_id}")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+
+    cached = client.get(f"{API_VERSION_URL}/users/{user_id}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    since = client.get(
+        f"{API_VERSION_URL}/users/{user_id}", headers={"If-Modified-Since": last_modified}
+    )
+    assert since.status_code == 304
+
+    client.put(f"{API_VERSION_URL}/users/{user_id}", json={"role": "admin"})
+    changed = client.get(f"{API_VERSION_URL}/users/{user_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_read_users_conditional_get(client):
+    """
+    El ETag de una página cambia cuando cambia su ventana de filas.
+    """
+    for i in range(3):
+        client.post(
+            f"{API_VERSION_URL}/users/", json={"username": f"page{i}", "email": f"page{i}@example.com"}
+        )
+    response = client.get(f"{API_VERSION_URL}/users/?limit=2")
+    etag = response.headers["ETag"]
+    assert client.get(
+        f"{API_VERSION_URL}/users/?limit=2", headers={"If-None-Match": etag}
+    ).status_code == 304
+    # Otra ventana tiene otro validador
+    assert client.get(
+        f"{API_VERSION_URL}/users/?limit=2&skip=1", headers={"If-None-Match": etag}
+    ).status_code == 200
+
+    second_page = client.get(
+        f"{API_VERSION_URL}/users/?limit=2&cursor={response.headers['X-Next-Cursor']}"
+    )
+    page_etag = second_page.headers["ETag"]
+    client.post(f"{API_VERSION_URL}/users/", json={"username": "page3", "email": "page3@example.com"})
+    assert client.get(
+        f"{API_VERSION_URL}/users/?limit=2&cursor={response.headers['X-Next-Cursor']}",
+        headers={"If-None-Match": page_etag},
+    ).status_code == 200
+
+
+def test_read_users_summary_only_for_conditional_requests(client, monkeypatch):
+    """
+    Sin If-None-Match ni If-Modified-Since no se consulta el agregado de la
+    página: el ETag se calcula de las filas leídas y coincide con el del agregado.
+    """
+    for i in range(3):
+        client.post(
+            f"{API_VERSION_URL}/users/", json={"username": f"sum{i}", "email": f"sum{i}@example.com"}
+        )
+    summaries = []
+    original_summary = crud_user.get_page_summary
+
+    def counting_summary(db, **kwargs):
+        summaries.append(kwargs)
+        return original_summary(db, **kwargs)
+
+    monkeypatch.setattr(crud_user, "get_page_summary", counting_summary)
+    for params in ({"limit": 2}, {"limit": 2, "fields": "username"}, {"limit": 10}):
+        response = client.get(f"{API_VERSION_URL}/users/", params=params)
+        assert response.status_code == 200
+        assert summaries == []
+        cached = client.get(
+            f"{API_VERSION_URL}/users/", params=params, headers={"If-None-Match": response.headers["ETag"]}
+        )
+        assert cached.status_code == 304
+        assert len(summaries) == 1
+        summaries.clear()
+
+
+@pytest.mark.parametrize("with_orjson", [True, False])
+@pytest.mark.parametrize("trusted", [True, False])
+def test_fast_serialization_matches_response_model(client, monkeypatch, trusted, with_orjson):
+    """
+    La serialización directa produce el mismo JSON y encabezados que
+    `response_model`, sin alterar el esquema OpenAPI, con orjson o con el
+    serializador de pydantic-core si orjson no está instalado.
+    """
+    if not with_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    for i in range(3):
+        client.post(
+            f"{API_VERSION_URL}/users/", json={"username": f"fast{i}", "email": f"fast{i}@example.com"}
+        )
+    openapi = client.get("/openapi.json").json()
+    expected_list = client.get(f"{API_VERSION_URL}/users/?limit=2")
+    expected_user = client.get(f"{API_VERSION_URL}/users/1")
+
+    app.openapi_schema = None
+    monkeypatch.setattr(settings, "USERS_FAST_SERIALIZATION", True)
+    monkeypatch.setattr(settings, "USERS_SERIALIZATION_TRUSTED", trusted)
+    fast_list = client.get(f"{API_VERSION_URL}/users/?limit=2")
+    fast_user = client.get(f"{API_VERSION_URL}/users/1")
+
+    assert fast_list.json() == expected_list.json()
+    assert fast_list.headers["X-Next-Cursor"] == expected_list.headers["X-Next-Cursor"]
+    assert fast_list.headers["ETag"] == expected_list.headers["ETag"]
+    assert fast_list.headers["content-type"] == "application/json"
+    assert fast_user.json() == expected_user.json()
+    assert client.get("/openapi.json").json() == openapi
+
+
+def test_search_users(client):
+    """
+    Prueba la búsqueda por rol, estado, prefijo y texto completo, con cursor.
+    """
+    people = [
+        ("jdoe", "John", "Doe", "admin", True),
+        ("jsmith", "Jane", "Smith", "user", True),
+        ("mjohnson", "Mary", "Johnson", "user", False),
+        ("pperez", "Pedro", "Pérez", "guest", True),
+        ("nunez", "Ñandú", "Núñez", "guest", True),
+    ]
+    for username, first_name, last_name, role, active in people:
+        client.post(
+            f"{API_VERSION_URL}/users/",
+            json={
+                "username": username,
+                "email": f"{username}@example.com",
+                "first_name": first_name,
+                "last_name": last_name,
+                "role": role,
+                "active": active,
+            },
+        )
+
+    def usernames(**params):
+        response = client.get(f"{API_VERSION_URL}/users/search", params=params)
+        assert response.status_code == 200
+        return [user["username"] for user in response.json()]
+
+    assert usernames(role="user") == ["jsmith", "mjohnson"]
+    assert usernames(role="user", active="true") == ["jsmith"]
+    assert usernames(prefix="J") == ["jdoe", "jsmith", "mjohnson"]
+    assert usernames(prefix="smi") == ["jsmith"]
+    assert usernames(prefix="%") == []
+    # El prefijo pasa por el mismo lower() que el índice: en SQLite solo se
+    # ignoran las mayúsculas ASCII y las letras no ASCII deben coincidir tal cual
+    assert usernames(prefix="Ñan") == ["nunez"]
+    assert usernames(prefix="Nú") == ["nunez"]
+    assert usernames(prefix="ñan") == []
+    assert usernames(q="john") == ["jdoe", "mjohnson"]
+    assert usernames(q="pedro pérez") == ["pperez"]
+    assert usernames(q='"') == []
+
+    # Las actualizaciones se reflejan en el índice de texto completo
+    client.put(f"{API_VERSION_URL}/users/1", json={"first_name": "Johan"})
+    assert usernames(q="johan") == ["jdoe"]
+
+    first = client.get(f"{API_VERSION_URL}/users/search", params={"prefix": "j", "limit": 2})
+    assert [user["username"] for user in first.json()] == ["jdoe", "jsmith"]
+    assert usernames(prefix="j", limit=2, cursor=first.headers["X-Next-Cursor"]) == ["mjohnson"]
+
+
+def test_read_users_sparse_fields(client):
+    """
+    `fields` limita las columnas leídas y los campos devueltos.
+    """
+    for i in range(3):
+        client.post(
+            f"{API_VERSION_URL}/users/",
+            json={"username": f"sparse{i}", "email": f"sparse{i}@example.com", "first_name": "S"},
+        )
+    response = client.get(
+        f"{API_VERSION_URL}/users/", params={"fields": "email, id,username", "limit": 2}
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": 1, "username": "sparse0", "email": "sparse0@example.com"},
+        {"id": 2, "username": "sparse1", "email": "sparse1@example.com"},
+    ]
+    assert "X-Next-Cursor" in response.headers
+    full_etag = client.get(f"{API_VERSION_URL}/users/", params={"limit": 2}).headers["ETag"]
+    assert response.headers["ETag"] != full_etag
+
+    by_created = client.get(
+        f"{API_VERSION_URL}/users/",
+        params={"fields": "username", "limit": 2, "order_by": "created_at"},
+    )
+    next_page = client.get(
+        f"{API_VERSION_URL}/users/",
+        params={
+            "fields": "username",
+            "limit": 2,
+            "order_by": "created_at",
+            "cursor": by_created.headers["X-Next-Cursor"],
+        },
+    )
+    assert next_page.json() == [{"username": "sparse2"}]
+
+    user = client.get(f"{API_VERSION_URL}/users/1", params={"fields": "first_name"})
+    assert user.json() == {"first_name": "S"}
+    invalid = client.get(f"{API_VERSION_URL}/users/", params={"fields": "id,password"})
+    assert invalid.status_code == 400
+
+
+def test_get_multi_loads_only_requested_columns(db_session):
+    """
+    La proyección se aplica en el SELECT.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        crud_user.get_multi(db_session, limit=10, columns=["email"])
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    select_clause = statements[-1].split("FROM")[0]
+    assert "users.email" in select_clause and "users.id" in select_clause
+    assert "users.first_name" not in select_clause
+
+
+def test_writes_are_single_statements(client):
+    """
+    Alta, actualización y baja se resuelven con una sola sentencia SQL cada una;
+    la fila inexistente se detecta sin lectura previa.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        user_id = client.post(
+            f"{API_VERSION_URL}/users/", json={"username": "single", "email": "single@example.com"}
+        ).json()["id"]
+        assert statements == ["INSERT"]
+
+        statements.clear()
+        response = client.put(f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Uno"})
+        assert response.json()["first_name"] == "Uno"
+        assert statements == ["UPDATE"]
+
+        statements.clear()
+        assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 204
+        assert statements == ["DELETE"]
+
+        statements.clear()
+        assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 404
+        assert client.put(f"{API_VERSION_URL}/users/{user_id}", json={"role": "admin"}).status_code == 404
+        assert statements == ["DELETE", "UPDATE"]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def test_update_user_if_match(client):
+    """
+    PUT con If-Match solo se aplica sobre la versión indicada; si cambió, 412.
+    """
+    user_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "versioned", "email": "versioned@example.com"}
+    ).json()["id"]
+    etag = client.get(f"{API_VERSION_URL}/users/{user_id}").headers["ETag"]
+    assert etag == '"1"'
+
+    first = client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Uno"}, headers={"If-Match": etag}
+    )
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"2"'
+
+    # Una segunda escritura con la misma versión leída pierde la carrera
+    stale = client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Dos"}, headers={"If-Match": etag}
+    )
+    assert stale.status_code == 412
+    assert client.get(f"{API_VERSION_URL}/users/{user_id}").json()["first_name"] == "Uno"
+
+    assert client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Dos"}, headers={"If-Match": "*"}
+    ).headers["ETag"] == '"3"'
+    assert client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Tres"}, headers={"If-Match": 'W/"3"'}
+    ).status_code == 412
+    assert client.put(
+        f"{API_VERSION_URL}/users/999", json={"first_name": "X"}, headers={"If-Match": '"1"'}
+    ).status_code == 412
+
+
+def test_update_user_if_match_conflict(client):
+    """
+    Un valor único duplicado responde 409 aun con If-Match, sin cambiar la versión.
+    """
+    client.post(f"{API_VERSION_URL}/users/", json={"username": "taken", "email": "taken@example.com"})
+    user_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "other", "email": "other@example.com"}
+    ).json()["id"]
+    response = client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"username": "taken"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"] == "El nombre de usuario ya existe."
+    assert client.get(f"{API_VERSION_URL}/users/{user_id}").headers["ETag"] == '"1"'
+
+
+def test_issue_token_with_password(client, monkeypatch):
+    """
+    Un usuario creado con contraseña obtiene un token válido para los endpoints
+    protegidos; la contraseña nunca se devuelve.
+    """
+    created = client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "login", "email": "login@example.com", "password": "s3cr3t-pass"},
+    )
+    assert created.status_code == 201
+    assert "password" not in created.json() and "hashed_password" not in created.json()
+    victim_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "victim", "email": "victim@example.com"}
+    ).json()["id"]
+
+    credentials = {"username": "login", "password": "s3cr3t-pass"}
+    response = client.post(f"{API_VERSION_URL}/auth/token", json=credentials)
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert response.json()["token_type"] == "bearer"
+    assert client.delete(
+        f"{API_VERSION_URL}/users/secure/{victim_id}", headers={"Authorization": f"Bearer {token}"}
+    ).status_code == 204
+
+    wrong = client.post(f"{API_VERSION_URL}/auth/token", json={**credentials, "password": "otra-clave"})
+    assert wrong.status_code == 401
+    unknown = client.post(f"{API_VERSION_URL}/auth/token", json={**credentials, "username": "nadie"})
+    assert unknown.status_code == 401
+
+    bulk = client.post(
+        f"{API_VERSION_URL}/users/bulk",
+        json=[{"username": "bulklogin", "email": "bulklogin@example.com", "password": "bulk-pass"}],
+    )
+    assert bulk.json()["created"] == 1
+    assert client.post(
+        f"{API_VERSION_URL}/auth/token", json={"username": "bulklogin", "password": "bulk-pass"}
+    ).status_code == 200
+
+    # Con la cola de hash llena se responde 503 de inmediato
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    busy = client.post(f"{API_VERSION_URL}/auth/token", json=credentials)
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+
+
+def test_revoke_token(client, db_session):
+    """
+    Un token revocado deja de aceptarse de inmediato y queda registrado para
+    los demás procesos.
+    """
+    revocation_index.clear()
+    token = signJWT("revoker")["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    victim_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "victim", "email": "victim@example.com"}
+    ).json()["id"]
+
+    assert client.post(f"{API_VERSION_URL}/auth/revoke", headers=headers).status_code == 204
+    assert client.delete(
+        f"{API_VERSION_URL}/users/secure/{victim_id}", headers=headers
+    ).status_code == 403
+    assert client.post(f"{API_VERSION_URL}/auth/revoke", headers=headers).status_code == 403
+
+    # Otro proceso conoce la revocación en su siguiente sondeo
+    other = RevocationIndex()
+    assert other.refresh(db_session) == 1
+    assert len(other) == 1
+    revocation_index.clear()
+
+
+def test_concurrent_reads_are_coalesced(client, monkeypatch):
+    """
+    Las lecturas idénticas concurrentes de un usuario comparten una sola
+    consulta y una sola serialización, salvo las de un cliente que acaba de
+    escribir.
+    """
+    monkeypatch.setattr(settings, "USERS_COALESCE_READS", True)
+    user_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "shared", "email": "shared@example.com"}
+    ).json()["id"]
+    reads = users_endpoints.user_reads
+    before = reads.coalesced
+    original_get = crud_user.get
+    calls = []
+
+    def slow_get(db, id):
+        calls.append(id)
+        deadline = time.monotonic() + 5
+        while reads.coalesced < before + 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return original_get(db, id=id)
+
+    monkeypatch.setattr(crud_user, "get", slow_get)
+
+    def read_concurrently():
+        responses = []
+        threads = [
+            threading.Thread(
+                target=lambda: responses.append(client.get(f"{API_VERSION_URL}/users/{user_id}"))
+            )
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    responses = read_concurrently()
+    assert calls == [user_id]
+    assert reads.coalesced - before == 2
+    assert [r.status_code for r in responses] == [200] * 3
+    assert len({r.content for r in responses}) == 1
+    assert len({r.headers["ETag"] for r in responses}) == 1
+    assert responses[0].json()["username"] == "shared"
+
+    # Con la cookie de lectura de las propias escrituras cada petición consulta
+    client.cookies.set(PRIMARY_UNTIL_COOKIE, f"{time.time() + 60:.3f}")
+    responses = read_concurrently()
+    assert calls == [user_id] * 4
+    assert reads.coalesced - before == 2
+    assert [r.status_code for r in responses] == [200] * 3
+
+
+def test_create_user_idempotency_key(client, monkeypatch):
+    """
+    Con Idempotency-Key la primera respuesta se guarda y se repite en los
+    reintentos; la misma clave con otro cuerpo devuelve 422.
+    """
+    monkeypatch.setattr(users_endpoints, "user_creations", InMemoryIdempotencyStore())
+    payload = {"username": "retry", "email": "retry@example.com"}
+    headers = {"Idempotency-Key": "alta-1"}
+    first = client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len(client.get(f"{API_VERSION_URL}/users/").json()) == 1
+
+    other = client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "other", "email": "other@example.com"},
+        headers=headers,
+    )
+    assert other.status_code == 422
+
+    # Un 409 también es la respuesta de su clave, aunque el conflicto desaparezca
+    conflict_headers = {"Idempotency-Key": "alta-2"}
+    conflict = client.post(f"{API_VERSION_URL}/users/", json=payload, headers=conflict_headers)
+    assert conflict.status_code == 409
+    client.delete(f"{API_VERSION_URL}/users/{first.json()['id']}")
+    replayed = client.post(f"{API_VERSION_URL}/users/", json=payload, headers=conflict_headers)
+    assert replayed.status_code == 409
+    assert replayed.json() == conflict.json()
+
+
+def test_create_user_idempotency_concurrent_duplicate_waits(client, monkeypatch):
+    """
+    Un duplicado que llega mientras la primera petición está en curso espera
+    su respuesta en lugar de insertar otra vez.
+    """
+    waiting = threading.Event()
+
+    class Store(InMemoryIdempotencyStore):
+        def wait(self, key, timeout):
+            waiting.set()
+            super().wait(key, timeout)
+
+    monkeypatch.setattr(users_endpoints, "user_creations", Store())
+    original_insert = users_endpoints.insert_user
+    inserts = []
+
+    def slow_insert(db, user):
+        inserts.append(user.username)
+        waiting.wait(5)
+        return original_insert(db, user)
+
+    monkeypatch.setattr(users_endpoints, "insert_user", slow_insert)
+    payload = {"username": "concurrent", "email": "concurrent@example.com"}
+    responses = []
+
+    def post():
+        responses.append(
+            client.post(
+                f"{API_VERSION_URL}/users/", json=payload, headers={"Idempotency-Key": "same"}
+            )
+        )
+
+    threads = [threading.Thread(target=post) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert inserts == ["concurrent"]
+    assert sorted(r.status_code for r in responses) == [201, 201]
+    assert sorted(r.headers.get("Idempotent-Replayed", "") for r in responses) == ["", "true"]
+    assert responses[0].json() == responses[1].json()
+
+
+def test_create_user_idempotency_releases_on_server_error(client, monkeypatch):
+    """
+    Un error 5xx no se guarda: el reintento con la misma clave vuelve a ejecutarse.
+    """
+    monkeypatch.setattr(users_endpoints, "user_creations", InMemoryIdempotencyStore())
+    original_insert = users_endpoints.insert_user
+    failures = [HTTPException(status_code=503, detail="Servicio saturado")]
+
+    def flaky_insert(db, user):
+        if failures:
+            raise failures.pop()
+        return original_insert(db, user)
+
+    monkeypatch.setattr(users_endpoints, "insert_user", flaky_insert)
+    payload = {"username": "flaky", "email": "flaky@example.com"}
+    headers = {"Idempotency-Key": "alta-3"}
+    assert client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers).status_code == 503
+    retry = client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers)
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
@@ -0,0 +1,370 @@
+# tests/test_users_async.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.deps import get_async_db, get_db
+from app.core.idempotency import InMemoryIdempotencyStore
+from app.crud import async_crud_user
+from app.db.base import Base
+from app.db.session import get_async_database_url
+from app.endpoints.v1 import users, users_async
+
+# Base de datos de prueba: las tablas se crean con el motor síncrono y los
+# endpoints usan el motor asíncrono (aiosqlite) sobre el mismo archivo.
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_async_db.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool
+)
+TestingAsyncSession = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+TestingSession = sessionmaker(bind=engine, autoflush=False)
+
+API_VERSION_URL = "api/v1"
+
+
+@pytest.fixture(name="client")
+def client_fixture():
+    """
+    Fixture para el cliente de prueba con los endpoints asíncronos.
+    """
+    Base.metadata.create_all(bind=engine)
+    async_crud_user.cache.clear()
+
+    async def override_get_async_db():
+        async with TestingAsyncSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(users_async.router, prefix="/api/v1")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_async_database_url():
+    """
+    Prueba la traducción de URLs síncronas a sus drivers asíncronos.
+    """
+    assert get_async_database_url("sqlite:///./a.db") == "sqlite+aiosqlite:///./a.db"
+    assert (
+        get_async_database_url("postgresql+psycopg2://u:p@h/db")
+        == "postgresql+asyncpg://u:p@h/db"
+    )
+
+
+def test_async_crud_flow(client):
+    """
+    Prueba crear, listar, obtener, actualizar y eliminar con la sesión asíncrona.
+    """
+    response = client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "async_user", "email": "async@example.com"},
+    )
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+
+    duplicate = client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "async_user", "email": "other@example.com"},
+    )
+    assert duplicate.status_code == 409
+
+    response = client.get(f"{API_VERSION_URL}/users/", params={"limit": 1})
+    assert [u["id"] for u in response.json()] == [user_id]
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Async"}
+    )
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "Async"
+
+    assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 204
+    assert client.get(f"{API_VERSION_URL}/users/{user_id}").status_code == 404
+    assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 404
+
+
+@pytest.fixture(name="any_client", params=["sync", "async"])
+def any_client_fixture(request, client):
+    """
+    Cliente con los endpoints síncronos o con los asíncronos (DB_ASYNC) sobre
+    la misma base, para verificar que ambos se comportan igual.
+    """
+    if request.param == "async":
+        yield client
+        return
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(users.router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+
+
+def test_conditional_requests_on_both_routers(any_client):
+    """
+    GET envía ETag y Last-Modified y responde 304; PUT con un If-Match
+    desactualizado responde 412; `fields` proyecta la salida.
+    """
+    user_id = any_client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "etag", "email": "etag@example.com"}
+    ).json()["id"]
+
+    response = any_client.get(f"{API_VERSION_URL}/users/{user_id}")
+    assert response.headers["ETag"] == '"1"'
+    assert "Last-Modified" in response.headers
+    assert any_client.get(
+        f"{API_VERSION_URL}/users/{user_id}", headers={"If-None-Match": '"1"'}
+    ).status_code == 304
+    partial = any_client.get(f"{API_VERSION_URL}/users/{user_id}", params={"fields": "username"})
+    assert partial.json() == {"username": "etag"}
+    assert partial.headers["ETag"] != '"1"'
+
+    page = any_client.get(f"{API_VERSION_URL}/users/", params={"limit": 10})
+    page_etag = page.headers["ETag"]
+    assert any_client.get(
+        f"{API_VERSION_URL}/users/", params={"limit": 10}, headers={"If-None-Match": page_etag}
+    ).status_code == 304
+    assert any_client.get(
+        f"{API_VERSION_URL}/users/", params={"limit": 10, "fields": "id,username"}
+    ).json() == [{"id": user_id, "username": "etag"}]
+
+    stale = any_client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "X"}, headers={"If-Match": '"99"'}
+    )
+    assert stale.status_code == 412
+    updated = any_client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Uno"}, headers={"If-Match": '"1"'}
+    )
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] == '"2"'
+    assert updated.json()["first_name"] == "Uno"
+    assert any_client.put(
+        f"{API_VERSION_URL}/users/{user_id}", json={"first_name": "Dos"}, headers={"If-Match": '"1"'}
+    ).status_code == 412
+    assert any_client.put(
+        f"{API_VERSION_URL}/users/999", json={"first_name": "Dos"}
+    ).status_code == 404
+
+    # La página cambió: el ETag anterior ya no coincide
+    assert any_client.get(
+        f"{API_VERSION_URL}/users/", params={"limit": 10}, headers={"If-None-Match": page_etag}
+    ).status_code == 200
+
+
+def test_create_user_idempotency_on_both_routers(any_client, monkeypatch):
+    """
+    Con Idempotency-Key ambos routers guardan y repiten la primera respuesta y
+    devuelven 422 si la clave se reutiliza con otro cuerpo.
+    """
+    monkeypatch.setattr(users, "user_creations", InMemoryIdempotencyStore())
+    payload = {"username": "retry", "email": "retry@example.com"}
+    headers = {"Idempotency-Key": "alta-1"}
+    first = any_client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    retry = any_client.post(f"{API_VERSION_URL}/users/", json=payload, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len(any_client.get(f"{API_VERSION_URL}/users/").json()) == 1
+
+    other = any_client.post(
+        f"{API_VERSION_URL}/users/",
+        json={"username": "other", "email": "other@example.com"},
+        headers=headers,
+    )
+    assert other.status_code == 422
+
+    conflict_headers = {"Idempotency-Key": "alta-2"}
+    conflict = any_client.post(f"{API_VERSION_URL}/users/", json=payload, headers=conflict_headers)
+    assert conflict.status_code == 409
+    replayed = any_client.post(f"{API_VERSION_URL}/users/", json=payload, headers=conflict_headers)
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json() == conflict.json()
+
+
+def test_async_routes_accept_the_same_parameters():
+    """
+    Cada ruta asíncrona que reemplaza a una síncrona (DB_ASYNC) acepta los
+    mismos parámetros de consulta y encabezados.
+    """
+    def parameters(route):
+        dependant = route.dependant
+        return (
+            {param.alias for param in dependant.query_params},
+            {param.alias for param in dependant.header_params},
+        )
+
+    sync_routes = {
+        (route.path, frozenset(route.methods)): route for route in users.router.routes
+    }
+    for route in users_async.router.routes:
+        sync_route = sync_routes[(route.path, frozenset(route.methods))]
+        assert parameters(route) == parameters(sync_route), route.path
+
+
+def test_create_conflicts_on_both_routers(any_client):
+    """
+    Un alta duplicada responde 409 indicando qué valor ya existe.
+    """
+    payload = {"username": "dup", "email": "dup@example.com"}
+    assert any_client.post(f"{API_VERSION_URL}/users/", json=payload).status_code == 201
+
+    email = any_client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "otro", "email": "dup@example.com"}
+    )
+    assert email.status_code == 409
+    assert email.json()["detail"] == "La dirección de correo electrónico ya existe."
+    username = any_client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "dup", "email": "otro@example.com"}
+    )
+    assert username.status_code == 409
+    assert username.json()["detail"] == "El nombre de usuario ya existe."
+
+
+def test_update_conflicts_on_both_routers(any_client):
+    """
+    Un cambio a un nombre de usuario o correo en uso responde 409 con el mismo
+    mensaje en ambos routers; reescribir el propio valor no es un conflicto.
+    """
+    first = any_client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "uno", "email": "uno@example.com"}
+    ).json()["id"]
+    any_client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "dos", "email": "dos@example.com"}
+    )
+
+    email = any_client.put(f"{API_VERSION_URL}/users/{first}", json={"email": "dos@example.com"})
+    assert email.status_code == 409
+    assert email.json()["detail"] == "La dirección de correo electrónico ya existe."
+    username = any_client.put(f"{API_VERSION_URL}/users/{first}", json={"username": "dos"})
+    assert username.status_code == 409
+    assert username.json()["detail"] == "El nombre de usuario ya existe."
+    same = any_client.put(f"{API_VERSION_URL}/users/{first}", json={"username": "uno"})
+    assert same.status_code == 200
+
+
+def test_async_remove_is_a_single_delete(client):
+    """
+    El borrado asíncrono ejecuta un único DELETE (sin SELECT previo) y devuelve
+    None si la fila no existe.
+    """
+    user_id = client.post(
+        f"{API_VERSION_URL}/users/", json={"username": "gone", "email": "gone@example.com"}
+    ).json()["id"]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 204
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("DELETE")
+    assert client.delete(f"{API_VERSION_URL}/users/{user_id}").status_code == 404
+
+
+APP_WITH_DB_ASYNC = """
+import json
+
+from fastapi.testclient import TestClient
+
+from app.crud import async_crud_user, crud_user
+from app.db import session
+from app.db.base import Base
+from app.endpoints.v1 import users, users_async
+from app.main import app
+
+Base.metadata.create_all(bind=session.engine)
+routes = {
+    (route.path, method): route.endpoint
+    for route in app.routes
+    for method in getattr(route, "methods", ())
+}
+assert routes[("/api/v1/users/", "GET")] is users_async.read_users
+assert routes[("/api/v1/users/{user_id}", "PUT")] is users_async.update_user
+assert routes[("/api/v1/users/bulk", "POST")] is users.create_users_bulk
+assert routes[("/api/v1/users/search", "GET")] is users.search_users
+assert crud_user.cache is async_crud_user.cache
+
+with TestClient(app) as client:
+    url = "/api/v1/users"
+    bulk = client.post(f"{url}/bulk", json=[
+        {"username": "mixto1", "email": "mixto1@example.com"},
+        {"username": "mixto2", "email": "mixto2@example.com"},
+    ])
+    assert bulk.json()["created"] == 2, bulk.text
+    ids = [item["user"]["id"] for item in bulk.json()["results"]]
+
+    # Lectura asíncrona (llena la caché) y escritura asíncrona
+    assert client.get(f"{url}/{ids[0]}").json()["username"] == "mixto1"
+    assert client.put(f"{url}/{ids[0]}", json={"first_name": "Zeta"}).status_code == 200
+
+    # Las rutas síncronas ven la escritura asíncrona, y al revés
+    exported = [json.loads(line) for line in client.get(f"{url}/export").text.splitlines()]
+    assert [row["first_name"] for row in exported] == ["Zeta", None]
+    found = client.get(f"{url}/search", params={"prefix": "zet"}).json()
+    assert [user["id"] for user in found] == [ids[0]]
+    imported = client.post(
+        f"{url}/import", params={"format": "csv"},
+        content="username,email\\nmixto3,mixto3@example.com\\n",
+    )
+    assert json.loads(imported.text.splitlines()[0])["created"] == 1
+    assert [u["username"] for u in client.get(f"{url}/").json()] == ["mixto1", "mixto2", "mixto3"]
+
+    assert client.delete(f"{url}/{ids[1]}").status_code == 204
+    assert client.get(f"{url}/{ids[1]}").status_code == 404
+    exported = [json.loads(line) for line in client.get(f"{url}/export").text.splitlines()]
+    assert [row["username"] for row in exported] == ["mixto1", "mixto3"]
+"""
+
+
+def test_app_with_db_async_mixes_both_route_families(tmp_path):
+    """
+    app.main con DB_ASYNC=true: las rutas asíncronas reemplazan a las CRUD y
+    conviven con las síncronas (bulk, import, export, search) sobre la misma
+    base y la misma caché.
+    """
+    env = dict(
+        os.environ,
+        DB_ASYNC="true",
+        SQLALCHEMY_DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}",
+        USERS_CACHE_BACKEND="memory",
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", APP_WITH_DB_ASYNC],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]